@@ -3,46 +3,127 @@ from flask_cors import CORS
 import pandas as pd
 from pathlib import Path
 from datetime import datetime
+import sys
+
+# Share the data layer with the Streamlit dashboard
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pharma_dashboard.bitmap_index import BitmapIndex
+from pharma_dashboard.churn import ChurnTracker
+from pharma_dashboard.cube import SalesCube, order_count
+from pharma_dashboard.date_index import day_stop
+from pharma_dashboard.filter_plan import FilterPlan
+from pharma_dashboard.result_cache import canonical_filters, dataset_version, get_result_cache
+from pharma_dashboard.incremental import (
+    append_processed_rows, load_incremental, read_sales_dataset, refresh_sales_dataset
+)
+from pharma_dashboard.prefix_sums import DailyPrefixSums, comparison_periods, flatten_comparison, period_totals
+from pharma_dashboard.search_index import SearchIndex
+from pharma_dashboard.top_k import TRACKED_DIMENSIONS, TopKTracker, top_k_exact
 
 app = Flask(__name__)
 CORS(app)
 
-# Load and prepare data once at startup
+result_cache = get_result_cache()
+
+data_dir = Path(__file__).parent.parent / 'data'
+
+def prepare_sales(df):
+    """Add the derived columns the API responses group by"""
+    df['Month'] = df['date'].dt.strftime('%Y-%m')
+    return df
+
+# Load and prepare data once at startup; only rows appended since the last run are parsed
 try:
-    data_dir = Path(__file__).parent.parent / 'data'
-    sales_df = pd.read_csv(data_dir / 'sales.csv')
-    
-    # Basic data preparation
-    sales_df['Date'] = pd.to_datetime(sales_df['Date'])
-    sales_df['Month'] = sales_df['Date'].dt.strftime('%Y-%m')
+    sales_df, _, _ = load_incremental(data_dir)
+    sales_df = prepare_sales(sales_df)
+    dataset_version(sales_df)
+    bitmap_index = BitmapIndex(sales_df)
+    search_index = SearchIndex(sales_df)
+    sales_cube = SalesCube(sales_df)
+    prepare_sales(sales_cube.cells)
+    product_prefix = DailyPrefixSums(sales_df, ('product_name',))
+    top_tracker = TopKTracker().update(sales_df)
+    churn_tracker = ChurnTracker().update(sales_df)
     
     print("Data loaded successfully!")
 except Exception as e:
     print(f"Error loading data: {e}")
     sales_df = pd.DataFrame()
+    bitmap_index = None
+    search_index = None
+    sales_cube = None
+    product_prefix = None
+    top_tracker = None
+    churn_tracker = None
 
-def apply_filters(df, start_date=None, end_date=None, product=None, search=None):
-    filtered_df = df.copy()
-    
-    if start_date:
-        start_date = pd.to_datetime(start_date)
-        filtered_df = filtered_df[filtered_df['Date'] >= start_date]
-    
-    if end_date:
-        end_date = pd.to_datetime(end_date)
-        filtered_df = filtered_df[filtered_df['Date'] <= end_date]
-    
+def selected_product_list(product=None, products=None):
+    """Merge the single product and multi-select product parameters"""
+    selected_products = list(products or [])
     if product and product != 'all':
-        filtered_df = filtered_df[filtered_df['Product'] == product]
+        selected_products.append(product)
+    return selected_products
+
+def apply_filters(df, start_date=None, end_date=None, product=None, search=None, products=None,
+                  index=None, search_index=None):
+    selected_products = selected_product_list(product, products)
     
-    if search:
-        search = search.lower()
-        filtered_df = filtered_df[
-            filtered_df['Product'].str.lower().str.contains(search) |
-            filtered_df['Customer'].str.lower().str.contains(search)
-        ]
+    # Date bounds are inclusive days; the plan evaluates the most selective filter first
+    return (
+        FilterPlan(df, index, search_index)
+        .date_range(
+            pd.to_datetime(start_date) if start_date else None,
+            day_stop(end_date) if end_date else None
+        )
+        .isin('product_name', selected_products)
+        .search(search)
+        .frame()
+    )
+
+def build_overview(filtered_df):
+    """Overview metrics and summaries for the filtered rows or cube cells"""
+    # Calculate metrics
+    monthly_sales = filtered_df.groupby('Month')['sales_amount'].sum().reset_index()
+    monthly_sales.columns = ['Month', 'Total']
+    product_sales = filtered_df.groupby('product_name', observed=True)['sales_amount'].sum().reset_index()
+    product_sales.columns = ['Product', 'Total']
+    product_sales = product_sales.sort_values('Total', ascending=True)
     
-    return filtered_df
+    total_sales = float(filtered_df['sales_amount'].sum())
+    total_orders = order_count(filtered_df)
+    response = {
+        'total_sales': total_sales,
+        'total_units': int(filtered_df['units_sold'].sum()),
+        'total_orders': total_orders,
+        'avg_order_value': total_sales / total_orders if total_orders > 0 else 0,
+        'monthly_trend': monthly_sales.to_dict('records'),
+        'product_summary': product_sales.to_dict('records'),
+        'products': sorted(sales_df['product_name'].unique().tolist()),
+        'date_range': {
+            'min': sales_df['date'].min().strftime('%Y-%m-%d'),
+            'max': sales_df['date'].max().strftime('%Y-%m-%d')
+        }
+    }
+    return response
+
+def compare_periods(filters):
+    """previous_* and last_year_* totals for the requested date range and products"""
+    start = pd.Timestamp(filters['start_date'] or sales_df['date'].min())
+    stop = day_stop(filters['end_date'] or sales_df['date'].max())
+    products = selected_product_list(filters['product'], filters['products'])
+    if product_prefix is not None and not filters['search']:
+        # O(1) differences of per-day prefix sums
+        comparison = product_prefix.compare(start, stop, product_name=products)
+    else:
+        # Search is a row-level filter, so the other periods have to be filtered the same way
+        comparison = {
+            period: period_totals(apply_filters(
+                sales_df, period_start, period_stop - pd.Timedelta(days=1), None,
+                filters['search'], products, bitmap_index, search_index
+            ))
+            for period, (period_start, period_stop) in comparison_periods(start, stop).items()
+            if period != 'current'
+        }
+    return flatten_comparison(comparison)
 
 @app.route('/api/data/overview', methods=['GET'])
 def get_overview():
@@ -55,31 +136,131 @@ def get_overview():
         end_date = request.args.get('end_date')
         product = request.args.get('product')
         search = request.args.get('search')
+        products = [name for name in request.args.get('products', '').split(',') if name]
         
-        # Apply filters
-        filtered_df = apply_filters(sales_df, start_date, end_date, product, search)
-        
-        # Calculate metrics
-        monthly_sales = filtered_df.groupby('Month')['Total'].sum().reset_index()
-        product_sales = filtered_df.groupby('Product')['Total'].sum().reset_index()
-        product_sales = product_sales.sort_values('Total', ascending=True)
-        
-        response = {
-            'total_sales': float(filtered_df['Total'].sum()),
-            'total_units': int(filtered_df['Quantity'].sum()),
-            'total_orders': len(filtered_df),
-            'monthly_trend': monthly_sales.to_dict('records'),
-            'product_summary': product_sales.to_dict('records'),
-            'products': sorted(sales_df['Product'].unique().tolist()),
-            'date_range': {
-                'min': sales_df['Date'].min().strftime('%Y-%m-%d'),
-                'max': sales_df['Date'].max().strftime('%Y-%m-%d')
-            }
-        }
+        # Equivalent filter states share one cached response until the dataset changes
+        filters, key = canonical_filters(
+            start_date=pd.to_datetime(start_date) if start_date else None,
+            end_date=pd.to_datetime(end_date) if end_date else None,
+            product=product,
+            products=products, search=search.lower() if search else None
+        )
+        cache_key = ('overview', dataset_version(sales_df), key)
+        response = result_cache.get(cache_key)
+        if response is None:
+            if sales_cube is not None and sales_cube.can_answer(search=filters['search']):
+                # Date and product filters only: answer from the daily cube
+                filtered_df = apply_filters(
+                    sales_cube.cells, filters['start_date'], filters['end_date'], filters['product'],
+                    None, filters['products']
+                )
+            else:
+                # Apply filters
+                filtered_df = apply_filters(
+                    sales_df, filters['start_date'], filters['end_date'], filters['product'],
+                    filters['search'], filters['products'], bitmap_index, search_index
+                )
+            response = build_overview(filtered_df)
+            response.update(compare_periods(filters))
+            result_cache.put(cache_key, response)
         return jsonify(response)
     except Exception as e:
         print(f"Error in overview: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/data/top', methods=['GET'])
+def get_top():
+    """Top N products, regions or customers by sales for the filters"""
+    try:
+        if sales_df.empty:
+            return jsonify({'error': 'No data available'}), 500
+        
+        dimension = request.args.get('dimension', 'product_name')
+        if dimension not in TRACKED_DIMENSIONS:
+            return jsonify({'error': f"dimension must be one of {', '.join(TRACKED_DIMENSIONS)}"}), 400
+        k = request.args.get('k', 5, type=int)
+        start_date = request.args.get('start_date')
+        end_date = request.args.get('end_date')
+        product = request.args.get('product')
+        search = request.args.get('search')
+        products = [name for name in request.args.get('products', '').split(',') if name]
+        
+        if top_tracker is not None and not search and not selected_product_list(product, products):
+            # Date range only: merge the tracker's day buckets
+            top = top_tracker.top(
+                dimension, k,
+                pd.to_datetime(start_date) if start_date else None,
+                day_stop(end_date) if end_date else None
+            )
+            exact = bool((top['error'] == 0).all())
+        else:
+            filtered_df = apply_filters(
+                sales_df, start_date, end_date, product, search, products, bitmap_index, search_index
+            )
+            top = pd.DataFrame(
+                top_k_exact(filtered_df[dimension], filtered_df['sales_amount'], k),
+                columns=[dimension, 'sales_amount']
+            )
+            top['error'] = 0.0
+            exact = True
+        top[dimension] = top[dimension].astype(str)
+        return jsonify({'dimension': dimension, 'exact': exact, 'top': top.to_dict('records')})
+    except Exception as e:
+        print(f"Error in top: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/data/churn', methods=['GET'])
+def get_churn():
+    """Monthly total customers, churned customers and churn rate"""
+    try:
+        if churn_tracker is None:
+            return jsonify({'error': 'No data available'}), 500
+        churn = churn_tracker.monthly()
+        churn['month'] = churn['month'].dt.strftime('%Y-%m')
+        return jsonify(churn.to_dict('records'))
+    except Exception as e:
+        print(f"Error in churn: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/cache/stats', methods=['GET'])
+def get_cache_stats():
+    return jsonify(result_cache.stats())
+
+@app.route('/api/data/refresh', methods=['POST'])
+def refresh_data():
+    """Pull rows appended to sales.csv into the served dataset without a restart"""
+    global sales_df, bitmap_index, search_index, sales_cube, product_prefix, top_tracker, churn_tracker
+    try:
+        # Appended rows go straight into the incremental trackers; other modes rebuild them
+        appended = []
+        def on_append(rows):
+            appended.append(rows)
+            if top_tracker is not None:
+                top_tracker.update(rows)
+            if churn_tracker is not None:
+                churn_tracker.update(rows)
+        summary = refresh_sales_dataset(data_dir, on_append=on_append)
+        if summary['mode'] != 'unchanged' or sales_df.empty:
+            if summary['mode'] == 'append' and not sales_df.empty:
+                # Extend the served frame in memory instead of reading every part back
+                for rows in appended:
+                    sales_df = append_processed_rows(sales_df, prepare_sales(rows.copy()))
+            else:
+                sales_df = prepare_sales(read_sales_dataset(data_dir))
+            dataset_version(sales_df)
+            bitmap_index = BitmapIndex(sales_df)
+            search_index = SearchIndex(sales_df)
+            sales_cube = SalesCube(sales_df)
+            prepare_sales(sales_cube.cells)
+            product_prefix = DailyPrefixSums(sales_df, ('product_name',))
+            if summary['mode'] != 'append' or top_tracker is None:
+                top_tracker = TopKTracker().update(sales_df)
+            if summary['mode'] != 'append' or churn_tracker is None:
+                churn_tracker = ChurnTracker().update(sales_df)
+        return jsonify(summary)
+    except Exception as e:
+        print(f"Error refreshing data: {e}")
+        return jsonify({'error': str(e)}), 500
+
 if __name__ == '__main__':
     app.run(debug=True, port=5001) 
\ No newline at end of file
@@ -0,0 +1,86 @@
+"""
+Benchmark: serial vs. multi-process parsing of a synthetic sales.csv.
+
+Usage:
+    python benchmarks/parallel_load.py --rows 2000000 --workers 1 2 4 8
+
+Generates products, customers and sales CSVs in a temporary directory,
+times load_and_preprocess_data serially and with each worker count, and
+checks every parallel result against the serial one.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pharma_dashboard.data_processor import load_and_preprocess_data
+
+def generate_data(data_dir, rows, seed=0):
+    """Write synthetic products, customers and sales CSVs"""
+    rng = np.random.default_rng(seed)
+    products = [f"Product_{i}" for i in range(300)]
+    customers = [f"Customer_{i}" for i in range(5000)]
+    pd.DataFrame({
+        'Product': products,
+        'Category': [f"Category_{i % 12}" for i in range(len(products))],
+        'product_id': range(1, len(products) + 1)
+    }).to_csv(data_dir / 'products.csv', index=False)
+    pd.DataFrame({
+        'Customer': customers,
+        'Region': [f"Region_{i % 12}" for i in range(len(customers))],
+        'Customer Type': [['Hospital', 'Clinic', 'Pharmacy'][i % 3] for i in range(len(customers))],
+        'customer_id': range(1, len(customers) + 1)
+    }).to_csv(data_dir / 'customers.csv', index=False)
+
+    quantity = rng.integers(1, 100, rows)
+    unit_price = rng.uniform(1, 500, rows).round(2)
+    dates = pd.Timestamp('2020-01-01') + pd.to_timedelta(np.sort(rng.integers(0, 1460, rows)), unit='D')
+    pd.DataFrame({
+        'Invoice ID': np.arange(rows),
+        'Date': dates.strftime('%Y-%m-%d'),
+        'Customer': rng.choice(customers, rows),
+        'Product': rng.choice(products, rows),
+        'Quantity': quantity,
+        'Unit Price': unit_price,
+        'Total': (quantity * unit_price).round(2)
+    }).to_csv(data_dir / 'sales.csv', index=False)
+
+def time_load(data_dir, workers, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        sales_df, _, _ = load_and_preprocess_data(data_dir, use_snapshot=False, workers=workers)
+        best = min(best, time.perf_counter() - start)
+    return best, sales_df
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[2, 4, 8, os.cpu_count() or 1])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = Path(tmp)
+        generate_data(data_dir, args.rows)
+        size_mb = (data_dir / 'sales.csv').stat().st_size / 1e6
+        print(f"sales.csv: {args.rows:,} rows, {size_mb:.1f} MB, {os.cpu_count()} CPUs")
+
+        serial_time, serial_df = time_load(data_dir, None, args.repeat)
+        print(f"{'workers':>8} {'seconds':>9} {'speedup':>8}")
+        print(f"{'serial':>8} {serial_time:9.2f} {1.0:8.2f}")
+        for workers in sorted(set(args.workers)):
+            if workers < 2:
+                continue
+            elapsed, parallel_df = time_load(data_dir, workers, args.repeat)
+            pd.testing.assert_frame_equal(parallel_df, serial_df)
+            print(f"{workers:>8} {elapsed:9.2f} {serial_time / elapsed:8.2f}")
+
+if __name__ == '__main__':
+    main()
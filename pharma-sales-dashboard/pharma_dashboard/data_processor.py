@@ -1,73 +1,98 @@
 import pandas as pd
-import numpy as np
-from datetime import datetime
 import os
+import sys
 
-def load_and_process_data():
+# Reuse the shared validation engine and loader from the top-level package. The
+# repository root is appended, not prepended, and when this module is imported
+# as part of this project's own pharma_dashboard package, the shared package is
+# only searched for modules the project does not have.
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if __package__:
+    sys.modules[__package__].__path__.append(os.path.join(ROOT_DIR, 'pharma_dashboard'))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+from pharma_dashboard.parallel_loader import parallel_read_csv
+from pharma_dashboard.schema import apply_schema, read_table
+from pharma_dashboard.validation import (
+    allowed_values, not_in_future, not_null, positive, run_rules, totals_match, unique
+)
+
+VALID_CUSTOMER_TYPES = ['Hospital', 'Clinic', 'Pharmacy']
+
+SALES_RULES = [
+    not_in_future('Date'),
+    positive('Quantity'),
+    positive('Unit_Price'),
+    totals_match('Total', 'Quantity', 'Unit_Price', rtol=1e-05)
+]
+
+PRODUCT_RULES = [
+    unique(['product_id']),
+    not_null(['Product', 'Category', 'product_id'])
+]
+
+CUSTOMER_RULES = [
+    unique(['customer_id']),
+    not_null(['Customer', 'Region', 'Customer_Type']),
+    allowed_values('Customer_Type', VALID_CUSTOMER_TYPES)
+]
+
+def load_and_process_data(return_reports=False, workers=None):
     """
     Load and process data from CSV files.
     Implements data validation rules and cleaning.
+    With return_reports, also returns the per-table validation reports.
+    workers > 1 parses sales.csv across a process pool.
     """
     # Get the current directory
     current_dir = os.path.dirname(os.path.abspath(__file__))
     data_dir = os.path.join(os.path.dirname(current_dir), 'data')
     
     # Load data
-    sales_df = pd.read_csv(os.path.join(data_dir, 'sales.csv'))
+    # Both reads use the declared sales dtypes, so byte ranges cannot infer different ones
+    if workers and workers > 1:
+        sales_df = parallel_read_csv(os.path.join(data_dir, 'sales.csv'), workers, table='sales')
+        # Pieces carry their own categories, so re-apply the shared dtypes after concat
+        sales_df = apply_schema(sales_df, 'sales')
+    else:
+        sales_df = read_table(os.path.join(data_dir, 'sales.csv'), 'sales')
     products_df = pd.read_csv(os.path.join(data_dir, 'products.csv'))
     customers_df = pd.read_csv(os.path.join(data_dir, 'customers.csv'))
 
     # Data cleaning and validation
-    sales_df = clean_sales_data(sales_df)
-    products_df = clean_products_data(products_df)
-    customers_df = clean_customers_data(customers_df)
+    sales_df, sales_report = clean_sales_data(sales_df, return_report=True)
+    products_df, products_report = clean_products_data(products_df, return_report=True)
+    customers_df, customers_report = clean_customers_data(customers_df, return_report=True)
 
+    if return_reports:
+        reports = {'sales': sales_report, 'products': products_report, 'customers': customers_report}
+        return sales_df, products_df, customers_df, reports
     return sales_df, products_df, customers_df
 
-def clean_sales_data(df):
+def clean_sales_data(df, return_report=False):
     """
     Clean and validate sales data.
+    All rules are evaluated in one pass and the frame is filtered once.
     """
     # Convert date
     df['Date'] = pd.to_datetime(df['Date'])
     
-    # Remove future dates
-    df = df[df['Date'] <= datetime.now()]
-    
-    # Validate quantities and prices
-    df = df[df['Quantity'] > 0]
-    df = df[df['Unit_Price'] > 0]
-    
-    # Validate total amount
-    df['Calculated_Total'] = df['Quantity'] * df['Unit_Price']
-    df = df[np.isclose(df['Total'], df['Calculated_Total'], rtol=1e-05)]
-    
-    return df
+    # Remove future dates, non-positive quantities and prices, and mismatched totals
+    df, report = run_rules(df, SALES_RULES)
+    return (df, report) if return_report else df
 
-def clean_products_data(df):
+def clean_products_data(df, return_report=False):
     """
     Clean and validate products data.
     """
-    # Remove duplicates
-    df = df.drop_duplicates(subset=['product_id'])
-    
-    # Ensure required fields are not null
-    df = df.dropna(subset=['Product', 'Category', 'product_id'])
-    
-    return df
+    # Remove duplicates and rows missing required fields
+    df, report = run_rules(df, PRODUCT_RULES)
+    return (df, report) if return_report else df
 
-def clean_customers_data(df):
+def clean_customers_data(df, return_report=False):
     """
     Clean and validate customers data.
     """
-    # Remove duplicates
-    df = df.drop_duplicates(subset=['customer_id'])
-    
-    # Ensure required fields are not null
-    df = df.dropna(subset=['Customer', 'Region', 'Customer_Type'])
-    
-    # Validate customer types
-    valid_types = ['Hospital', 'Clinic', 'Pharmacy']
-    df = df[df['Customer_Type'].isin(valid_types)]
-    
-    return df 
\ No newline at end of file
+    # Remove duplicates, rows missing required fields and unknown customer types
+    df, report = run_rules(df, CUSTOMER_RULES)
+    return (df, report) if return_report else df
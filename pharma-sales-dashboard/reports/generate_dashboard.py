@@ -4,6 +4,11 @@ import plotly.express as px # type: ignore
 from plotly.subplots import make_subplots # type: ignore
 from datetime import datetime
 import os
+import sys
+
+# Reuse the shared comparison engine from the top-level package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from pharma_dashboard.comparison import TOTAL, PeriodComparison
 
 def load_data():
     """Load the CSV files"""
@@ -17,10 +22,9 @@ def load_data():
 
 def create_ytd_metrics(sales_df):
     """Create YTD metrics visualization"""
-    current_year = datetime.now().year
-    ytd_sales = sales_df[sales_df['date'].dt.year == current_year]['sales_amount'].sum()
-    prev_ytd_sales = sales_df[sales_df['date'].dt.year == current_year - 1]['sales_amount'].sum()
-    yoy_growth = ((ytd_sales - prev_ytd_sales) / prev_ytd_sales) * 100
+    # Year to date against the same months of last year
+    ytd = PeriodComparison(sales_df).ytd(datetime.now()).loc[TOTAL]
+    ytd_sales, prev_ytd_sales = ytd['current'], ytd['prior']
     
     fig = go.Figure()
     fig.add_trace(go.Indicator(
@@ -5,6 +5,12 @@ import plotly.express as px # type: ignore
 from plotly.subplots import make_subplots # type: ignore
 from datetime import datetime, timedelta
 import os
+import sys
+
+# Reuse the shared comparison and distinct-count engines from the top-level package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from pharma_dashboard.comparison import TOTAL, PeriodComparison
+from pharma_dashboard.hyperloglog import count_distinct
 
 def load_data():
     """Load and preprocess the data"""
@@ -18,10 +24,9 @@ def load_data():
 
 def create_sales_summary(sales_df):
     """Create sales summary metrics"""
-    current_year = datetime.now().year
-    ytd_sales = sales_df[sales_df['date'].dt.year == current_year]['sales_amount'].sum()
-    prev_ytd_sales = sales_df[sales_df['date'].dt.year == current_year - 1]['sales_amount'].sum()
-    yoy_growth = ((ytd_sales - prev_ytd_sales) / prev_ytd_sales) * 100
+    # Year to date against the same months of last year
+    ytd = PeriodComparison(sales_df).ytd(datetime.now()).loc[TOTAL]
+    ytd_sales, prev_ytd_sales = ytd['current'], ytd['prior']
     
     fig = go.Figure()
     fig.add_trace(go.Indicator(
@@ -36,13 +41,14 @@ def create_sales_summary(sales_df):
 
 def create_monthly_trend(sales_df):
     """Create monthly sales trend with target"""
-    monthly_sales = sales_df.groupby(pd.Grouper(key='date', freq='M')).agg({
-        'sales_amount': 'sum',
-        'units_sold': 'sum'
-    }).reset_index()
-    
-    # Calculate target (example: 10% above previous year's sales)
-    monthly_sales['target'] = monthly_sales['sales_amount'].shift(12) * 1.1
+    # Each month against the same calendar month a year earlier, even if months are missing
+    yoy = PeriodComparison(sales_df).compare('month', 12)
+    monthly_sales = pd.DataFrame({
+        'date': yoy['current'].index,
+        'sales_amount': yoy['current'][TOTAL].to_numpy(),
+        # Calculate target (example: 10% above previous year's sales)
+        'target': yoy['prior'][TOTAL].to_numpy() * 1.1
+    })
     
     fig = go.Figure()
     
@@ -75,7 +81,7 @@ def create_customer_distribution(sales_df, customers_df):
     customer_sales = pd.merge(sales_df, customers_df, on='customer_id')
     sales_by_type = customer_sales.groupby('customer_type').agg({
         'sales_amount': 'sum',
-        'customer_id': 'nunique'
+        'customer_id': count_distinct
     }).reset_index()
     
     sales_by_type['sales_percentage'] = (sales_by_type['sales_amount'] / 
@@ -97,17 +103,9 @@ def create_customer_distribution(sales_df, customers_df):
 
 def create_regional_performance(sales_df):
     """Create regional performance heatmap"""
-    regional_monthly = sales_df.pivot_table(
-        index=sales_df['date'].dt.strftime('%Y-%m'),
-        columns='region',
-        values='sales_amount',
-        aggfunc='sum'
-    )
-    
-    # Calculate YoY growth for each region
-    yoy_growth = pd.DataFrame()
-    for region in regional_monthly.columns:
-        yoy_growth[region] = regional_monthly[region].pct_change(12) * 100
+    # YoY growth for every region at once, aligned by calendar month
+    yoy_growth = PeriodComparison(sales_df, 'region').compare('month', 12)['growth']
+    yoy_growth.index = yoy_growth.index.strftime('%Y-%m')
     
     fig = go.Figure(data=go.Heatmap(
         z=yoy_growth.values,
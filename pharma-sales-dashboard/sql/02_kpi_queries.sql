@@ -1,17 +1,21 @@
+-- KPI queries over the monthly summary tables from 03_kpi_summary_tables.sql.
+-- Refresh them first (pharma_dashboard.materialized.refresh_kpi_tables); only
+-- months with newly inserted sales are recomputed.
+
 -- Year-to-Date Sales
 SELECT 
     SUM(sales_amount) as ytd_sales,
-    SUM(sales_amount) / LAG(SUM(sales_amount)) OVER (ORDER BY DATE_TRUNC('year', date)) - 1 as yoy_growth
-FROM pharma_sales
-WHERE date >= DATE_TRUNC('year', CURRENT_DATE);
+    SUM(sales_amount) / LAG(SUM(sales_amount)) OVER (ORDER BY DATE_TRUNC('year', month)) - 1 as yoy_growth
+FROM kpi_monthly_sales
+WHERE month >= DATE_TRUNC('year', CURRENT_DATE);
 
 -- Month-to-Date Sales with Plan Comparison
 WITH monthly_plan AS (
-    SELECT date_trunc('month', date) as month,
+    SELECT month,
            SUM(sales_amount) as actual_sales,
            1000000 as planned_sales  -- Example target, should be replaced with actual plan data
-    FROM pharma_sales
-    GROUP BY date_trunc('month', date)
+    FROM kpi_monthly_sales
+    GROUP BY month
 )
 SELECT 
     month,
@@ -22,23 +26,36 @@ FROM monthly_plan
 ORDER BY month DESC;
 
 -- Sales by Customer Group
+-- Sales of customers missing from the customers table are summarized as
+-- 'Unknown' and, as with a join on customers, left out here
+WITH type_sales AS (
+    SELECT customer_type, SUM(sales_amount) as total_sales
+    FROM kpi_monthly_sales
+    WHERE customer_type <> 'Unknown'
+    GROUP BY customer_type
+),
+type_customers AS (
+    SELECT c.customer_type, COUNT(DISTINCT m.customer_id) as customer_count
+    FROM kpi_customer_monthly m
+    JOIN customers c ON m.customer_id = c.customer_id
+    GROUP BY c.customer_type
+)
 SELECT 
-    c.customer_type,
-    SUM(s.sales_amount) as total_sales,
-    COUNT(DISTINCT s.customer_id) as customer_count,
-    SUM(s.sales_amount) / SUM(SUM(s.sales_amount)) OVER () * 100 as sales_percentage
-FROM pharma_sales s
-JOIN customers c ON s.customer_id = c.customer_id
-GROUP BY c.customer_type;
+    s.customer_type,
+    s.total_sales,
+    COALESCE(t.customer_count, 0) as customer_count,
+    s.total_sales / SUM(s.total_sales) OVER () * 100 as sales_percentage
+FROM type_sales s
+LEFT JOIN type_customers t ON s.customer_type = t.customer_type;
 
 -- Monthly Quantity Ordered vs Delivered
 WITH monthly_metrics AS (
     SELECT 
-        DATE_TRUNC('month', date) as month,
+        month,
         SUM(units_sold) as quantity_ordered,
-        SUM(CASE WHEN delivery_status = 'delivered' THEN units_sold ELSE 0 END) as quantity_delivered
-    FROM pharma_sales
-    GROUP BY DATE_TRUNC('month', date)
+        SUM(units_delivered) as quantity_delivered
+    FROM kpi_monthly_sales
+    GROUP BY month
 )
 SELECT 
     month,
@@ -52,10 +69,10 @@ ORDER BY month;
 SELECT 
     c.customer_name,
     c.customer_type,
-    SUM(s.sales_amount) as total_sales,
-    COUNT(DISTINCT DATE_TRUNC('month', s.date)) as months_active
-FROM pharma_sales s
-JOIN customers c ON s.customer_id = c.customer_id
+    SUM(m.sales_amount) as total_sales,
+    COUNT(DISTINCT m.month) as months_active
+FROM kpi_customer_monthly m
+JOIN customers c ON m.customer_id = c.customer_id
 GROUP BY c.customer_name, c.customer_type
 ORDER BY total_sales DESC
 LIMIT 5;
@@ -64,10 +81,10 @@ LIMIT 5;
 WITH yearly_sales AS (
     SELECT 
         region,
-        DATE_TRUNC('year', date) as year,
+        DATE_TRUNC('year', month) as year,
         SUM(sales_amount) as yearly_sales
-    FROM pharma_sales
-    GROUP BY region, DATE_TRUNC('year', date)
+    FROM kpi_monthly_sales
+    GROUP BY region, DATE_TRUNC('year', month)
 )
 SELECT 
     region,
@@ -78,20 +95,21 @@ FROM yearly_sales
 ORDER BY region, year;
 
 -- Monthly Churn Rate
+-- A customer's next purchase month is the next row of theirs in kpi_customer_monthly
 WITH customer_activity AS (
     SELECT 
         customer_id,
-        DATE_TRUNC('month', date) as month,
-        LEAD(DATE_TRUNC('month', date)) OVER (PARTITION BY customer_id ORDER BY date) as next_purchase
-    FROM pharma_sales
+        month,
+        LEAD(month) OVER (PARTITION BY customer_id ORDER BY month) as next_purchase
+    FROM kpi_customer_monthly
 )
 SELECT 
     month,
-    COUNT(DISTINCT customer_id) as total_customers,
-    COUNT(DISTINCT CASE WHEN next_purchase IS NULL OR next_purchase > month + INTERVAL '3 months' 
+    COUNT(*) as total_customers,
+    COUNT(CASE WHEN next_purchase IS NULL OR next_purchase > month + INTERVAL '3 months' 
           THEN customer_id END) as churned_customers,
-    ROUND((COUNT(DISTINCT CASE WHEN next_purchase IS NULL OR next_purchase > month + INTERVAL '3 months'
-          THEN customer_id END)::FLOAT / NULLIF(COUNT(DISTINCT customer_id), 0)) * 100, 2) as churn_rate
+    ROUND((COUNT(CASE WHEN next_purchase IS NULL OR next_purchase > month + INTERVAL '3 months'
+          THEN customer_id END)::FLOAT / NULLIF(COUNT(*), 0)) * 100, 2) as churn_rate
 FROM customer_activity
 GROUP BY month
-ORDER BY month; 
\ No newline at end of file
+ORDER BY month;
@@ -0,0 +1,36 @@
+-- Monthly summary tables behind the KPI queries in 02_kpi_queries.sql.
+-- They are maintained by pharma_dashboard.materialized.refresh_kpi_tables,
+-- which only recomputes the months touched by rows inserted since the last
+-- refresh (tracked through pharma_sales.created_at).
+
+-- Sales per month x region x customer type x product
+CREATE TABLE IF NOT EXISTS kpi_monthly_sales (
+    month DATE NOT NULL,
+    region VARCHAR(50) NOT NULL,
+    customer_type VARCHAR(50) NOT NULL,
+    product_name VARCHAR(100) NOT NULL,
+    sales_amount DECIMAL(14,2) NOT NULL,
+    units_sold INTEGER NOT NULL,
+    units_delivered INTEGER NOT NULL,
+    order_count INTEGER NOT NULL,
+    PRIMARY KEY (month, region, customer_type, product_name)
+);
+
+-- One row per customer and month they bought in (distinct counts, top customers, churn)
+CREATE TABLE IF NOT EXISTS kpi_customer_monthly (
+    month DATE NOT NULL,
+    customer_id VARCHAR(50) NOT NULL,
+    sales_amount DECIMAL(14,2) NOT NULL,
+    PRIMARY KEY (month, customer_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_kpi_customer_monthly_customer ON kpi_customer_monthly(customer_id, month);
+
+-- created_at high-water mark of the last refresh
+CREATE TABLE IF NOT EXISTS kpi_refresh_state (
+    source_table VARCHAR(50) PRIMARY KEY,
+    last_created_at TIMESTAMP,
+    refreshed_at TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_sales_created_at ON pharma_sales(created_at);
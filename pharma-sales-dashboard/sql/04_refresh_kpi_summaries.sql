@@ -0,0 +1,44 @@
+-- Incremental refresh of the KPI summary tables, run by
+-- pharma_dashboard.materialized.refresh_kpi_tables in one transaction.
+-- {month_of_date} is the dialect's month truncation of s.date and
+-- {delivered_units} counts delivered units (0 without delivery_status).
+-- :low and :high bound the created_at values of the rows to rescan: everything
+-- since the last refresh, minus a safety lag for late committed transactions.
+
+-- Months with rows inserted since (shortly before) the last refresh
+CREATE TEMPORARY TABLE kpi_touched_months AS
+SELECT DISTINCT {month_of_date} AS month
+FROM pharma_sales s
+WHERE s.created_at >= :low AND s.created_at <= :high;
+
+-- Touched months are recomputed in full, so back-dated rows are counted too
+DELETE FROM kpi_monthly_sales WHERE month IN (SELECT month FROM kpi_touched_months);
+
+DELETE FROM kpi_customer_monthly WHERE month IN (SELECT month FROM kpi_touched_months);
+
+INSERT INTO kpi_monthly_sales
+    (month, region, customer_type, product_name, sales_amount, units_sold, units_delivered, order_count)
+SELECT
+    {month_of_date} AS month,
+    s.region,
+    COALESCE(c.customer_type, 'Unknown') AS customer_type,
+    s.product_name,
+    SUM(s.sales_amount),
+    SUM(s.units_sold),
+    SUM({delivered_units}),
+    COUNT(*)
+FROM pharma_sales s
+LEFT JOIN customers c ON s.customer_id = c.customer_id
+WHERE {month_of_date} IN (SELECT month FROM kpi_touched_months)
+GROUP BY {month_of_date}, s.region, COALESCE(c.customer_type, 'Unknown'), s.product_name;
+
+INSERT INTO kpi_customer_monthly (month, customer_id, sales_amount)
+SELECT
+    {month_of_date} AS month,
+    s.customer_id,
+    SUM(s.sales_amount)
+FROM pharma_sales s
+WHERE {month_of_date} IN (SELECT month FROM kpi_touched_months)
+GROUP BY {month_of_date}, s.customer_id;
+
+DROP TABLE kpi_touched_months;
@@ -0,0 +1,110 @@
+"""
+Bitmap indexes over the low-cardinality sales dimensions.
+
+For every distinct value of an indexed column, the rows holding it are kept
+as a packed bitset of little-endian uint64 words. A multi-select filter is
+the OR of its values' bitsets and filters on different columns are ANDed,
+touching only the words that cover the date slice, so a filter costs a few
+word operations per 64 rows instead of a hash lookup per row.
+"""
+import numpy as np
+import pandas as pd
+
+from pharma_dashboard.date_index import date_bounds, filter_date_range, is_sorted_by_date
+
+INDEXED_COLUMNS = ('region', 'category', 'product_name', 'customer_type')
+WORD = np.dtype('<u8')
+
+def _pack_positions(positions, n_words):
+    """Bitset of n_words words with the given row positions set"""
+    words = np.zeros(n_words, dtype=WORD)
+    bits = np.left_shift(np.uint64(1), (positions & 63).astype(np.uint64))
+    np.bitwise_or.at(words, positions >> 6, bits)
+    return words
+
+class BitmapIndex:
+    """Per-value row bitsets for the indexed columns of one (date-sorted) sales frame"""
+
+    def __init__(self, df, columns=INDEXED_COLUMNS):
+        self.n_rows = len(df)
+        self.n_words = (self.n_rows + 63) >> 6
+        self.bitmaps = {}
+        self.counts = {}
+        # Columns with missing values cannot skip a filter that selects every value
+        self.complete = {}
+        for column in columns:
+            if column in df.columns:
+                self.bitmaps[column], self.counts[column], self.complete[column] = self._build(df[column])
+
+    def _build(self, values):
+        codes, uniques = pd.factorize(values)
+        order = np.argsort(codes, kind='stable')
+        missing = int((codes < 0).sum())
+        counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+        groups = np.split(order[missing:], np.cumsum(counts)[:-1])
+        bitmaps = {
+            value: _pack_positions(positions, self.n_words)
+            for value, positions in zip(uniques, groups)
+        }
+        return bitmaps, dict(zip(uniques, counts.tolist())), missing == 0
+
+    def values(self, column):
+        """Distinct values indexed for a column"""
+        return list(self.bitmaps[column])
+
+    def selectivity(self, filters):
+        """Estimated fraction of rows matching every filter, assuming independent columns"""
+        fraction = 1.0
+        for column, selected in filters.items():
+            if selected:
+                counts = self.counts[column]
+                fraction *= sum(counts.get(value, 0) for value in set(selected)) / max(self.n_rows, 1)
+        return fraction
+
+    def mask(self, filters, lo=0, hi=None):
+        """Boolean mask over rows [lo, hi) matching every filter, or None if nothing is filtered.
+
+        filters maps an indexed column to the values to keep; an empty or None
+        selection leaves the column unconstrained, like the dashboard multiselects.
+        """
+        hi = self.n_rows if hi is None else hi
+        first_word, last_word = lo >> 6, (hi + 63) >> 6
+        result = None
+        for column, selected in filters.items():
+            if not selected:
+                continue
+            bitmaps = self.bitmaps[column]
+            selected = set(selected)
+            if self.complete[column] and selected.issuperset(bitmaps):
+                continue
+            union = np.zeros(last_word - first_word, dtype=WORD)
+            for value in selected:
+                words = bitmaps.get(value)
+                if words is not None:
+                    union |= words[first_word:last_word]
+            if result is None:
+                result = union
+            else:
+                result &= union
+        if result is None:
+            return None
+        bits = np.unpackbits(result.view(np.uint8), bitorder='little')
+        offset = first_word << 6
+        return bits[lo - offset:hi - offset].view(bool)
+
+    def positions(self, filters, lo=0, hi=None):
+        """Row positions in [lo, hi) matching every filter"""
+        hi = self.n_rows if hi is None else hi
+        mask = self.mask(filters, lo, hi)
+        if mask is None:
+            return np.arange(lo, hi)
+        return np.flatnonzero(mask) + lo
+
+def select_rows(df, bitmap_index, filters, start=None, stop=None):
+    """Rows of df dated in [start, stop) that match the bitmap filters"""
+    if len(df) != bitmap_index.n_rows:
+        raise ValueError("Bitmap index was built for a different frame")
+    if is_sorted_by_date(df):
+        lo, hi = date_bounds(df, start, stop)
+        return df.iloc[bitmap_index.positions(filters, lo, hi)]
+    return filter_date_range(df.iloc[bitmap_index.positions(filters)], start, stop)
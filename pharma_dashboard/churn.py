@@ -0,0 +1,80 @@
+"""
+Monthly customer churn, matching the "Monthly Churn Rate" query in sql/02_kpi_queries.sql.
+
+A customer counts as churned in a month they bought in when their next
+active month is more than CHURN_GAP_MONTHS later, or when they have not
+bought since (so the latest months always show the customers who have not
+come back yet, as in the SQL). Transactions are reduced to distinct
+(customer, month) pairs packed into sorted int64 keys; the gap to the next
+active month is a vectorized diff over neighbouring pairs. ChurnTracker
+keeps the pairs between refreshes, so appended rows only need their own
+pairs sorted and merged in.
+"""
+import numpy as np
+import pandas as pd
+
+from pharma_dashboard.date_index import month_codes
+from pharma_dashboard.grouping import group_codes
+
+CHURN_GAP_MONTHS = 3
+MONTH_BITS = 32
+
+def _sorted_unique(keys):
+    """Sorted distinct keys; a plain sort plus neighbour compare beats np.unique on large int64 arrays"""
+    keys = np.sort(keys)
+    if len(keys) > 1:
+        keys = keys[np.r_[True, keys[1:] != keys[:-1]]]
+    return keys
+
+class ChurnTracker:
+    """Distinct (customer, month) activity pairs and the monthly churn they imply"""
+
+    def __init__(self, gap_months=CHURN_GAP_MONTHS):
+        self.gap_months = gap_months
+        self.customers = pd.Index([])
+        self.keys = np.zeros(0, dtype=np.int64)
+
+    def _customer_codes(self, column):
+        """Codes of the column's customers in this tracker's growing customer index"""
+        codes, labels = group_codes(column)
+        new_labels = pd.Index(labels).difference(self.customers, sort=False)
+        if len(new_labels):
+            self.customers = self.customers.append(new_labels)
+        mapping = self.customers.get_indexer(labels)
+        return np.where(codes >= 0, mapping[codes], -1)
+
+    def update(self, df):
+        """Add a batch of processed sales rows"""
+        customers = self._customer_codes(df['customer_id'])
+        months = month_codes(df['date'])
+        valid = (customers >= 0) & (months >= 0)
+        batch = (customers[valid].astype(np.int64) << MONTH_BITS) | months[valid]
+        self.keys = _sorted_unique(np.concatenate([self.keys, batch]))
+        return self
+
+    def monthly(self):
+        """Total customers, churned customers and churn rate (%) per active month"""
+        customers = self.keys >> MONTH_BITS
+        months = self.keys & ((1 << MONTH_BITS) - 1)
+        # Pairs are sorted by customer, then month, so each pair's next active month is its neighbour
+        churned = np.ones(len(self.keys), dtype=bool)
+        if len(self.keys) > 1:
+            same_customer = customers[1:] == customers[:-1]
+            churned[:-1] = ~same_customer | (np.diff(months) > self.gap_months)
+
+        if not len(months):
+            return pd.DataFrame(columns=['month', 'total_customers', 'churned_customers', 'churn_rate'])
+        offsets = months - months.min()
+        totals = np.bincount(offsets)
+        churned_totals = np.bincount(offsets, weights=churned, minlength=len(totals)).astype(np.int64)
+        active = np.flatnonzero(totals)
+        return pd.DataFrame({
+            'month': (months.min() + active).astype('datetime64[M]').astype('datetime64[ns]'),
+            'total_customers': totals[active],
+            'churned_customers': churned_totals[active],
+            'churn_rate': np.round(churned_totals[active] / totals[active] * 100, 2)
+        })
+
+def monthly_churn(df, gap_months=CHURN_GAP_MONTHS):
+    """Monthly churn table for a sales frame, as the SQL query returns it"""
+    return ChurnTracker(gap_months).update(df).monthly()
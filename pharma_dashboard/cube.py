@@ -0,0 +1,62 @@
+"""
+Pre-aggregated daily sales cube.
+
+The cube holds one cell per day x region x category x product with summed
+sales and units and the number of orders. Every dashboard view that only
+filters on those dimensions and groups by them can be answered from the cells
+instead of the raw transactions, so its cost scales with the number of
+distinct days and dimension values. Row-level filters (the amount slider,
+text search) still need the raw rows; SalesCube.can_answer tells them apart.
+"""
+from pharma_dashboard.date_index import sort_by_date
+from pharma_dashboard.filter_plan import FilterPlan
+
+CUBE_DIMENSIONS = ('region', 'category', 'product_name')
+CUBE_MEASURES = ('sales_amount', 'units_sold', 'order_count')
+
+def order_count(frame):
+    """Number of orders in raw rows or cube cells"""
+    if 'order_count' in frame.columns:
+        return int(frame['order_count'].sum())
+    return len(frame)
+
+class SalesCube:
+    """Daily cube over a processed sales frame, queried with the same filters as the raw rows"""
+
+    def __init__(self, sales_df):
+        keys = [sales_df['date'].dt.normalize().rename('date')] + [sales_df[d] for d in CUBE_DIMENSIONS]
+        cells = sales_df.groupby(keys, observed=True, sort=True).agg(
+            sales_amount=('sales_amount', 'sum'),
+            units_sold=('units_sold', 'sum'),
+            order_count=('sales_amount', 'size')
+        ).reset_index()
+        self.cells = sort_by_date(cells)
+        self.n_rows = len(sales_df)
+        if len(sales_df):
+            self.amount_range = (sales_df['sales_amount'].min(), sales_df['sales_amount'].max())
+        else:
+            self.amount_range = (None, None)
+
+    def can_answer(self, min_amount=None, max_amount=None, search=None, **filters):
+        """Whether a filter state only constrains cube dimensions and dates.
+
+        Amount bounds that include every row's amount do not filter anything,
+        so the slider's default full range still qualifies.
+        """
+        if search:
+            return False
+        if any(values and column not in CUBE_DIMENSIONS for column, values in filters.items()):
+            return False
+        low, high = self.amount_range
+        if min_amount is not None and low is not None and min_amount > low:
+            return False
+        if max_amount is not None and high is not None and max_amount < high:
+            return False
+        return True
+
+    def query(self, start=None, stop=None, **filters):
+        """Cells dated in [start, stop) whose dimensions are in the given value lists"""
+        plan = FilterPlan(self.cells).date_range(start, stop)
+        for column, values in filters.items():
+            plan.isin(column, values)
+        return plan.frame()
@@ -2,16 +2,43 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 import os
+import time
 from pathlib import Path
+from pharma_dashboard.bitmap_index import BitmapIndex
+from pharma_dashboard.churn import ChurnTracker
+from pharma_dashboard.cube import SalesCube
 from pharma_dashboard.data_processor import load_and_preprocess_data
+from pharma_dashboard.date_index import day_stop, mark_sorted_by_date
+from pharma_dashboard.downsampling import FULL_WIDTH_POINTS, HALF_WIDTH_POINTS, downsample, downsample_long
+from pharma_dashboard.filter_plan import FilterPlan, take_rows
+from pharma_dashboard.hyperloglog import CustomerSketches, count_distinct
+from pharma_dashboard.kpi import compute_kpis
+from pharma_dashboard.prefetch import Prefetcher
+from pharma_dashboard.prefix_sums import DailyPrefixSums, flatten_comparison
+from pharma_dashboard.rerun_timing import SectionTimings
+from pharma_dashboard.result_cache import (
+    canonical_filters, dataset_version, get_result_cache, remember_dataset_version
+)
+from pharma_dashboard.timeseries import DailyMatrix
+from pharma_dashboard.top_k import TopKTracker, top_k_exact
 import logging
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+SMOOTHING_OPTIONS = [1, 7, 14, 28]
+SECTIONS = ['Trend', 'Regional', 'Product', 'Customer', 'Churn']
+SMOOTHING_LABELS = {
+    'Trend': "Moving Average (days)",
+    'Regional': "Regional Smoothing (days)",
+    'Product': "Category Smoothing (days)"
+}
+SECTION_CACHE_ENTRIES = 64
+
 # Set page config
 st.set_page_config(
     page_title="Pharmaceutical Sales Dashboard",
@@ -21,107 +48,231 @@ st.set_page_config(
 
 @st.cache_data
 def load_data():
-    """Load and preprocess data using the data processor"""
+    """Load and preprocess data using the data processor, with the sales fingerprint"""
     try:
-        return load_and_preprocess_data()
+        sales_df, products_df, customers_df = load_and_preprocess_data()
+        # Fingerprint once here; every rerun gets a fresh copy of the frame to re-register
+        return sales_df, products_df, customers_df, dataset_version(sales_df)
     except Exception as e:
         logger.error(f"Error loading data: {str(e)}")
         st.error(f"Error loading data: {str(e)}")
-        return None, None, None
+        return None, None, None, None
+
+@st.cache_resource
+def load_bitmap_index(_sales_df, version):
+    """Build the region/category/product bitmaps once per dataset and share them across sessions"""
+    return BitmapIndex(_sales_df)
+
+@st.cache_resource
+def load_sales_cube(_sales_df, version):
+    """Build the daily cube once per dataset and share it across sessions"""
+    return SalesCube(_sales_df)
+
+@st.cache_resource
+def load_prefix_sums(_sales_df, version):
+    """Build the per-day region x category prefix sums once per dataset"""
+    return DailyPrefixSums(_sales_df, ('region', 'category'))
+
+@st.cache_resource
+def load_customer_sketches(_sales_df, version):
+    """Build the per-day region x category x customer type customer sketches once per dataset"""
+    dimensions = [d for d in ('region', 'category', 'customer_type') if d in _sales_df.columns]
+    return CustomerSketches(_sales_df, dimensions)
+
+@st.cache_resource
+def load_top_tracker(_sales_df, version):
+    """Build the per-day top-K summaries of products, regions and customers once per dataset"""
+    return TopKTracker().update(_sales_df)
+
+@st.cache_data
+def load_monthly_churn(_sales_df, version):
+    """Monthly churn over every customer, computed once per dataset"""
+    return ChurnTracker().update(_sales_df).monthly()
+
+def create_churn_chart(churn, start_date, end_date):
+    """Monthly churn rate for the months in the selected date range"""
+    months = churn['month']
+    churn = churn[(months >= pd.Timestamp(start_date).replace(day=1)) & (months <= pd.Timestamp(end_date))]
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        x=churn['month'],
+        y=churn['total_customers'],
+        name='Active Customers',
+        marker_color='lightblue'
+    ))
+    fig.add_trace(go.Scatter(
+        x=churn['month'],
+        y=churn['churn_rate'],
+        name='Churn Rate (%)',
+        yaxis='y2',
+        line=dict(color='red')
+    ))
+    fig.update_layout(
+        title="Monthly Customer Churn (no purchase within 3 months)",
+        xaxis_title="Month",
+        yaxis=dict(title="Active Customers"),
+        yaxis2=dict(title="Churn Rate (%)", overlaying='y', side='right'),
+        height=400
+    )
+    return fig
 
-def apply_filters(sales_df, products_df, start_date, end_date, selected_regions, selected_categories, min_amount=None, max_amount=None):
+def build_filter_plan(sales_df, start_date, end_date, selected_regions, selected_categories, min_amount=None, max_amount=None, bitmap_index=None):
+    """Collect the sidebar filters into a lazy plan, evaluated most selective filter first"""
+    return (
+        FilterPlan(sales_df, bitmap_index)
+        .date_range(start_date, day_stop(end_date))
+        .isin('region', selected_regions)
+        .isin('category', selected_categories)
+        .between('sales_amount', min_amount, max_amount)
+    )
+
+def apply_filters(sales_df, products_df, start_date, end_date, selected_regions, selected_categories, min_amount=None, max_amount=None, bitmap_index=None):
     """Apply all filters to the data"""
     if sales_df is None or products_df is None:
         return None, None
     
-    filtered_sales = sales_df.copy()
-    
-    # Date range filter
-    filtered_sales = filtered_sales[
-        (filtered_sales['date'].dt.date >= start_date) &
-        (filtered_sales['date'].dt.date <= end_date)
-    ]
-    
-    # Region filter
-    if selected_regions:
-        filtered_sales = filtered_sales[filtered_sales['region'].isin(selected_regions)]
-    
-    # Product category filter
-    if selected_categories:
-        filtered_sales = filtered_sales[filtered_sales['category'].isin(selected_categories)]
-    
-    # Amount range filter
-    if min_amount is not None:
-        filtered_sales = filtered_sales[filtered_sales['sales_amount'] >= min_amount]
-    if max_amount is not None:
-        filtered_sales = filtered_sales[filtered_sales['sales_amount'] <= max_amount]
-    
-    return filtered_sales, products_df
-
-def calculate_metrics(filtered_sales):
-    """Calculate key metrics from filtered data"""
-    if filtered_sales is None or filtered_sales.empty:
-        return {
-            'total_sales': 0,
-            'total_units': 0,
-            'avg_order_value': 0,
-            'total_orders': 0,
-            'top_product': 'N/A',
-            'top_region': 'N/A',
-            'sales_growth': 0,
-            'avg_daily_sales': 0
+    # The frame is materialized once, after every filter has been evaluated
+    plan = build_filter_plan(
+        sales_df, start_date, end_date, selected_regions, selected_categories,
+        min_amount, max_amount, bitmap_index
+    )
+    return plan.frame(), products_df
+
+def query_cube(cube, start_date, end_date, selected_regions, selected_categories, min_amount=None, max_amount=None):
+    """Cube cells for the filters, or None when a row-level filter needs the raw rows"""
+    if cube is None or not cube.can_answer(min_amount, max_amount):
+        return None
+    return cube.query(
+        start_date, day_stop(end_date),
+        region=selected_regions, category=selected_categories
+    )
+
+def unique_customer_counts(filtered_sales, sketches=None, start=None, stop=None, **selections):
+    """Distinct customers overall and per customer type.
+
+    Merges the sketches for the date range and selections when given (exact
+    for small slices, about 1.6% standard error otherwise), else counts the
+    filtered rows.
+    """
+    has_types = 'customer_type' in filtered_sales.columns
+    if sketches is not None:
+        counts = {'unique_customers': sketches.unique_customers(start, stop, **selections)}
+        if has_types and 'customer_type' in sketches.dimensions:
+            counts['customers_by_type'] = {
+                customer_type: sketches.unique_customers(start, stop, customer_type=[customer_type], **selections)
+                for customer_type in sketches.labels['customer_type']
+            }
+        return counts
+    counts = {'unique_customers': count_distinct(filtered_sales['customer_id'])}
+    if has_types:
+        counts['customers_by_type'] = {
+            customer_type: count_distinct(group['customer_id'])
+            for customer_type, group in filtered_sales.groupby('customer_type', observed=False)
         }
+    return counts
+
+def top_values(filtered_sales, dimension, k=5, tracker=None, start=None, stop=None):
+    """Top k values of a dimension by sales.
+
+    Merged from the tracker's day buckets when given, which only applies when
+    the date range is the sole filter; otherwise computed exactly from the
+    filtered rows.
+    """
+    if tracker is not None:
+        return tracker.top(dimension, k, start, stop)[[dimension, 'sales_amount']]
+    top = top_k_exact(filtered_sales[dimension], filtered_sales['sales_amount'], k)
+    return pd.DataFrame(top, columns=[dimension, 'sales_amount'])
+
+def filter_and_measure(sales_df, start_date, end_date, selected_regions, selected_categories, min_amount=None, max_amount=None, bitmap_index=None, cube=None, prefix_sums=None, customer_sketches=None):
+    """Filtered rows, the summary frame charts are built from, and metrics for a filter state.
+
+    The summary frame is the matching cube cells when the cube can answer
+    the filters, else the filtered rows. Previous-period and last-year
+    figures come from the prefix sums and unique customers from merged
+    sketches when no amount filter applies. Row positions, cube cells and
+    metrics are shared across sessions via the result cache, which is
+    consulted before any filtering or cube query.
+    """
+    filters, key = canonical_filters(
+        start_date=start_date, end_date=end_date,
+        regions=selected_regions, categories=selected_categories,
+        min_amount=min_amount, max_amount=max_amount
+    )
+    # Filter with the canonical values so every state sharing the key gets the same rows
+    args = (
+        filters['start_date'], filters['end_date'], filters['regions'], filters['categories'],
+        filters['min_amount'], filters['max_amount']
+    )
+    cache = get_result_cache()
+    cache_key = ('dashboard', dataset_version(sales_df), key)
+    cached = cache.get(cache_key)
+    if cached is not None:
+        filtered_sales = take_rows(sales_df, cached['positions'])
+        cube_cells = cached['cube_cells']
+        return filtered_sales, filtered_sales if cube_cells is None else cube_cells, cached['metrics']
     
-    total_sales = filtered_sales['sales_amount'].sum()
-    total_units = filtered_sales['units_sold'].sum()
-    total_orders = len(filtered_sales)
-    avg_order_value = total_sales / total_orders if total_orders > 0 else 0
-    
-    # Calculate top product
-    top_product = filtered_sales.groupby('product_name')['sales_amount'].sum().idxmax()
-    
-    # Calculate top region
-    top_region = filtered_sales.groupby('region')['sales_amount'].sum().idxmax()
-    
-    # Calculate sales growth
-    daily_sales = filtered_sales.groupby('date')['sales_amount'].sum()
-    if len(daily_sales) > 1:
-        sales_growth = ((daily_sales.iloc[-1] - daily_sales.iloc[0]) / daily_sales.iloc[0]) * 100
-    else:
-        sales_growth = 0
-    
-    # Calculate average daily sales
-    avg_daily_sales = total_sales / len(daily_sales) if len(daily_sales) > 0 else 0
-    
-    return {
-        'total_sales': total_sales,
-        'total_units': total_units,
-        'avg_order_value': avg_order_value,
-        'total_orders': total_orders,
-        'top_product': top_product,
-        'top_region': top_region,
-        'sales_growth': sales_growth,
-        'avg_daily_sales': avg_daily_sales
-    }
-
-def create_sales_trend_chart(filtered_sales):
-    """Create an enhanced sales trend chart with moving average"""
-    daily_sales = filtered_sales.groupby('date')['sales_amount'].sum().reset_index()
-    daily_sales['7_day_ma'] = daily_sales['sales_amount'].rolling(window=7).mean()
+    cube_cells = query_cube(cube, *args)
+    plan = build_filter_plan(sales_df, *args, bitmap_index)
+    filtered_sales = plan.frame()
+    summary = filtered_sales if cube_cells is None else cube_cells
+    comparison = None
+    start, stop = pd.Timestamp(filters['start_date']), day_stop(filters['end_date'])
+    selections = {'region': filters['regions'], 'category': filters['categories']}
+    if cube_cells is None:
+        customer_sketches = None
+    elif prefix_sums is not None:
+        comparison = prefix_sums.compare(start, stop, **selections)
+    metrics = calculate_metrics(summary, comparison)
+    metrics.update(unique_customer_counts(filtered_sales, customer_sketches, start, stop, **selections))
+    cache.put(cache_key, {'positions': plan.positions(), 'cube_cells': cube_cells, 'metrics': metrics})
+    return filtered_sales, summary, metrics
+
+def calculate_metrics(filtered_sales, comparison=None):
+    """Calculate key metrics from filtered data (raw rows or cube cells) in one pass.
+
+    comparison, from DailyPrefixSums.compare, adds previous_* and last_year_*
+    totals for the equally long previous period and the same period last year.
+    """
+    kpis = compute_kpis(filtered_sales, yoy=False)
+    metrics = {key: kpis[key] for key in (
+        'total_sales', 'total_units', 'avg_order_value', 'total_orders',
+        'top_product', 'top_region', 'sales_growth', 'avg_daily_sales'
+    )}
+    if comparison is not None:
+        metrics.update(flatten_comparison(comparison))
+    return metrics
+
+def period_delta(metrics, key):
+    """Change of a metric against the previous period, formatted for st.metric"""
+    previous = metrics.get(f'previous_{key}')
+    if not previous:
+        return None
+    return f"{(metrics[key] - previous) / previous * 100:+.1f}% vs previous period"
+
+def create_sales_trend_chart(filtered_sales, windows=(7,), max_points=FULL_WIDTH_POINTS):
+    """Create an enhanced sales trend chart with moving averages (from raw rows or cube cells).
+
+    Each series is downsampled to max_points; None draws every day.
+    """
+    daily = DailyMatrix(filtered_sales)
     
     fig = go.Figure()
+    # Min/max buckets keep the spikes of raw daily sales
+    x, y = downsample(daily.days, daily.values[:, 0], max_points, 'minmax')
     fig.add_trace(go.Scatter(
-        x=daily_sales['date'],
-        y=daily_sales['sales_amount'],
+        x=x,
+        y=y,
         name='Daily Sales',
         line=dict(color='blue')
     ))
-    fig.add_trace(go.Scatter(
-        x=daily_sales['date'],
-        y=daily_sales['7_day_ma'],
-        name='7-Day Moving Average',
-        line=dict(color='red', dash='dash')
-    ))
+    for window in windows:
+        x, y = downsample(daily.days, daily.rolling_mean(window)[:, 0], max_points)
+        fig.add_trace(go.Scatter(
+            x=x,
+            y=y,
+            name=f'{window}-Day Moving Average',
+            line=dict(dash='dash')
+        ))
     
     fig.update_layout(
         title="Daily Sales Trend with Moving Average",
@@ -132,10 +283,17 @@ def create_sales_trend_chart(filtered_sales):
     )
     return fig
 
-def create_regional_analysis(filtered_sales):
+def smoothed_trend(filtered_sales, group, window, max_points=None):
+    """Per-group daily sales smoothed with a trailing window, as long rows for px.line"""
+    daily = DailyMatrix(filtered_sales, group)
+    values = daily.values if window <= 1 else daily.rolling_mean(window, min_periods=1)
+    method = 'minmax' if window <= 1 else 'lttb'
+    return downsample_long(daily.long(values), 'date', 'sales_amount', group, max_points, method)
+
+def create_regional_analysis(filtered_sales, window=7, max_points=HALF_WIDTH_POINTS):
     """Create comprehensive regional analysis"""
     # Regional sales pie chart
-    regional_sales = filtered_sales.groupby('region')['sales_amount'].sum().reset_index()
+    regional_sales = filtered_sales.groupby('region', observed=True)['sales_amount'].sum().reset_index()
     fig_pie = px.pie(
         regional_sales,
         values='sales_amount',
@@ -146,7 +304,7 @@ def create_regional_analysis(filtered_sales):
     fig_pie.update_traces(textposition='inside', textinfo='percent+label')
     
     # Regional growth chart
-    regional_growth = filtered_sales.groupby(['region', 'date'])['sales_amount'].sum().reset_index()
+    regional_growth = smoothed_trend(filtered_sales, 'region', window, max_points)
     fig_growth = px.line(
         regional_growth,
         x='date',
@@ -158,10 +316,10 @@ def create_regional_analysis(filtered_sales):
     
     return fig_pie, fig_growth
 
-def create_product_analysis(filtered_sales):
+def create_product_analysis(filtered_sales, window=7, max_points=HALF_WIDTH_POINTS):
     """Create comprehensive product analysis"""
     # Product performance
-    product_sales = filtered_sales.groupby(['product_name', 'category'])['sales_amount'].sum().reset_index()
+    product_sales = filtered_sales.groupby(['product_name', 'category'], observed=True)['sales_amount'].sum().reset_index()
     product_sales = product_sales.sort_values('sales_amount', ascending=True)
     
     fig_products = px.bar(
@@ -175,7 +333,7 @@ def create_product_analysis(filtered_sales):
     fig_products.update_layout(height=400)
     
     # Category performance with trend
-    category_trend = filtered_sales.groupby(['category', 'date'])['sales_amount'].sum().reset_index()
+    category_trend = smoothed_trend(filtered_sales, 'category', window, max_points)
     fig_category = px.line(
         category_trend,
         x='date',
@@ -187,15 +345,171 @@ def create_product_analysis(filtered_sales):
     
     return fig_products, fig_category
 
+def create_customer_analysis(filtered_sales):
+    """Scatter of each customer's total spend against their order count"""
+    customer_metrics = filtered_sales.groupby('customer_id', observed=True).agg({
+        'sales_amount': ['sum', 'count'],
+        'units_sold': 'sum'
+    }).reset_index()
+    customer_metrics.columns = ['customer_id', 'total_spent', 'order_count', 'total_units']
+    customer_metrics['avg_order_value'] = customer_metrics['total_spent'] / customer_metrics['order_count']
+    
+    return px.scatter(
+        customer_metrics,
+        x='total_spent',
+        y='order_count',
+        size='total_units',
+        title="Customer Value Analysis",
+        labels={
+            'total_spent': 'Total Spent ($)',
+            'order_count': 'Number of Orders',
+            'total_units': 'Total Units Purchased'
+        }
+    )
+
+def filter_key(version, start_date, end_date, selected_regions, selected_categories, min_amount=None, max_amount=None):
+    """Hashable identity of the filtered data for a dataset version and filter state"""
+    _, key = canonical_filters(
+        start_date=start_date, end_date=end_date,
+        regions=selected_regions, categories=selected_categories,
+        min_amount=min_amount, max_amount=max_amount
+    )
+    return version, key
+
+# Section outputs are cached on the filter key, which stands in for the unhashed frames passed with it
+@st.cache_data(max_entries=SECTION_CACHE_ENTRIES, show_spinner=False)
+def section_trend_chart(_summary, key, windows, max_points):
+    return create_sales_trend_chart(_summary, windows, max_points)
+
+@st.cache_data(max_entries=SECTION_CACHE_ENTRIES, show_spinner=False)
+def section_regional_analysis(_summary, key, window, max_points):
+    return create_regional_analysis(_summary, window, max_points)
+
+@st.cache_data(max_entries=SECTION_CACHE_ENTRIES, show_spinner=False)
+def section_product_analysis(_summary, key, window, max_points):
+    return create_product_analysis(_summary, window, max_points)
+
+@st.cache_data(max_entries=SECTION_CACHE_ENTRIES, show_spinner=False)
+def section_customer_analysis(_filtered_sales, _tracker, key, start_date, end_date):
+    top_customers = top_values(_filtered_sales, 'customer_id', 5, _tracker, pd.Timestamp(start_date), day_stop(end_date))
+    return top_customers, create_customer_analysis(_filtered_sales)
+
+@st.cache_data(max_entries=SECTION_CACHE_ENTRIES, show_spinner=False)
+def section_churn_chart(_sales_df, version, start_date, end_date):
+    return create_churn_chart(load_monthly_churn(_sales_df, version), start_date, end_date)
+
+def section_timings():
+    """This session's section timings"""
+    if 'section_timings' not in st.session_state:
+        st.session_state['section_timings'] = SectionTimings()
+    return st.session_state['section_timings']
+
+@contextmanager
+def timed_section(name, show=False):
+    """Time a dashboard section and, when show is set, caption it with the duration"""
+    timings = section_timings()
+    with timings.section(name):
+        yield
+    if show:
+        st.caption(f"{name.capitalize()} section: {timings.last(name) * 1000:.0f} ms")
+
+@st.cache_resource
+def section_prefetcher():
+    """One bounded background worker, shared by every session, that warms section caches"""
+    return Prefetcher()
+
+def section_window(name):
+    """The smoothing window last chosen in a section, kept while the section is closed"""
+    return st.session_state.get(f'{name.lower()}_window', 7)
+
+def smoothing_control(name):
+    window = st.select_slider(SMOOTHING_LABELS[name], options=SMOOTHING_OPTIONS, value=section_window(name))
+    st.session_state[f'{name.lower()}_window'] = window
+    return window
+
+def section_figures(name, inputs, window=7):
+    """The cached figures (and tables) of one section for the current filters.
+
+    Only touches caches, never the page, so it is safe to call from the
+    prefetch worker.
+    """
+    max_points = None if inputs['full_resolution'] else FULL_WIDTH_POINTS if name == 'Trend' else HALF_WIDTH_POINTS
+    if name == 'Trend':
+        return section_trend_chart(inputs['summary'], inputs['key'], tuple(sorted({7, window} - {1})), max_points)
+    if name == 'Regional':
+        return section_regional_analysis(inputs['summary'], inputs['key'], window, max_points)
+    if name == 'Product':
+        return section_product_analysis(inputs['summary'], inputs['key'], window, max_points)
+    if name == 'Customer':
+        # The tracker only knows dates, so other filters need the exact count
+        tracker = load_top_tracker(inputs['sales_df'], inputs['version']) if inputs['date_only'] else None
+        return section_customer_analysis(
+            inputs['filtered_sales'], tracker, inputs['key'], inputs['start_date'], inputs['end_date']
+        )
+    # Churn is a property of the whole customer base, so only the date range applies
+    return section_churn_chart(inputs['sales_df'], inputs['version'], inputs['start_date'], inputs['end_date'])
+
+def render_section(name, inputs, show_timings=False):
+    """Draw one section, building its figures only on a cache miss"""
+    with timed_section(name.lower(), show_timings):
+        if name == 'Trend':
+            st.subheader("Sales Trend Analysis")
+            st.plotly_chart(section_figures(name, inputs, smoothing_control(name)), use_container_width=True)
+        elif name in ('Regional', 'Product'):
+            st.subheader(f"{name} Analysis")
+            figures = section_figures(name, inputs, smoothing_control(name))
+            for column, fig in zip(st.columns(2), figures):
+                with column:
+                    st.plotly_chart(fig, use_container_width=True)
+        elif name == 'Customer':
+            st.subheader("Customer Analysis")
+            metrics = inputs['metrics']
+            customers_by_type = {t: n for t, n in metrics.get('customers_by_type', {}).items() if n}
+            type_columns = st.columns(len(customers_by_type) + 1)
+            type_columns[0].metric("Unique Customers", f"{metrics['unique_customers']:,}")
+            for column, (customer_type, count) in zip(type_columns[1:], customers_by_type.items()):
+                column.metric(f"{customer_type} Customers", f"{count:,}")
+            
+            top_customers, fig_customer = section_figures(name, inputs)
+            st.markdown("**Top 5 Customers by Sales**")
+            st.dataframe(
+                top_customers.rename(columns={'customer_id': 'Customer', 'sales_amount': 'Total Sales'}),
+                hide_index=True
+            )
+            st.plotly_chart(fig_customer, use_container_width=True)
+        else:
+            st.subheader("Customer Churn")
+            st.plotly_chart(section_figures(name, inputs), use_container_width=True)
+
+def prefetch_section(name, inputs):
+    """Warm a section's caches in the background, so opening it next is a cache hit"""
+    window = section_window(name)
+    # Slider moves and reruns with unchanged filters ask for the same build; queue it once
+    job_key = (name, inputs['key'], window, inputs['full_resolution'])
+    section_prefetcher().submit(job_key, lambda: section_figures(name, inputs, window))
+
+@st.fragment
+def section_view(inputs, show_timings=False):
+    """Only the open section is built and sent; switching sections or changing
+    a section's control reruns just this fragment"""
+    name = st.radio("Section", SECTIONS, horizontal=True, label_visibility='collapsed', key='open_section')
+    render_section(name, inputs, show_timings)
+    # Sections are usually read in order, so the next one is built while this one is read
+    prefetch_section(SECTIONS[(SECTIONS.index(name) + 1) % len(SECTIONS)], inputs)
+
 def main():
     st.title("Pharmaceutical Sales Dashboard")
+    run_start = time.perf_counter()
     
     try:
         # Load data
-        sales_df, products_df, customers_df = load_data()
+        sales_df, products_df, customers_df, version = load_data()
         if sales_df is None or products_df is None or customers_df is None:
             st.error("Failed to load data. Please check the data files and their format.")
             return
+        remember_dataset_version(sales_df, version)
+        # The loader date-sorted the frame; its cached copy needs no rescan
+        mark_sorted_by_date(sales_df)
         
         # Sidebar filters
         st.sidebar.header("Filters")
@@ -236,30 +550,48 @@ def main():
             value=(min_sales, max_sales)
         )
         
-        # Apply filters
-        filtered_sales, filtered_products = apply_filters(
-            sales_df, products_df, start_date, end_date,
+        full_resolution = st.sidebar.checkbox(
+            "Full resolution charts",
+            value=False,
+            help=f"Trend charts draw at most {FULL_WIDTH_POINTS} points per series; tick to draw every day"
+        )
+        show_timings = st.sidebar.checkbox(
+            "Show rerun timings",
+            value=False,
+            help="Caption each section with its render time and list recent rerun times"
+        )
+        
+        # Apply filters and calculate metrics, reusing results other sessions already computed
+        filtered_sales, summary, metrics = filter_and_measure(
+            sales_df, start_date, end_date,
             selected_regions, selected_categories,
-            sales_range[0], sales_range[1]
+            sales_range[0], sales_range[1],
+            bitmap_index=load_bitmap_index(sales_df, version),
+            cube=load_sales_cube(sales_df, version),
+            prefix_sums=load_prefix_sums(sales_df, version),
+            customer_sketches=load_customer_sketches(sales_df, version)
+        )
+        
+        cache_stats = get_result_cache().stats()
+        st.sidebar.caption(
+            f"Result cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+            f"({cache_stats['entries']} entries, {cache_stats['bytes'] / 1e6:.1f} MB)"
         )
         
         if filtered_sales is None or filtered_sales.empty:
             st.warning("No data available for the selected filters")
             return
         
-        # Calculate metrics
-        metrics = calculate_metrics(filtered_sales)
-        
         # Display metrics in columns
         col1, col2, col3, col4 = st.columns(4)
         with col1:
-            st.metric("Total Sales", f"${metrics['total_sales']:,.2f}")
+            st.metric("Total Sales", f"${metrics['total_sales']:,.2f}", delta=period_delta(metrics, 'total_sales'))
         with col2:
-            st.metric("Total Units Sold", f"{metrics['total_units']:,}")
+            st.metric("Total Units Sold", f"{metrics['total_units']:,}", delta=period_delta(metrics, 'total_units'))
         with col3:
-            st.metric("Average Order Value", f"${metrics['avg_order_value']:,.2f}")
+            st.metric("Average Order Value", f"${metrics['avg_order_value']:,.2f}", delta=period_delta(metrics, 'avg_order_value'))
         with col4:
-            st.metric("Total Orders", f"{metrics['total_orders']:,}")
+            st.metric("Total Orders", f"{metrics['total_orders']:,}", delta=period_delta(metrics, 'total_orders'))
         
         # Additional metrics
         col5, col6, col7, col8 = st.columns(4)
@@ -272,51 +604,25 @@ def main():
         with col8:
             st.metric("Avg Daily Sales", f"${metrics['avg_daily_sales']:,.2f}")
         
-        # Sales Trend Analysis
-        st.subheader("Sales Trend Analysis")
-        fig_trend = create_sales_trend_chart(filtered_sales)
-        st.plotly_chart(fig_trend, use_container_width=True)
-        
-        # Regional Analysis
-        st.subheader("Regional Analysis")
-        fig_pie, fig_growth = create_regional_analysis(filtered_sales)
-        col1, col2 = st.columns(2)
-        with col1:
-            st.plotly_chart(fig_pie, use_container_width=True)
-        with col2:
-            st.plotly_chart(fig_growth, use_container_width=True)
-        
-        # Product Analysis
-        st.subheader("Product Analysis")
-        fig_products, fig_category = create_product_analysis(filtered_sales)
-        col1, col2 = st.columns(2)
-        with col1:
-            st.plotly_chart(fig_products, use_container_width=True)
-        with col2:
-            st.plotly_chart(fig_category, use_container_width=True)
-        
-        # Customer Analysis
-        st.subheader("Customer Analysis")
-        customer_metrics = filtered_sales.groupby('customer_id').agg({
-            'sales_amount': ['sum', 'count'],
-            'units_sold': 'sum'
-        }).reset_index()
-        customer_metrics.columns = ['customer_id', 'total_spent', 'order_count', 'total_units']
-        customer_metrics['avg_order_value'] = customer_metrics['total_spent'] / customer_metrics['order_count']
-        
-        fig_customer = px.scatter(
-            customer_metrics,
-            x='total_spent',
-            y='order_count',
-            size='total_units',
-            title="Customer Value Analysis",
-            labels={
-                'total_spent': 'Total Spent ($)',
-                'order_count': 'Number of Orders',
-                'total_units': 'Total Units Purchased'
-            }
+        # Only the date range narrows the data, so the top-customer tracker can answer
+        date_only = (
+            set(selected_regions) >= set(regions) and set(selected_categories) >= set(categories)
+            and sales_range == (min_sales, max_sales)
         )
-        st.plotly_chart(fig_customer, use_container_width=True)
+        # Charts only group by date, region, category and product, so cube cells can feed them
+        section_view({
+            'sales_df': sales_df, 'version': version,
+            'filtered_sales': filtered_sales, 'summary': summary, 'metrics': metrics,
+            'key': filter_key(version, start_date, end_date, selected_regions, selected_categories, sales_range[0], sales_range[1]),
+            'start_date': start_date, 'end_date': end_date,
+            'date_only': date_only, 'full_resolution': full_resolution
+        }, show_timings)
+        
+        timings = section_timings()
+        timings.record('full rerun', time.perf_counter() - run_start)
+        if show_timings:
+            st.sidebar.caption(f"Last full rerun: {timings.last('full rerun') * 1000:.0f} ms")
+            st.sidebar.dataframe(timings.summary().round(1), hide_index=True)
     
     except Exception as e:
         logger.error(f"Error in main dashboard: {str(e)}")
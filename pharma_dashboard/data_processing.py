@@ -1,48 +1,206 @@
-import pandas as pd
 import requests
 from pathlib import Path
-import io
+import csv
+import shutil
+import tempfile
+from datetime import datetime
+
+SALES_COLUMNS = ['Invoice ID', 'Date', 'Customer', 'Product', 'Quantity', 'Unit Price', 'Total']
+PRODUCT_COLUMNS = ['Product', 'Category']
+CUSTOMER_COLUMNS = ['Customer', 'Region', 'Customer Type']
+PARQUET_BATCH_ROWS = 50_000
+
+def _format_cell(value):
+    """Render a worksheet cell the way DataFrame.to_csv would"""
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        if value.hour == value.minute == value.second == value.microsecond == 0:
+            return value.strftime('%Y-%m-%d')
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    return value
+
+class _CsvSalesWriter:
+    def __init__(self, path):
+        self.file = open(path, 'w', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(SALES_COLUMNS)
+
+    def write(self, row):
+        self.writer.writerow([_format_cell(value) for value in row])
+
+    def close(self):
+        self.file.close()
+
+class _ParquetSalesWriter:
+    """Buffers a bounded batch of rows and flushes it as a Parquet row group"""
+
+    def __init__(self, path):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.pa = pa
+        self.schema = pa.schema([
+            ('Invoice ID', pa.string()),
+            ('Date', pa.timestamp('us')),
+            ('Customer', pa.string()),
+            ('Product', pa.string()),
+            ('Quantity', pa.int32()),
+            ('Unit Price', pa.float64()),
+            ('Total', pa.float64())
+        ])
+        self.writer = pq.ParquetWriter(path, self.schema)
+        self.batch = [[] for _ in SALES_COLUMNS]
+
+    def write(self, row):
+        for column, value in zip(self.batch, row):
+            column.append(value)
+        if len(self.batch[0]) >= PARQUET_BATCH_ROWS:
+            self.flush()
+
+    def flush(self):
+        if not self.batch[0]:
+            return
+        invoice_ids, dates, customers, products, quantities, prices, totals = self.batch
+        # Excel stores every number as a float and may hold dates as ISO text
+        columns = [
+            [None if v is None else str(v) for v in invoice_ids],
+            [datetime.fromisoformat(v) if isinstance(v, str) else v for v in dates],
+            customers,
+            products,
+            [None if v is None else int(v) for v in quantities],
+            prices,
+            totals
+        ]
+        arrays = [
+            self.pa.array(values, type=field.type)
+            for values, field in zip(columns, self.schema)
+        ]
+        self.writer.write_table(self.pa.Table.from_arrays(arrays, schema=self.schema))
+        self.batch = [[] for _ in SALES_COLUMNS]
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+
+def _open_workbook(source):
+    """Open a workbook path or binary stream in openpyxl read-only mode.
+
+    Workbooks are zip archives, so non-seekable streams (e.g. an HTTP body)
+    are first spooled to a temporary file in fixed-size blocks.
+    """
+    from openpyxl import load_workbook
+
+    if hasattr(source, 'read') and not (hasattr(source, 'seekable') and source.seekable()):
+        spooled = tempfile.TemporaryFile()
+        shutil.copyfileobj(source, spooled)
+        spooled.seek(0)
+        source = spooled
+    return load_workbook(source, read_only=True, data_only=True)
+
+def process_workbook(source, data_dir=None, sales_format='csv', sheet_name=None):
+    """Split a sales workbook into sales, products and customers files in one pass.
+
+    Rows are streamed from openpyxl's read-only mode: each sales row is
+    written out immediately and the product and customer dimensions are
+    deduplicated with insertion-ordered dicts, so memory stays constant in
+    the number of sales rows. sales_format is 'csv' or 'parquet'. Returns a
+    summary dict with row counts and the files written.
+    """
+    if data_dir is None:
+        data_dir = Path.cwd() / 'data'
+    data_dir = Path(data_dir)
+    data_dir.mkdir(exist_ok=True)
+    if sales_format not in ('csv', 'parquet'):
+        raise ValueError(f"Unsupported sales format: {sales_format}")
+
+    workbook = _open_workbook(source)
+    try:
+        worksheet = workbook[sheet_name] if sheet_name else workbook.active
+        rows = worksheet.iter_rows(values_only=True)
+        header = [str(name).strip() if name is not None else '' for name in next(rows)]
+
+        missing_columns = set(SALES_COLUMNS + PRODUCT_COLUMNS + CUSTOMER_COLUMNS) - set(header)
+        if missing_columns:
+            raise ValueError(f"Missing required columns: {missing_columns}")
+        sales_positions = [header.index(column) for column in SALES_COLUMNS]
+        product_positions = [header.index(column) for column in PRODUCT_COLUMNS]
+        customer_positions = [header.index(column) for column in CUSTOMER_COLUMNS]
+
+        sales_path = data_dir / f'processed_sales.{sales_format}'
+        writer = _CsvSalesWriter(sales_path) if sales_format == 'csv' else _ParquetSalesWriter(sales_path)
+        products = {}
+        customers = {}
+        sales_rows = 0
+        try:
+            for row in rows:
+                # Read-only worksheets can report trailing blank rows
+                if row is None or all(value is None for value in row):
+                    continue
+                writer.write([row[i] for i in sales_positions])
+                products.setdefault(tuple(row[i] for i in product_positions), len(products) + 1)
+                customers.setdefault(tuple(row[i] for i in customer_positions), len(customers) + 1)
+                sales_rows += 1
+        finally:
+            writer.close()
+    finally:
+        workbook.close()
+
+    # Dimension ids follow first appearance, like drop_duplicates().index + 1
+    products_path = data_dir / 'processed_products.csv'
+    with open(products_path, 'w', newline='', encoding='utf-8') as f:
+        product_writer = csv.writer(f)
+        product_writer.writerow(PRODUCT_COLUMNS + ['product_id'])
+        for key, product_id in products.items():
+            product_writer.writerow([_format_cell(value) for value in key] + [product_id])
+
+    customers_path = data_dir / 'processed_customers.csv'
+    with open(customers_path, 'w', newline='', encoding='utf-8') as f:
+        customer_writer = csv.writer(f)
+        customer_writer.writerow(CUSTOMER_COLUMNS + ['customer_id'])
+        for key, customer_id in customers.items():
+            customer_writer.writerow([_format_cell(value) for value in key] + [customer_id])
+
+    return {
+        'sales_rows': sales_rows,
+        'products': len(products),
+        'customers': len(customers),
+        'sales_path': sales_path,
+        'products_path': products_path,
+        'customers_path': customers_path
+    }
 
 def download_and_process_data(data_dir=None):
-    """Download and process the pharmaceutical data"""
+    """Download and process the pharmaceutical data.
+
+    Returns the process_workbook summary (output paths and row counts), or
+    None on failure, not the (sales, products, customers) frames; the tables
+    stay on disk for callers to load, e.g. with
+    read_table(summary['sales_path'], 'sales', chunksize=...), so memory use
+    stays flat.
+    """
     if data_dir is None:
         data_dir = Path.cwd() / 'data'
+    data_dir = Path(data_dir)
     data_dir.mkdir(exist_ok=True)
-    
+
     # URL of the Excel file
     excel_url = "https://github.com/Dogukan-gur/Pharmaceutical-Company-s-Wholesale-Retail-Data/files/10006360/Pharm.Data.xlsx"
-    
+
     try:
-        # Download the file
+        # Download the file in blocks instead of holding the whole body in memory
         print("Downloading data...")
-        response = requests.get(excel_url)
-        response.raise_for_status()
-        
-        # Read Excel file
-        print("Processing data...")
-        excel_data = pd.read_excel(io.BytesIO(response.content))
-        
-        # Process and split data into relevant tables
-        # Sales data
-        sales_df = excel_data[['Invoice ID', 'Date', 'Customer', 'Product', 'Quantity', 'Unit Price', 'Total']].copy()
-        sales_df['Date'] = pd.to_datetime(sales_df['Date'])
-        
-        # Products data
-        products_df = excel_data[['Product', 'Category']].drop_duplicates().reset_index(drop=True)
-        products_df['product_id'] = products_df.index + 1
-        
-        # Customers data
-        customers_df = excel_data[['Customer', 'Region', 'Customer Type']].drop_duplicates().reset_index(drop=True)
-        customers_df['customer_id'] = customers_df.index + 1
-        
-        # Save processed data
-        sales_df.to_csv(data_dir / 'processed_sales.csv', index=False)
-        products_df.to_csv(data_dir / 'processed_products.csv', index=False)
-        customers_df.to_csv(data_dir / 'processed_customers.csv', index=False)
-        
-        print("Data processed and saved successfully!")
-        return sales_df, products_df, customers_df
-        
+        with requests.get(excel_url, stream=True) as response:
+            response.raise_for_status()
+            response.raw.decode_content = True
+
+            # Split the workbook into tables in a single streaming pass
+            print("Processing data...")
+            summary = process_workbook(response.raw, data_dir)
+
+        print(f"Data processed and saved successfully! ({summary['sales_rows']:,} sales rows)")
+        return summary
+
     except Exception as e:
         print(f"Error processing data: {str(e)}")
-        return None, None, None 
\ No newline at end of file
+        return None
@@ -1,50 +1,74 @@
 import pandas as pd
 from pathlib import Path
+import hashlib
 import logging
-from datetime import datetime
+import os
+from pharma_dashboard.date_index import sort_by_date
+from pharma_dashboard.dimensions import build_customer_index, build_product_index
+from pharma_dashboard.schema import apply_schema, parse_dates, read_table
+from pharma_dashboard.validation import format_report, not_null, run_rules
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Bump whenever preprocess_sales_data changes its output so stale snapshots are rebuilt
+SNAPSHOT_VERSION = 6
+SNAPSHOT_DIR = '.cache'
+DEFAULT_CHUNKSIZE = 250_000
+
+def coerce_sales_dates(sales_df):
+    """Parse the Date column and drop rows whose date cannot be parsed"""
+    sales_df = parse_dates(sales_df, 'sales')
+    
+    # Drop rows with null dates
+    sales_df, report = run_rules(sales_df, [not_null(['Date'])])
+    if report['rejected_rows']:
+        logger.warning(format_report(report))
+        sales_df = sales_df.reset_index(drop=True)
+    return sales_df
+
+def enrich_sales_data(sales_df, products_df, customers_df, product_index=None, customer_index=None):
+    """Attach product and customer attributes and rename columns to the expected format.
+
+    Attributes are gathered through DimensionIndex lookups instead of merges;
+    pass prebuilt indexes to reuse them across chunks.
+    """
+    if product_index is None:
+        product_index = build_product_index(products_df)
+    if customer_index is None:
+        customer_index = build_customer_index(customers_df)
+    
+    product_rows = product_index.positions(sales_df['Product'])
+    customer_rows = customer_index.positions(sales_df['Customer'])
+    
+    # Rename columns to match expected format
+    sales_df = sales_df.rename(columns={
+        'Date': 'date',
+        'Product': 'product_name',
+        'Customer': 'customer_id',
+        'Quantity': 'units_sold',
+        'Total': 'sales_amount'
+    })
+    
+    # Unknown products and customers fall back to 'Unknown'
+    sales_df['category'] = product_index.take('Category', product_rows, fill_value='Unknown')
+    sales_df['product_id'] = product_index.take('product_id', product_rows)
+    sales_df['region'] = customer_index.take('Region', customer_rows, fill_value='Unknown')
+    if 'Customer Type' in customer_index.columns:
+        sales_df['customer_type'] = customer_index.take('Customer Type', customer_rows, fill_value='Unknown')
+    
+    return apply_schema(sales_df, 'processed_sales')
+
 def preprocess_sales_data(sales_df, products_df, customers_df):
     """Preprocess sales data to match expected format"""
     try:
         # Convert date column to datetime before merging
-        sales_df['Date'] = pd.to_datetime(sales_df['Date'], errors='coerce')
+        sales_df = coerce_sales_dates(sales_df)
         
-        # Drop rows with null dates
-        if sales_df['Date'].isnull().any():
-            logger.warning(f"Dropping {sales_df['Date'].isnull().sum()} rows with null dates")
-            sales_df = sales_df.dropna(subset=['Date'])
+        sales_df = enrich_sales_data(sales_df, products_df, customers_df)
         
-        # Merge sales with products
-        sales_df = sales_df.merge(
-            products_df[['Product', 'Category', 'product_id']],
-            on='Product',
-            how='left'
-        )
-        
-        # Merge with customers to get region
-        sales_df = sales_df.merge(
-            customers_df[['Customer', 'Region']],
-            on='Customer',
-            how='left'
-        )
-        
-        # Rename columns to match expected format
-        sales_df = sales_df.rename(columns={
-            'Date': 'date',
-            'Product': 'product_name',
-            'Customer': 'customer_id',
-            'Quantity': 'units_sold',
-            'Total': 'sales_amount',
-            'Region': 'region',
-            'Category': 'category'
-        })
-        
-        # Fill missing values
-        sales_df['region'] = sales_df['region'].fillna('Unknown')
-        sales_df['category'] = sales_df['category'].fillna('Unknown')
+        # Keep rows in date order so date ranges resolve to a slice
+        sales_df = sort_by_date(sales_df)
         
         # Validate data
         validate_sales_data(sales_df)
@@ -80,20 +104,165 @@ def validate_sales_data(df):
     
     return True
 
-def load_and_preprocess_data():
-    """Load and preprocess all data files"""
+def read_sales_chunks(path, chunksize=DEFAULT_CHUNKSIZE):
+    """Yield raw sales rows from a CSV in chunks of at most chunksize rows"""
+    yield from read_table(path, 'sales', chunksize=chunksize)
+
+def coerce_chunk_dates(chunks):
+    """Pipeline stage: parse dates and drop unparseable rows in each chunk"""
+    for chunk in chunks:
+        yield coerce_sales_dates(chunk)
+
+def enrich_chunks(chunks, products_df, customers_df):
+    """Pipeline stage: attach product and customer attributes to each chunk"""
+    product_index = build_product_index(products_df)
+    customer_index = build_customer_index(customers_df)
+    for chunk in chunks:
+        yield enrich_sales_data(chunk, products_df, customers_df, product_index, customer_index)
+
+def validate_chunks(chunks):
+    """Pipeline stage: validate each processed chunk"""
+    for chunk in chunks:
+        validate_sales_data(chunk)
+        yield chunk
+
+def process_sales_chunks(path, products_df, customers_df, chunksize=DEFAULT_CHUNKSIZE):
+    """Stream sales.csv through parse -> date coerce -> enrich -> validate.
+
+    Only one chunk is alive at a time, so memory is bounded by chunksize
+    rather than the size of the file. Consume the generator with a sink.
+    """
+    chunks = read_sales_chunks(path, chunksize)
+    chunks = coerce_chunk_dates(chunks)
+    chunks = enrich_chunks(chunks, products_df, customers_df)
+    return validate_chunks(chunks)
+
+def concat_sink(chunks):
+    """Collect processed chunks into a single date-sorted in-memory DataFrame"""
+    frames = list(chunks)
+    if not frames:
+        raise ValueError("No sales rows to process")
+    # Chunks carry their own categories, so concat yields strings until the schema is re-applied
+    return sort_by_date(apply_schema(pd.concat(frames, ignore_index=True), 'processed_sales'))
+
+def arrow_schema(df):
+    """Arrow schema for a processed frame, with dictionary indices wide enough for any batch"""
+    import pyarrow as pa
+    
+    schema = pa.Table.from_pandas(df, preserve_index=False).schema
+    # Categorical codes of later batches may not fit the first batch's int8 indices
+    for i, field in enumerate(schema):
+        if pa.types.is_dictionary(field.type):
+            schema = schema.set(i, field.with_type(
+                pa.dictionary(pa.int32(), field.type.value_type)
+            ))
+    return schema
+
+def parquet_sink(chunks, path):
+    """Append processed chunks to a Parquet file as row groups; returns rows written"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    
+    path = Path(path)
+    tmp_path = path.with_name(path.name + '.tmp')
+    writer = None
+    rows = 0
     try:
-        data_dir = Path(__file__).parent.parent / 'data'
+        for chunk in chunks:
+            if writer is None:
+                writer = pq.ParquetWriter(tmp_path, arrow_schema(chunk))
+            table = pa.Table.from_pandas(chunk, schema=writer.schema, preserve_index=False)
+            writer.write_table(table)
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        raise ValueError("No sales rows to process")
+    os.replace(tmp_path, path)
+    return rows
+
+def _file_hash(path, block_size=1 << 20):
+    """Return the sha256 hex digest of a file, read in blocks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def file_fingerprint(path):
+    """Return size, mtime and content hash of a file"""
+    stat = Path(path).stat()
+    return {
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'sha256': _file_hash(path)
+    }
+
+def fingerprint_matches(path, recorded):
+    """Check a file against a recorded fingerprint, hashing only when the mtime moved"""
+    path = Path(path)
+    if recorded is None or not path.exists():
+        return False
+    stat = path.stat()
+    if stat.st_size != recorded['size']:
+        return False
+    return stat.st_mtime_ns == recorded['mtime_ns'] or _file_hash(path) == recorded['sha256']
+
+def load_and_preprocess_data(data_dir=None, use_snapshot=True, chunksize=None, workers=None):
+    """Load and preprocess all data files.
+
+    When use_snapshot is set, the preprocessed sales frame is read from the
+    Parquet dataset in data/.cache, which is rebuilt when products or
+    customers change and only processes rows appended to sales.csv since the
+    last load (see pharma_dashboard.incremental). Otherwise sales.csv is
+    parsed in full: passing chunksize streams it through process_sales_chunks
+    instead of parsing it in one go, and workers > 1 parses it across a
+    process pool.
+    """
+    try:
+        if data_dir is None:
+            data_dir = Path(__file__).parent.parent / 'data'
+        data_dir = Path(data_dir)
+        
+        if use_snapshot:
+            # Imported here because the incremental module builds on this one
+            from pharma_dashboard.incremental import load_incremental
+            return load_incremental(data_dir)
         
-        # Load raw data
-        sales_df = pd.read_csv(data_dir / 'sales.csv')
-        products_df = pd.read_csv(data_dir / 'products.csv')
-        customers_df = pd.read_csv(data_dir / 'customers.csv')
+        products_df = read_table(data_dir / 'products.csv', 'products')
+        customers_df = read_table(data_dir / 'customers.csv', 'customers')
         
-        # Preprocess sales data
-        sales_df = preprocess_sales_data(sales_df, products_df, customers_df)
+        if workers and workers > 1:
+            # Imported here because the parallel loader builds on this module
+            from pharma_dashboard.parallel_loader import load_sales_parallel
+            sales_df = load_sales_parallel(data_dir / 'sales.csv', products_df, customers_df, workers)
+        elif chunksize:
+            sales_df = concat_sink(process_sales_chunks(
+                data_dir / 'sales.csv', products_df, customers_df, chunksize
+            ))
+        else:
+            # Load raw data
+            sales_df = read_table(data_dir / 'sales.csv', 'sales')
+            
+            # Preprocess sales data
+            sales_df = preprocess_sales_data(sales_df, products_df, customers_df)
         
         return sales_df, products_df, customers_df
     except Exception as e:
         logger.error(f"Error loading data: {str(e)}")
-        raise 
\ No newline at end of file
+        raise
+
+def stream_sales_to_parquet(output_path, data_dir=None, chunksize=DEFAULT_CHUNKSIZE):
+    """Preprocess sales.csv chunk by chunk straight into a Parquet file; returns rows written.
+
+    Rows keep file order, since sorting would need the whole file in memory;
+    sort_by_date the frame after reading it back.
+    """
+    if data_dir is None:
+        data_dir = Path(__file__).parent.parent / 'data'
+    data_dir = Path(data_dir)
+    products_df = read_table(data_dir / 'products.csv', 'products')
+    customers_df = read_table(data_dir / 'customers.csv', 'customers')
+    chunks = process_sales_chunks(data_dir / 'sales.csv', products_df, customers_df, chunksize)
+    return parquet_sink(chunks, output_path)
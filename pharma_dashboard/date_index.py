@@ -0,0 +1,94 @@
+"""
+Date-sorted sales frames and binary-search date range filtering.
+
+Processed sales are kept in ascending date order, so a date range resolves
+to a contiguous row slice with two np.searchsorted calls instead of a
+comparison over every row. sort_by_date records the frames it returns, so
+filters trust them without scanning the dates again; any other frame has its
+dates checked once per call. A record holds the date array it was made for,
+so a frame whose date column is reassigned is checked again.
+"""
+import threading
+import weakref
+
+import numpy as np
+import pandas as pd
+
+# Date-sorted frames by (identity, column), each with the date array that was sorted
+_sorted = {}
+_sorted_lock = threading.Lock()
+
+def _address(values):
+    return values.__array_interface__['data'][0]
+
+def mark_sorted_by_date(df, column='date'):
+    """Record that df is sorted by column, e.g. for a cache's copy of a loaded frame"""
+    key = (id(df), column)
+    # Keeping the array alive means its address cannot be reused by new dates
+    dates = df[column].to_numpy()
+
+    def forget(_):
+        with _sorted_lock:
+            _sorted.pop(key, None)
+
+    with _sorted_lock:
+        _sorted[key] = (weakref.ref(df, forget), dates)
+
+def _marked_sorted(df, column):
+    with _sorted_lock:
+        entry = _sorted.get((id(df), column))
+    if entry is None or entry[0]() is not df:
+        return False
+    dates = df[column].to_numpy()
+    return len(dates) == len(entry[1]) and _address(dates) == _address(entry[1])
+
+def sort_by_date(df, column='date'):
+    """Stable-sort a frame by its date column (a no-op if already sorted) and record it as sorted"""
+    if _marked_sorted(df, column):
+        return df
+    if not df[column].is_monotonic_increasing:
+        df = df.sort_values(column, kind='stable').reset_index(drop=True)
+    mark_sorted_by_date(df, column)
+    return df
+
+def is_sorted_by_date(df, column='date'):
+    """True when the frame is recorded as sorted or its dates are ascending.
+
+    Recorded frames are answered in O(1); edits made in place to their dates
+    are not seen, so treat loaded frames as read-only.
+    """
+    return _marked_sorted(df, column) or df[column].is_monotonic_increasing
+
+def _as_datetime64(value, dtype):
+    return pd.Timestamp(value).to_datetime64().astype(dtype)
+
+def date_bounds(df, start=None, stop=None, column='date'):
+    """Row positions [lo, hi) holding start <= date < stop in a date-sorted frame"""
+    values = df[column].to_numpy()
+    lo = 0 if start is None else values.searchsorted(_as_datetime64(start, values.dtype), side='left')
+    hi = len(values) if stop is None else values.searchsorted(_as_datetime64(stop, values.dtype), side='left')
+    return int(lo), int(max(lo, hi))
+
+def filter_date_range(df, start=None, stop=None, column='date'):
+    """Rows with start <= date < stop; a slice when sorted, a vectorized mask otherwise"""
+    if is_sorted_by_date(df, column):
+        lo, hi = date_bounds(df, start, stop, column)
+        return df.iloc[lo:hi]
+    dates = df[column]
+    mask = np.ones(len(df), dtype=bool)
+    if start is not None:
+        mask &= (dates >= pd.Timestamp(start)).to_numpy()
+    if stop is not None:
+        mask &= (dates < pd.Timestamp(stop)).to_numpy()
+    return df[mask]
+
+def day_stop(end_date):
+    """Exclusive upper bound that includes the whole of end_date"""
+    return pd.Timestamp(end_date).normalize() + pd.Timedelta(days=1)
+
+def month_codes(dates):
+    """Months since 1970-01 for each date; NaT becomes -1"""
+    months = np.asarray(dates).astype('datetime64[M]')
+    codes = months.astype(np.int64)
+    codes[np.isnat(months)] = -1
+    return codes
@@ -0,0 +1,99 @@
+"""
+Keyed lookups into the product and customer dimension tables.
+
+A DimensionIndex is built once per dimension table and then enriches any
+number of sales rows by position: keys are resolved to dimension rows with
+a single hash lookup per distinct key, and attributes are gathered with
+np.take into preallocated arrays, so no intermediate wide frame is built.
+"""
+import logging
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+class DimensionIndex:
+    """Hash index over one key column of a dimension table"""
+
+    def __init__(self, df, key, columns, on_duplicate='warn'):
+        self.key = key
+        self.columns = list(columns)
+
+        # A left merge fans out one sales row per duplicate key; keep the first and report the rest
+        duplicated = df[key].duplicated(keep='first').to_numpy()
+        self.duplicate_keys = sorted(str(k) for k in pd.unique(df.loc[duplicated, key]))
+        if self.duplicate_keys:
+            message = (f"{len(self.duplicate_keys)} duplicate {key} keys in dimension table: "
+                       f"{self.duplicate_keys[:10]}")
+            if on_duplicate == 'raise':
+                raise ValueError(message)
+            logger.warning(f"{message}; keeping the first row for each")
+
+        dimension = df.loc[~duplicated]
+        self.index = pd.Index(dimension[key].to_numpy())
+        self._attributes = {column: _encode(dimension[column]) for column in self.columns}
+
+    def __len__(self):
+        return len(self.index)
+
+    def positions(self, keys):
+        """Return the dimension row for each key, or -1 where the key is unknown"""
+        if isinstance(keys.dtype, pd.CategoricalDtype):
+            # Resolve each distinct category once, then broadcast through the codes;
+            # the trailing -1 maps NaN keys (code -1) to "unknown"
+            category_rows = self.index.get_indexer(keys.cat.categories)
+            return np.append(category_rows, -1)[keys.cat.codes.to_numpy()]
+        return self.index.get_indexer(keys)
+
+    def take(self, column, positions, fill_value=None):
+        """Gather a dimension attribute for each position, filling unknown keys"""
+        kind, values, categories = self._attributes[column]
+        n = len(positions)
+
+        if kind == 'categorical':
+            fill_code = -1
+            if fill_value is not None:
+                if fill_value not in categories:
+                    categories = categories.append(pd.Index([fill_value]))
+                fill_code = categories.get_loc(fill_value)
+            # Null attributes in the dimension are filled like unknown keys
+            lookup = np.append(np.where(values < 0, fill_code, values), fill_code).astype(np.int32)
+            codes = np.empty(n, dtype=np.int32)
+            np.take(lookup, positions, out=codes)
+            return pd.Categorical.from_codes(codes, categories=categories)
+
+        # The trailing slot is what unknown keys (-1) gather
+        data = np.empty(n, dtype=values.dtype)
+        if kind == 'integer':
+            np.take(np.append(values, 0).astype(values.dtype), positions, out=data)
+            mask = np.take(np.append(categories, True), positions)
+            return pd.arrays.IntegerArray(data, mask)
+        np.take(np.append(values, np.nan if fill_value is None else fill_value), positions, out=data)
+        return data
+
+def _encode(column):
+    """Store an attribute column as (kind, values, categories) for positional gathers.
+
+    String and categorical columns become integer codes plus categories;
+    integer columns keep their values plus a null mask in the third slot.
+    """
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        return 'categorical', column.cat.codes.to_numpy(), column.cat.categories
+    if pd.api.types.is_integer_dtype(column.dtype):
+        null_mask = column.isna().to_numpy()
+        numpy_dtype = getattr(column.dtype, 'numpy_dtype', column.dtype)
+        values = column.fillna(0).to_numpy(dtype=numpy_dtype)
+        return 'integer', values, null_mask
+    if pd.api.types.is_numeric_dtype(column.dtype):
+        return 'float', column.to_numpy(dtype='float64'), None
+    codes, categories = pd.factorize(column)
+    return 'categorical', codes, categories
+
+def build_product_index(products_df, on_duplicate='warn'):
+    """Index products by name for category and product_id lookups"""
+    return DimensionIndex(products_df, 'Product', ['Category', 'product_id'], on_duplicate)
+
+def build_customer_index(customers_df, on_duplicate='warn'):
+    """Index customers by name for region and (when present) customer type lookups"""
+    columns = ['Region'] + [column for column in ['Customer Type'] if column in customers_df.columns]
+    return DimensionIndex(customers_df, 'Customer', columns, on_duplicate)
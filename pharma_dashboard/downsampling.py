@@ -0,0 +1,95 @@
+"""
+Visual downsampling of long line series before they are sent to the browser.
+
+A line chart cannot show more points than it has pixels across, so each
+series is cut to a point budget derived from the chart width. Largest-
+Triangle-Three-Buckets (LTTB) keeps the points that best preserve the shape
+of smooth series such as moving averages; min/max bucketing keeps the
+lowest and highest point of every bucket, so spikes in raw daily sales
+survive. Series at or under the budget are returned unchanged.
+"""
+import numpy as np
+import pandas as pd
+
+CHART_WIDTH_PX = 700
+POINTS_PER_PIXEL = 1
+
+def point_budget(width=CHART_WIDTH_PX, points_per_pixel=POINTS_PER_PIXEL):
+    """Points per series worth drawing on a chart width pixels wide"""
+    return max(int(width * points_per_pixel), 3)
+
+FULL_WIDTH_POINTS = point_budget()
+HALF_WIDTH_POINTS = point_budget(CHART_WIDTH_PX // 2)
+
+def _numeric(x):
+    """x values as floats, datetimes as nanoseconds"""
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        x = x.astype('datetime64[ns]').astype(np.int64)
+    return x.astype('float64')
+
+def lttb_indices(x, y, n_out):
+    """Positions of the n_out points Largest-Triangle-Three-Buckets keeps, first and last included.
+
+    The inner points are split into n_out - 2 buckets; from each, the point
+    forming the largest triangle with the previously kept point and the mean
+    of the next bucket is kept.
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    kept = np.empty(n_out, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    previous = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_lo, next_hi = (edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else (n - 1, n)
+        mean_x, mean_y = x[next_lo:next_hi].mean(), y[next_lo:next_hi].mean()
+        areas = np.abs(
+            (x[previous] - mean_x) * (y[lo:hi] - y[previous])
+            - (x[previous] - x[lo:hi]) * (mean_y - y[previous])
+        )
+        previous = kept[i + 1] = lo + int(np.argmax(areas))
+    return kept
+
+def minmax_indices(x, y, n_out):
+    """Positions of the lowest and highest point in each of about n_out / 2 equal buckets, plus the ends"""
+    n = len(y)
+    if n_out >= n:
+        return np.arange(n)
+    n_buckets = max((n_out - 2) // 2, 1)
+    buckets = np.arange(n) * n_buckets // n
+    order = np.lexsort((y, buckets))
+    firsts = np.flatnonzero(np.r_[True, buckets[order][1:] != buckets[order][:-1]])
+    lasts = np.r_[firsts[1:], n] - 1
+    return np.unique(np.r_[0, order[firsts], order[lasts], n - 1])
+
+METHODS = {'lttb': lttb_indices, 'minmax': minmax_indices}
+
+def downsample_indices(x, y, max_points, method='lttb'):
+    """Sorted positions of the points to draw for one series.
+
+    Missing values are never drawn, so only finite points compete for the
+    budget. max_points=None keeps every point.
+    """
+    y = np.asarray(y, dtype='float64')
+    finite = np.flatnonzero(np.isfinite(y))
+    if max_points is None or len(finite) <= max_points:
+        return np.arange(len(y))
+    return finite[METHODS[method](_numeric(x)[finite], y[finite], max_points)]
+
+def downsample(x, y, max_points, method='lttb'):
+    """The (x, y) points to draw for one series"""
+    keep = downsample_indices(x, y, max_points, method)
+    return np.asarray(x)[keep], np.asarray(y)[keep]
+
+def downsample_long(frame, x, y, group, max_points, method='lttb'):
+    """Downsample every group of a long (x, group, y) frame, as fed to px.line, separately"""
+    if max_points is None:
+        return frame
+    parts = [
+        part.iloc[downsample_indices(part[x], part[y], max_points, method)]
+        for _, part in frame.groupby(group, observed=True, sort=False)
+    ]
+    return pd.concat(parts, ignore_index=True) if parts else frame
@@ -0,0 +1,212 @@
+"""
+Lazy filter plans shared by the Streamlit dashboard and the Flask API.
+
+A FilterPlan collects predicates without touching the data. When evaluated,
+the date range becomes a binary-searched row slice, and the remaining
+predicates run in order of estimated selectivity, each one only on the row
+positions that survived the previous ones. Bitmap- and trigram-indexed
+predicates are answered from their indexes. The result is an array of row
+positions; the frame is materialized at most once, by frame().
+"""
+import numpy as np
+import pandas as pd
+
+from pharma_dashboard.date_index import date_bounds, is_sorted_by_date
+
+# Fallback selectivity guesses for predicates without an index to ask
+RANGE_SELECTIVITY = 0.5
+SEARCH_SELECTIVITY = 0.1
+
+class _BitmapPredicate:
+    """All bitmap-indexed isin filters, combined word-wise before unpacking"""
+
+    def __init__(self, bitmap_index, filters):
+        self.bitmap_index = bitmap_index
+        self.filters = filters
+
+    def selectivity(self):
+        return self.bitmap_index.selectivity(self.filters)
+
+    def apply(self, df, candidates, lo, hi):
+        mask = self.bitmap_index.mask(self.filters, lo, hi)
+        if mask is None:
+            return candidates
+        if candidates is None:
+            return np.flatnonzero(mask) + lo
+        return candidates[mask[candidates - lo]]
+
+class _SearchPredicate:
+    """Substring search answered by a SearchIndex"""
+
+    def __init__(self, search_index, term):
+        self.search_index = search_index
+        self.term = term
+        self._rows = None
+
+    def rows(self):
+        if self._rows is None:
+            self._rows = self.search_index.rows(self.term)
+        return self._rows
+
+    def selectivity(self):
+        return len(self.rows()) / max(self.search_index.n_rows, 1)
+
+    def apply(self, df, candidates, lo, hi):
+        rows = self.rows()
+        rows = rows[rows.searchsorted(lo):rows.searchsorted(hi)]
+        if candidates is None:
+            return rows
+        return np.intersect1d(candidates, rows, assume_unique=True)
+
+class _ColumnPredicate:
+    """A vectorized test on one column, evaluated only on the surviving rows"""
+
+    def __init__(self, column, test, selectivity):
+        self.column = column
+        self.test = test
+        self._selectivity = selectivity
+
+    def selectivity(self):
+        return self._selectivity
+
+    def apply(self, df, candidates, lo, hi):
+        if candidates is None:
+            values = df[self.column].iloc[lo:hi]
+            return np.flatnonzero(self.test(values)) + lo
+        values = df[self.column].iloc[candidates]
+        return candidates[self.test(values)]
+
+def take_rows(df, positions):
+    """Rows at sorted positions, as a slice when they are contiguous"""
+    if len(positions) and positions[-1] - positions[0] + 1 == len(positions):
+        return df.iloc[positions[0]:positions[-1] + 1]
+    return df.iloc[positions]
+
+def _isin_selectivity(column, values):
+    # Assume values are evenly spread over the column's categories
+    if isinstance(column.dtype, pd.CategoricalDtype) and len(column.cat.categories):
+        return min(1.0, len(set(values)) / len(column.cat.categories))
+    return RANGE_SELECTIVITY
+
+class FilterPlan:
+    """Lazily collected filters over a sales frame, evaluated once into row positions.
+
+    Builder methods return the plan, so filters can be chained:
+
+        rows = (FilterPlan(sales_df, bitmap_index)
+                .date_range(start, stop)
+                .isin('region', regions)
+                .between('sales_amount', low, high)
+                .positions())
+
+    bitmap_index and search_index are optional; without them the same
+    filters run as column scans restricted to the surviving rows.
+    """
+
+    def __init__(self, df, bitmap_index=None, search_index=None):
+        for index in (bitmap_index, search_index):
+            if index is not None and index.n_rows != len(df):
+                raise ValueError("Index was built for a different frame")
+        self.df = df
+        self.bitmap_index = bitmap_index
+        self.search_index = search_index
+        self.date_column = 'date'
+        self.start = None
+        self.stop = None
+        self.bitmap_filters = {}
+        self.predicates = []
+        self._positions = None
+
+    def date_range(self, start=None, stop=None, column='date'):
+        """Keep rows with start <= date < stop"""
+        self.date_column = column
+        self.start, self.stop = start, stop
+        return self
+
+    def isin(self, column, values):
+        """Keep rows whose column is one of values; an empty or None selection is ignored"""
+        if not values:
+            return self
+        values = list(values)
+        if self.bitmap_index is not None and column in self.bitmap_index.bitmaps:
+            self.bitmap_filters[column] = values
+        else:
+            self.predicates.append(_ColumnPredicate(
+                column, lambda s: s.isin(values).to_numpy(), _isin_selectivity(self.df[column], values)
+            ))
+        return self
+
+    def between(self, column, low=None, high=None):
+        """Keep rows with low <= column <= high; a None bound is open"""
+        if low is None and high is None:
+            return self
+
+        def test(s):
+            mask = np.ones(len(s), dtype=bool)
+            if low is not None:
+                mask &= (s >= low).to_numpy()
+            if high is not None:
+                mask &= (s <= high).to_numpy()
+            return mask
+        self.predicates.append(_ColumnPredicate(column, test, RANGE_SELECTIVITY))
+        return self
+
+    def search(self, term, columns=('product_name', 'customer_id')):
+        """Keep rows where any of columns contains term (case-insensitive, literal)"""
+        if not term:
+            return self
+        if self.search_index is not None:
+            self.predicates.append(_SearchPredicate(self.search_index, term))
+            return self
+        term = term.lower()
+
+        def test(s):
+            return s.str.lower().str.contains(term, regex=False).to_numpy()
+        # Each column is a separate test, so OR them in one predicate over the row subset
+        self.predicates.append(_ColumnPredicate(
+            list(columns),
+            lambda frame: np.logical_or.reduce([test(frame[column]) for column in columns]),
+            SEARCH_SELECTIVITY
+        ))
+        return self
+
+    def _bounds(self):
+        """Row slice for the date range, or the whole frame plus a date predicate if unsorted"""
+        if self.start is None and self.stop is None:
+            return 0, len(self.df), []
+        if is_sorted_by_date(self.df, self.date_column):
+            lo, hi = date_bounds(self.df, self.start, self.stop, self.date_column)
+            return lo, hi, []
+        start = None if self.start is None else pd.Timestamp(self.start)
+        stop = None if self.stop is None else pd.Timestamp(self.stop)
+
+        def test(s):
+            mask = np.ones(len(s), dtype=bool)
+            if start is not None:
+                mask &= (s >= start).to_numpy()
+            if stop is not None:
+                mask &= (s < stop).to_numpy()
+            return mask
+        return 0, len(self.df), [_ColumnPredicate(self.date_column, test, RANGE_SELECTIVITY)]
+
+    def positions(self):
+        """Sorted positions of the rows passing every filter (computed once)"""
+        if self._positions is not None:
+            return self._positions
+        lo, hi, predicates = self._bounds()
+        predicates = predicates + self.predicates
+        if self.bitmap_filters:
+            predicates.append(_BitmapPredicate(self.bitmap_index, self.bitmap_filters))
+
+        # Most selective first, so later predicates see as few rows as possible
+        candidates = None
+        for predicate in sorted(predicates, key=lambda p: p.selectivity()):
+            candidates = predicate.apply(self.df, candidates, lo, hi)
+            if not len(candidates):
+                break
+        self._positions = np.arange(lo, hi) if candidates is None else candidates
+        return self._positions
+
+    def frame(self):
+        """The filtered rows as a DataFrame; a plain slice when only the date range applies"""
+        return take_rows(self.df, self.positions())
@@ -0,0 +1,14 @@
+"""
+Integer group codes shared by the array kernels.
+
+The KPI, prefix-sum, time-series, sketch and comparison modules bin rows by
+np.bincount over codes instead of grouping with pandas; group_codes gives
+them codes whose order matches the groups groupby would list.
+"""
+import pandas as pd
+
+def group_codes(column):
+    """Integer codes and their labels, in the order groupby would list the groups"""
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        return column.cat.codes.to_numpy(), column.cat.categories
+    return pd.factorize(column, sort=True)
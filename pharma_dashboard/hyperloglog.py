@@ -0,0 +1,179 @@
+"""
+HyperLogLog distinct counts for customer metrics.
+
+A sketch with precision p keeps m = 2**p one-byte registers; its relative
+standard error is about 1.04 / sqrt(m), i.e. 1.6% at the default p = 12, and
+estimates fall within three standard errors (4.9%) almost always. Sketches
+merge by taking the register-wise maximum, so the distinct count of any union
+of slices comes from its slices' sketches without revisiting the rows.
+
+CustomerSketches stores one sketch per day x dimension-value cell in sparse
+form and answers unique-customer counts for filtered date ranges by merging
+them. Slices with few customer-cell pairs are counted exactly instead.
+"""
+import numpy as np
+import pandas as pd
+
+from pharma_dashboard.grouping import group_codes
+
+DEFAULT_PRECISION = 12
+# Slices with at most this many distinct customer-cell pairs are counted exactly
+EXACT_LIMIT = 10_000
+
+def standard_error(precision=DEFAULT_PRECISION):
+    """Relative standard error of a sketch with 2**precision registers"""
+    return 1.04 / np.sqrt(2 ** precision)
+
+def _leading_zeros(words):
+    """Leading zero bits of each uint64"""
+    words = words.copy()
+    zeros = np.zeros(len(words), dtype=np.uint8)
+    for shift in (32, 16, 8, 4, 2, 1):
+        empty = words < np.uint64(1 << (64 - shift))
+        zeros[empty] += shift
+        words[empty] <<= np.uint64(shift)
+    zeros[words == 0] = 64
+    return zeros
+
+def register_updates(values, precision=DEFAULT_PRECISION):
+    """Register index and rank (position of the first set bit) for each value"""
+    hashes = pd.util.hash_array(np.asarray(values, dtype=object))
+    registers = (hashes >> np.uint64(64 - precision)).astype(np.int64)
+    remainder = hashes << np.uint64(precision)
+    ranks = np.minimum(_leading_zeros(remainder), 64 - precision) + 1
+    return registers, ranks.astype(np.uint8)
+
+def estimate(registers):
+    """Cardinality estimate from a register array, with the small-range correction"""
+    m = len(registers)
+    alpha = 0.7213 / (1 + 1.079 / m)
+    raw = alpha * m * m / np.sum(np.ldexp(1.0, -registers.astype(np.int64)))
+    empty = np.count_nonzero(registers == 0)
+    if raw <= 2.5 * m and empty:
+        return m * np.log(m / empty)
+    return raw
+
+class HyperLogLog:
+    """A mergeable distinct-count sketch"""
+
+    def __init__(self, precision=DEFAULT_PRECISION):
+        if not 4 <= precision <= 18:
+            raise ValueError("precision must be between 4 and 18")
+        self.precision = precision
+        self.registers = np.zeros(2 ** precision, dtype=np.uint8)
+
+    def add(self, values):
+        """Add an array of values (missing values are skipped)"""
+        values = pd.Series(values).dropna().to_numpy()
+        registers, ranks = register_updates(values, self.precision)
+        np.maximum.at(self.registers, registers, ranks)
+        return self
+
+    def merge(self, other):
+        """Fold another sketch of the same precision into this one"""
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge sketches of different precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self):
+        return int(round(estimate(self.registers)))
+
+def count_distinct(values, exact_limit=EXACT_LIMIT, precision=DEFAULT_PRECISION):
+    """nunique() for small inputs, a HyperLogLog estimate for larger ones"""
+    values = pd.Series(values)
+    if len(values) <= exact_limit:
+        return int(values.nunique())
+    return HyperLogLog(precision).add(values).count()
+
+class CustomerSketches:
+    """HyperLogLog sketches of customer_id per day x dimension-value cell.
+
+    Cells are numbered day-major, so a date range is a contiguous run of
+    cells. Only non-empty registers are stored, as parallel (cell, register,
+    rank) arrays sorted by cell, next to the distinct (cell, customer)
+    pairs used for exact counts of small slices.
+    """
+
+    def __init__(self, df, dimensions=('region', 'customer_type'), precision=DEFAULT_PRECISION,
+                 exact_limit=EXACT_LIMIT):
+        self.dimensions = tuple(dimensions)
+        self.precision = precision
+        self.exact_limit = exact_limit
+        self.n_rows = len(df)
+
+        dates = df['date'].to_numpy().astype('datetime64[D]')
+        customers, customer_labels = group_codes(df['customer_id'])
+        valid = ~np.isnat(dates) & (customers >= 0)
+        codes, self.labels = [], {}
+        for dimension in self.dimensions:
+            dimension_codes, labels = group_codes(df[dimension])
+            valid &= dimension_codes >= 0
+            codes.append(dimension_codes)
+            self.labels[dimension] = pd.Index(labels)
+        self.shape = tuple(len(self.labels[d]) for d in self.dimensions)
+        self.n_combos = int(np.prod(self.shape))
+
+        dates = dates[valid]
+        self.first_day = dates.min() if len(dates) else np.datetime64('1970-01-01', 'D')
+        days = (dates - self.first_day).astype(np.int64)
+        combos = np.ravel_multi_index([c[valid] for c in codes], self.shape) if self.shape else np.zeros(len(days), dtype=np.int64)
+        cells = days * self.n_combos + combos
+
+        # Distinct (cell, customer) pairs, sorted by cell
+        customers = customers[valid].astype(np.int64)
+        n_customers = int(customers.max()) + 1 if len(customers) else 1
+        pairs = np.unique(cells * n_customers + customers)
+        self.pair_cells, self.pair_customers = np.divmod(pairs, n_customers)
+
+        # Sketch registers per cell: the highest rank each register sees
+        customer_registers, customer_ranks = register_updates(np.asarray(customer_labels), precision)
+        keys = self.pair_cells * (2 ** precision) + customer_registers[self.pair_customers]
+        keys, inverse = np.unique(keys, return_inverse=True)
+        ranks = np.zeros(len(keys), dtype=np.uint8)
+        np.maximum.at(ranks, inverse, customer_ranks[self.pair_customers])
+        self.cells, self.registers = np.divmod(keys, 2 ** precision)
+        self.ranks = ranks
+
+    def _day(self, value):
+        return int((np.datetime64(pd.Timestamp(value), 'D') - self.first_day).astype(np.int64))
+
+    def _cell_range(self, cells, start, stop):
+        lo = 0 if start is None else np.searchsorted(cells, max(self._day(start), 0) * self.n_combos)
+        hi = len(cells) if stop is None else np.searchsorted(cells, max(self._day(stop), 0) * self.n_combos)
+        return lo, max(lo, hi)
+
+    def _combo_mask(self, selections):
+        """Which dimension-value combinations the selections include"""
+        allowed = np.ones(self.shape, dtype=bool)
+        for axis, dimension in enumerate(self.dimensions):
+            values = selections.get(dimension)
+            if values:
+                keep = np.zeros(self.shape[axis], dtype=bool)
+                positions = self.labels[dimension].get_indexer(list(values))
+                keep[positions[positions >= 0]] = True
+                allowed &= keep.reshape([-1 if a == axis else 1 for a in range(len(self.shape))])
+        return allowed.ravel()
+
+    def sketch(self, start=None, stop=None, **selections):
+        """Merged HyperLogLog for dates in [start, stop) and the selected dimension values"""
+        lo, hi = self._cell_range(self.cells, start, stop)
+        cells = self.cells[lo:hi]
+        keep = self._combo_mask(selections)[cells % self.n_combos]
+        merged = HyperLogLog(self.precision)
+        np.maximum.at(merged.registers, self.registers[lo:hi][keep], self.ranks[lo:hi][keep])
+        return merged
+
+    def unique_customers(self, start=None, stop=None, exact=None, **selections):
+        """Distinct customers for dates in [start, stop) and the selected dimension values.
+
+        exact=None counts exactly when the slice has at most exact_limit
+        customer-cell pairs and merges sketches otherwise; True or False
+        forces either mode.
+        """
+        if exact is not False:
+            lo, hi = self._cell_range(self.pair_cells, start, stop)
+            if exact or hi - lo <= self.exact_limit:
+                keep = self._combo_mask(selections)[self.pair_cells[lo:hi] % self.n_combos]
+                return int(np.unique(self.pair_customers[lo:hi][keep]).size)
+        return self.sketch(start, stop, **selections).count()
@@ -0,0 +1,256 @@
+"""
+Incremental ingest for an append-only sales.csv.
+
+The processed dataset lives in data/.cache/sales_processed as one Parquet
+part per refresh. A JSON high-water mark records how far sales.csv has been
+consumed (byte offset, last Invoice ID and date) together with a sha256
+checkpoint per CHECKPOINT_BYTES block of the consumed bytes, so a refresh only
+parses rows appended since then. A refresh re-hashes just the last consumed
+block, so its cost follows the size of the append rather than the history;
+refresh_sales_dataset(verify=True) re-hashes every block and also catches an
+in-place correction early in the file. Truncation, a rewritten history, a
+changed header or changed product / customer tables trigger a full rebuild
+instead.
+"""
+import hashlib
+import io
+import json
+import logging
+import os
+import shutil
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from pharma_dashboard.data_processor import (
+    SNAPSHOT_DIR, SNAPSHOT_VERSION, arrow_schema, file_fingerprint, fingerprint_matches,
+    preprocess_sales_data
+)
+from pharma_dashboard.date_index import sort_by_date
+from pharma_dashboard.schema import apply_schema, read_table
+
+logger = logging.getLogger(__name__)
+
+DATASET_DIR = 'sales_processed'
+STATE_FILE = 'sales_incremental.json'
+DIMENSION_FILES = ('products.csv', 'customers.csv')
+CHECKPOINT_BYTES = 1 << 20
+
+def _cache_paths(data_dir):
+    cache_dir = Path(data_dir) / SNAPSHOT_DIR
+    return cache_dir / DATASET_DIR, cache_dir / STATE_FILE
+
+def _read_state(state_path):
+    try:
+        return json.loads(state_path.read_text())
+    except (OSError, ValueError):
+        return None
+
+def _write_state(state_path, state):
+    tmp_path = state_path.with_name(state_path.name + '.tmp')
+    tmp_path.write_text(json.dumps(state, indent=2))
+    os.replace(tmp_path, state_path)
+
+def _checkpoints(f, offset, first_block=0):
+    """sha256 of each CHECKPOINT_BYTES block of the first offset bytes, from first_block on.
+
+    The last block may be partial.
+    """
+    hashes = []
+    position = first_block * CHECKPOINT_BYTES
+    f.seek(position)
+    while position < offset:
+        block = f.read(min(CHECKPOINT_BYTES, offset - position))
+        if not block:
+            break
+        hashes.append(hashlib.sha256(block).hexdigest())
+        position += len(block)
+    return hashes
+
+def _history_matches(f, offset, checkpoints, first_block=0):
+    """Whether the first offset bytes, from first_block on, still hash to the stored checkpoints.
+
+    Stops at the first mismatch.
+    """
+    f.seek(first_block * CHECKPOINT_BYTES)
+    for expected in checkpoints[first_block:]:
+        block = f.read(min(CHECKPOINT_BYTES, offset - f.tell()))
+        if hashlib.sha256(block).hexdigest() != expected:
+            return False
+    return f.tell() == offset
+
+def _write_part(sales_df, dataset_dir, part):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    table = pa.Table.from_pandas(sales_df, schema=arrow_schema(sales_df), preserve_index=False)
+    pq.write_table(table, dataset_dir / f'part-{part:05d}.parquet')
+
+def _high_water_mark(raw_df, offset, ends_with_newline, checkpoints):
+    last_row = raw_df.iloc[-1] if len(raw_df) else None
+    return {
+        'offset': offset,
+        'ends_with_newline': ends_with_newline,
+        'checkpoints': checkpoints,
+        'last_invoice_id': None if last_row is None or 'Invoice ID' not in raw_df.columns
+        else str(last_row['Invoice ID']),
+        'last_date': None if last_row is None else str(last_row['Date'])
+    }
+
+def _full_rebuild(data_dir, products_df, customers_df, reason):
+    """Reprocess all of sales.csv into a fresh dataset and reset the high-water mark"""
+    logger.info(f"Full rebuild of processed sales: {reason}")
+    dataset_dir, state_path = _cache_paths(data_dir)
+    sales_path = Path(data_dir) / 'sales.csv'
+
+    # Parse exactly the bytes the high-water mark will cover, even if the file grows meanwhile
+    data = sales_path.read_bytes()
+    offset = len(data)
+    header = data[:data.find(b'\n') + 1].decode('utf-8')
+    checkpoints = [
+        hashlib.sha256(data[start:start + CHECKPOINT_BYTES]).hexdigest()
+        for start in range(0, offset, CHECKPOINT_BYTES)
+    ]
+    raw_df = read_table(io.BytesIO(data), 'sales')
+    mark = _high_water_mark(raw_df, offset, data.endswith(b'\n'), checkpoints)
+    del data
+    sales_df = preprocess_sales_data(raw_df, products_df, customers_df)
+
+    if dataset_dir.exists():
+        shutil.rmtree(dataset_dir)
+    dataset_dir.mkdir(parents=True)
+    _write_part(sales_df, dataset_dir, 0)
+
+    _write_state(state_path, {
+        'version': SNAPSHOT_VERSION,
+        'updated_at': datetime.now().isoformat(),
+        'header': header,
+        'rows': len(sales_df),
+        'parts': 1,
+        'dimensions': {
+            name: file_fingerprint(Path(data_dir) / name) for name in DIMENSION_FILES
+        },
+        **mark
+    })
+    return {'mode': 'full', 'reason': reason, 'rows_added': len(sales_df), 'rows': len(sales_df)}
+
+def _rebuild_reason(state, data_dir, dataset_dir, size):
+    """Return why the persisted dataset cannot be extended, or None if it can"""
+    if state is None or not dataset_dir.exists():
+        return 'no processed dataset'
+    if state.get('version') != SNAPSHOT_VERSION:
+        return 'processed format changed'
+    if 'checkpoints' not in state:
+        return 'high-water mark has no checkpoints'
+    for name in DIMENSION_FILES:
+        if not fingerprint_matches(Path(data_dir) / name, state['dimensions'].get(name)):
+            return f'{name} changed'
+    if size < state['offset']:
+        return 'sales.csv was truncated'
+    if not state['ends_with_newline'] and size > state['offset']:
+        return 'sales.csv did not end with a newline at the last refresh'
+    return None
+
+def refresh_sales_dataset(data_dir=None, products_df=None, customers_df=None, on_append=None,
+                          verify=False):
+    """Bring the persisted processed dataset up to date with sales.csv.
+
+    Only the bytes appended since the high-water mark are parsed and
+    preprocessed; a trailing line without a newline is left for the next
+    refresh in case the writer is still appending. on_append, if given, is
+    called with the newly processed rows of an append so incremental
+    structures can ingest them. verify re-hashes the whole consumed history
+    instead of its last block. Returns a summary dict with the refresh mode
+    ('full', 'append' or 'unchanged') and row counts.
+    """
+    if data_dir is None:
+        data_dir = Path(__file__).parent.parent / 'data'
+    data_dir = Path(data_dir)
+    if products_df is None:
+        products_df = read_table(data_dir / 'products.csv', 'products')
+    if customers_df is None:
+        customers_df = read_table(data_dir / 'customers.csv', 'customers')
+
+    dataset_dir, state_path = _cache_paths(data_dir)
+    sales_path = data_dir / 'sales.csv'
+    state = _read_state(state_path)
+    size = sales_path.stat().st_size
+
+    reason = _rebuild_reason(state, data_dir, dataset_dir, size)
+    if reason:
+        return _full_rebuild(data_dir, products_df, customers_df, reason)
+
+    offset = state['offset']
+    with open(sales_path, 'rb') as f:
+        if f.readline().decode('utf-8') != state['header']:
+            return _full_rebuild(data_dir, products_df, customers_df, 'header changed')
+        first_block = 0 if verify else max(len(state['checkpoints']) - 1, 0)
+        if not _history_matches(f, offset, state['checkpoints'], first_block):
+            return _full_rebuild(data_dir, products_df, customers_df, 'consumed rows were rewritten')
+        f.seek(offset)
+        delta = f.read(size - offset)
+
+    # Stop at the last complete line
+    delta = delta[:delta.rfind(b'\n') + 1]
+    if not delta:
+        return {'mode': 'unchanged', 'rows_added': 0, 'rows': state['rows']}
+
+    raw_df = read_table(io.BytesIO(state['header'].encode('utf-8') + delta), 'sales')
+    new_offset = offset + len(delta)
+    # Complete blocks keep their checkpoints; only the last partial block and the delta need hashing
+    complete = offset // CHECKPOINT_BYTES
+    with open(sales_path, 'rb') as f:
+        checkpoints = state['checkpoints'][:complete] + _checkpoints(f, new_offset, complete)
+    mark = _high_water_mark(raw_df, new_offset, True, checkpoints)
+    sales_df = preprocess_sales_data(raw_df, products_df, customers_df)
+
+    if len(sales_df):
+        _write_part(sales_df, dataset_dir, state['parts'])
+        state['parts'] += 1
+    state['rows'] += len(sales_df)
+    state['updated_at'] = datetime.now().isoformat()
+    state.update(mark)
+    _write_state(state_path, state)
+    if on_append is not None and len(sales_df):
+        on_append(sales_df)
+
+    logger.info(f"Appended {len(sales_df)} processed sales rows from {len(delta)} new bytes")
+    return {'mode': 'append', 'rows_added': len(sales_df), 'rows': state['rows']}
+
+def read_sales_dataset(data_dir=None):
+    """Read the persisted processed sales dataset, sorted by date"""
+    if data_dir is None:
+        data_dir = Path(__file__).parent.parent / 'data'
+    dataset_dir, _ = _cache_paths(data_dir)
+    # pyarrow unifies the per-part dictionaries into one set of categories
+    sales_df = apply_schema(pd.read_parquet(dataset_dir), 'processed_sales')
+    # Each part is sorted; parts only need re-sorting when appended rows are back-dated
+    return sort_by_date(sales_df)
+
+def append_processed_rows(sales_df, rows):
+    """sales_df with newly processed rows appended, as read_sales_dataset would return it.
+
+    Categories are extended rather than re-derived, so the served frame is
+    extended in memory instead of reading every part back.
+    """
+    rows = apply_schema(rows, 'processed_sales')
+    categories = {
+        column: sales_df[column].cat.categories.union(rows[column].cat.categories, sort=False)
+        for column in sales_df.columns
+        if isinstance(sales_df[column].dtype, pd.CategoricalDtype) and column in rows.columns
+    }
+    # Assigned to copies; the served frame may still be read by other requests
+    sales_df = sales_df.assign(**{c: sales_df[c].cat.set_categories(v) for c, v in categories.items()})
+    rows = rows.assign(**{c: rows[c].cat.set_categories(v) for c, v in categories.items()})
+    return sort_by_date(pd.concat([sales_df, rows[sales_df.columns]], ignore_index=True))
+
+def load_incremental(data_dir=None):
+    """Refresh the processed dataset from appended rows and return sales, products and customers"""
+    if data_dir is None:
+        data_dir = Path(__file__).parent.parent / 'data'
+    data_dir = Path(data_dir)
+    products_df = read_table(data_dir / 'products.csv', 'products')
+    customers_df = read_table(data_dir / 'customers.csv', 'customers')
+    refresh_sales_dataset(data_dir, products_df, customers_df)
+    return read_sales_dataset(data_dir), products_df, customers_df
@@ -0,0 +1,88 @@
+"""
+Single-pass KPI kernel for the dashboards' metric rows.
+
+The needed columns are pulled out as NumPy arrays once; totals are plain
+sums, top product/region come from np.bincount over categorical codes
+weighted by sales, and the daily series from np.bincount over day offsets.
+No groupby or filtered copy is built, and the same kernel serves raw rows
+and cube cells. YoY growth is PeriodComparison's year to date against the
+same months last year, the definition the reports use.
+"""
+import numpy as np
+
+from pharma_dashboard.comparison import TOTAL, PeriodComparison
+from pharma_dashboard.cube import order_count
+from pharma_dashboard.grouping import group_codes
+
+EMPTY_KPIS = {
+    'total_sales': 0,
+    'total_units': 0,
+    'avg_order_value': 0,
+    'total_orders': 0,
+    'top_product': 'N/A',
+    'top_region': 'N/A',
+    'sales_growth': 0,
+    'avg_daily_sales': 0,
+    'yoy_growth': 0
+}
+
+def top_value(column, weights):
+    """Label with the largest weight total, like groupby(...).sum().idxmax()"""
+    codes, labels = group_codes(column)
+    present = codes >= 0
+    if not present.any():
+        return 'N/A'
+    codes, weights = codes[present], weights[present]
+    totals = np.bincount(codes, weights=weights, minlength=len(labels))
+    # Categories absent from the rows are not groups, so they must never win
+    totals[np.bincount(codes, minlength=len(labels)) == 0] = -np.inf
+    return labels[int(np.argmax(totals))]
+
+def compute_kpis(df, now=None, yoy=True):
+    """Every KPI-row figure used by the dashboards, computed from columnar arrays.
+
+    Returns total sales/units/orders, average order value, top product and
+    region, first-to-last day sales growth, average daily sales and year to
+    date growth (as of now). yoy=False skips the monthly binning behind the
+    last one and reports 0.
+    """
+    if df is None or df.empty:
+        return dict(EMPTY_KPIS)
+
+    amounts = df['sales_amount'].to_numpy(dtype='float64')
+    total_sales = amounts.sum()
+    total_units = df['units_sold'].to_numpy().sum()
+    total_orders = order_count(df)
+    avg_order_value = total_sales / total_orders if total_orders > 0 else 0
+
+    # Undated rows count towards totals but, as with groupby, not towards any day
+    dates = df['date'].to_numpy()
+    dated = ~np.isnat(dates)
+    dates, dated_amounts = dates[dated], amounts[dated]
+
+    days = dates.astype('datetime64[D]').astype(np.int64)
+    if len(days):
+        day_offsets = days - days.min()
+        daily_sales = np.bincount(day_offsets, weights=dated_amounts)[np.bincount(day_offsets) > 0]
+    else:
+        daily_sales = np.zeros(0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sales_growth = (daily_sales[-1] - daily_sales[0]) / daily_sales[0] * 100 if len(daily_sales) > 1 else 0
+    avg_daily_sales = total_sales / len(daily_sales) if len(daily_sales) > 0 else 0
+
+    yoy_growth = 0
+    if yoy:
+        growth = PeriodComparison(df).ytd(now).loc[TOTAL, 'growth']
+        yoy_growth = 0 if np.isnan(growth) else growth
+
+    return {
+        'total_sales': total_sales,
+        'total_units': total_units,
+        'avg_order_value': avg_order_value,
+        'total_orders': total_orders,
+        'top_product': top_value(df['product_name'], amounts) if 'product_name' in df.columns else 'N/A',
+        'top_region': top_value(df['region'], amounts) if 'region' in df.columns else 'N/A',
+        'sales_growth': sales_growth,
+        'avg_daily_sales': avg_daily_sales,
+        'yoy_growth': yoy_growth
+    }
@@ -0,0 +1,180 @@
+"""
+Incrementally refreshed KPI summary tables for the SQL backend.
+
+The KPI queries in pharma-sales-dashboard/sql/02_kpi_queries.sql read from
+monthly summary tables (03_kpi_summary_tables.sql) instead of aggregating
+pharma_sales on every dashboard load. refresh_kpi_tables keeps them current:
+it finds the months that rows inserted since the last refresh fall in, using
+a created_at high-water mark, and recomputes only those months
+(04_refresh_kpi_summaries.sql). Works with sqlite3 and psycopg2 connections;
+run_kpi_query runs one of the (Postgres) KPI queries on either.
+
+Rows are assumed to be inserted with created_at set (the column defaults to
+CURRENT_TIMESTAMP). In Postgres that is the start time of the inserting
+transaction, so a row can commit after a refresh with a created_at older than
+the stored mark; every refresh therefore rescans SAFETY_LAG behind it.
+Updates and deletes of existing rows are not tracked and need a full refresh.
+"""
+import logging
+import re
+from datetime import datetime, timedelta
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+SQL_DIR = Path(__file__).parent.parent / 'pharma-sales-dashboard' / 'sql'
+KPI_QUERIES = '02_kpi_queries.sql'
+SUMMARY_SCHEMA = '03_kpi_summary_tables.sql'
+REFRESH_SCRIPT = '04_refresh_kpi_summaries.sql'
+SOURCE_TABLE = 'pharma_sales'
+SUMMARY_TABLES = ('kpi_monthly_sales', 'kpi_customer_monthly')
+# Longest an inserting transaction is expected to stay open
+SAFETY_LAG = timedelta(hours=1)
+
+MONTH_OF_DATE = {
+    'sqlite': "strftime('%Y-%m-01', s.date)",
+    'postgresql': "CAST(DATE_TRUNC('month', s.date) AS DATE)"
+}
+
+def connection_dialect(conn):
+    """'sqlite' for sqlite3 connections, else 'postgresql'"""
+    return 'sqlite' if type(conn).__module__.startswith('sqlite3') else 'postgresql'
+
+def sql_statements(path):
+    """The statements of a .sql file, without comments"""
+    text = '\n'.join(line for line in Path(path).read_text().splitlines() if not line.strip().startswith('--'))
+    return [statement.strip() for statement in text.split(';') if statement.strip()]
+
+def named_statements(path):
+    """The statements of a .sql file by title, the first line of the comment block right above each"""
+    statements, header, body = {}, [], []
+    for line in Path(path).read_text().splitlines():
+        line = line.strip()
+        if not body and (not line or line.startswith('--')):
+            # A blank line ends a comment block that belongs to no statement
+            header = header + [line[2:].strip()] if line else []
+            continue
+        body.append(line)
+        if line.endswith(';'):
+            statement = '\n'.join(body)[:-1].strip()
+            statements[header[0] if header else statement] = statement
+            header, body = [], []
+    return statements
+
+def _date_trunc(unit, value):
+    """DATE_TRUNC('year' | 'month', date) for sqlite, as ISO date text"""
+    if value is None:
+        return None
+    value = str(value)
+    return f"{value[:4]}-01-01" if unit.lower() == 'year' else f"{value[:7]}-01"
+
+def sqlite_statement(statement):
+    """A Postgres KPI statement in sqlite's dialect: ::FLOAT casts and month intervals"""
+    statement = statement.replace('::FLOAT', ' * 1.0')
+    return re.sub(r"(\w+) \+ INTERVAL '(\d+) months'", r"date(\1, '+\2 months')", statement)
+
+def run_query(conn, statement):
+    """Rows of a Postgres-dialect query, translated first on sqlite3 connections"""
+    if connection_dialect(conn) == 'sqlite':
+        conn.create_function('DATE_TRUNC', 2, _date_trunc, deterministic=True)
+        statement = sqlite_statement(statement)
+    cursor = conn.cursor()
+    cursor.execute(statement)
+    return cursor.fetchall()
+
+def run_kpi_query(conn, title, sql_dir=SQL_DIR):
+    """Rows of the query titled title in 02_kpi_queries.sql"""
+    return run_query(conn, named_statements(Path(sql_dir) / KPI_QUERIES)[title])
+
+def _execute(cursor, statement, params, dialect):
+    """Run a statement with :name parameters on either driver"""
+    if not params:
+        cursor.execute(statement)
+        return
+    if dialect == 'postgresql':
+        # psycopg2 uses pyformat parameters
+        statement = re.sub(r'(?<!:):(\w+)', r'%(\1)s', statement)
+    cursor.execute(statement, params)
+
+def _has_column(cursor, table, column):
+    cursor.execute(f"SELECT * FROM {table} WHERE 1 = 0")
+    return column in [description[0] for description in cursor.description]
+
+def _behind(watermark, lag):
+    """The watermark moved back by lag, in the type the driver returned it in"""
+    if isinstance(watermark, str):
+        # sqlite returns timestamps as ISO text
+        return (datetime.fromisoformat(watermark) - lag).isoformat(sep=' ')
+    return watermark - lag
+
+def create_summary_tables(conn, sql_dir=SQL_DIR):
+    """Create the summary and refresh-state tables if they do not exist"""
+    cursor = conn.cursor()
+    for statement in sql_statements(Path(sql_dir) / SUMMARY_SCHEMA):
+        cursor.execute(statement)
+    conn.commit()
+
+def refresh_kpi_tables(conn, sql_dir=SQL_DIR, full=False, lag=SAFETY_LAG):
+    """Bring the summary tables up to date with rows inserted since the last refresh.
+
+    Every month that contains a row created since lag before the last
+    refresh is recomputed from pharma_sales in full, so back-dated and late
+    committed inserts are counted. full=True recomputes every month. Returns
+    a summary dict with the refresh mode and the number of months recomputed.
+    """
+    dialect = connection_dialect(conn)
+    cursor = conn.cursor()
+    cursor.execute("SELECT last_created_at FROM kpi_refresh_state WHERE source_table = 'pharma_sales'")
+    row = cursor.fetchone()
+    watermark = None if full or row is None else row[0]
+    cursor.execute(f"SELECT MIN(created_at), MAX(created_at) FROM {SOURCE_TABLE}")
+    first, high = cursor.fetchone()
+    if high is None:
+        if not full:
+            return {'mode': 'unchanged', 'months': 0}
+        # Nothing to recompute, but rows summarized before the table was emptied must go
+        try:
+            for table in SUMMARY_TABLES:
+                cursor.execute(f"DELETE FROM {table}")
+            cursor.execute("DELETE FROM kpi_refresh_state WHERE source_table = 'pharma_sales'")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        return {'mode': 'full', 'months': 0}
+
+    # Months are recomputed whole, so rescanning rows already summarized is harmless
+    low = first if watermark is None else _behind(watermark, lag)
+    delivered = "CASE WHEN s.delivery_status = 'delivered' THEN s.units_sold ELSE 0 END" \
+        if _has_column(cursor, SOURCE_TABLE, 'delivery_status') else '0'
+    placeholders = {'month_of_date': MONTH_OF_DATE[dialect], 'delivered_units': delivered}
+    params = {'low': low, 'high': high}
+
+    try:
+        if watermark is None:
+            for table in SUMMARY_TABLES:
+                cursor.execute(f"DELETE FROM {table}")
+        statements = sql_statements(Path(sql_dir) / REFRESH_SCRIPT)
+        for statement in statements:
+            statement = statement.format(**placeholders)
+            _execute(cursor, statement, params if ':low' in statement else None, dialect)
+            if statement.startswith('CREATE TEMPORARY TABLE'):
+                cursor.execute("SELECT COUNT(*) FROM kpi_touched_months")
+                months = cursor.fetchone()[0]
+
+        cursor.execute("DELETE FROM kpi_refresh_state WHERE source_table = 'pharma_sales'")
+        _execute(
+            cursor,
+            "INSERT INTO kpi_refresh_state (source_table, last_created_at, refreshed_at) "
+            "VALUES ('pharma_sales', :high, :refreshed_at)",
+            {'high': high, 'refreshed_at': datetime.now().isoformat(sep=' ', timespec='seconds')},
+            dialect
+        )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    mode = 'full' if watermark is None else 'incremental'
+    logger.info(f"Refreshed {months} months of KPI summaries ({mode})")
+    return {'mode': mode, 'months': months}
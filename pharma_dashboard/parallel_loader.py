@@ -0,0 +1,96 @@
+"""
+Multi-process CSV parsing for large sales extracts.
+
+The file is split into byte ranges aligned to line starts; each worker
+parses its range (with the header prepended) and optionally preprocesses
+it, and the results are concatenated in file order. Rows must not contain
+quoted newlines, since ranges are cut at raw newline bytes.
+"""
+import io
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from pharma_dashboard.date_index import sort_by_date
+from pharma_dashboard.dimensions import build_customer_index, build_product_index
+from pharma_dashboard.schema import TABLE_DTYPES, apply_schema, parse_dates
+
+logger = logging.getLogger(__name__)
+
+# Ranges smaller than this are not worth a worker process
+MIN_RANGE_BYTES = 1 << 20
+
+def split_byte_ranges(path, parts):
+    """Return the header line and up to `parts` (start, end) byte ranges aligned to line starts"""
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        header = f.readline()
+        body_start = f.tell()
+        boundaries = [body_start]
+        for i in range(1, parts):
+            target = body_start + (size - body_start) * i // parts
+            if target <= boundaries[-1]:
+                continue
+            f.seek(target - 1)
+            # Finish the line the target falls in so the next range starts on a fresh row
+            f.readline()
+            position = f.tell()
+            if boundaries[-1] < position < size:
+                boundaries.append(position)
+    boundaries.append(size)
+    ranges = [(start, end) for start, end in zip(boundaries, boundaries[1:]) if end > start]
+    return header, ranges
+
+def _parse_range(path, start, end, header, table, process, process_args):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    dtype = TABLE_DTYPES[table] if table else None
+    df = pd.read_csv(io.BytesIO(header + data), dtype=dtype)
+    if table:
+        df = parse_dates(df, table)
+    if process is not None:
+        df = process(df, *process_args)
+    return df
+
+def parallel_read_csv(path, workers=None, table=None, process=None, process_args=()):
+    """Parse a CSV across a process pool and concatenate the pieces in file order.
+
+    table names a schema in pharma_dashboard.schema to apply at read time.
+    process, if given, must be a module-level function called as
+    process(df, *process_args) on every piece inside the worker.
+    """
+    path = Path(path)
+    workers = workers or os.cpu_count() or 1
+    parts = max(1, min(workers, os.path.getsize(path) // MIN_RANGE_BYTES))
+    header, ranges = split_byte_ranges(path, parts)
+    if not ranges:
+        ranges = [(len(header), len(header))]
+
+    tasks = [(path, start, end, header, table, process, process_args) for start, end in ranges]
+    if len(tasks) == 1:
+        frames = [_parse_range(*tasks[0])]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            frames = list(pool.map(_parse_range, *zip(*tasks)))
+    return pd.concat(frames, ignore_index=True)
+
+def _preprocess_range(sales_df, products_df, customers_df, product_index, customer_index):
+    # Imported here so parallel_read_csv can be used without the processed-sales pipeline,
+    # e.g. by pharma-sales-dashboard, whose package has a data_processor of its own
+    from pharma_dashboard.data_processor import coerce_sales_dates, enrich_sales_data
+    sales_df = coerce_sales_dates(sales_df)
+    return enrich_sales_data(sales_df, products_df, customers_df, product_index, customer_index)
+
+def load_sales_parallel(path, products_df, customers_df, workers=None):
+    """Parse and preprocess sales.csv in parallel; the result equals preprocess_sales_data's"""
+    from pharma_dashboard.data_processor import validate_sales_data
+    args = (products_df, customers_df, build_product_index(products_df), build_customer_index(customers_df))
+    sales_df = parallel_read_csv(path, workers, table='sales', process=_preprocess_range, process_args=args)
+    # Pieces carry their own categories, so re-apply the shared dtypes after concat
+    sales_df = sort_by_date(apply_schema(sales_df, 'processed_sales'))
+    validate_sales_data(sales_df)
+    return sales_df
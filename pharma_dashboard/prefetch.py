@@ -0,0 +1,44 @@
+"""
+Bounded background prefetching of dashboard section caches.
+
+One worker thread, shared by every session, runs the builds. Each build is
+identified by a job key (section, filter key, controls); a key that is
+already queued or running is not queued again, and at most max_pending
+builds wait at once. Queued builds hold references to a session's frames,
+so the bound also caps the memory they keep alive.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+MAX_PENDING = 4
+
+class Prefetcher:
+    """Deduplicated, bounded queue of background cache builds"""
+
+    def __init__(self, max_pending=MAX_PENDING):
+        self.max_pending = max_pending
+        self.pending = set()
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='section-prefetch')
+
+    def submit(self, job_key, build):
+        """Queue build() unless the same job is pending or the queue is full; True when queued"""
+        with self.lock:
+            if job_key in self.pending or len(self.pending) >= self.max_pending:
+                return False
+            self.pending.add(job_key)
+
+        def run():
+            try:
+                build()
+            except Exception as e:
+                logger.warning(f"Prefetch {job_key} failed: {str(e)}")
+            finally:
+                with self.lock:
+                    self.pending.discard(job_key)
+
+        self.executor.submit(run)
+        return True
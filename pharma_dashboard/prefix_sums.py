@@ -0,0 +1,127 @@
+"""
+Per-day prefix sums for O(1) period totals and period-over-period comparisons.
+
+Sales, units and order counts are binned into a dense day axis for every
+combination of the chosen dimensions' values and accumulated along it. The
+total for any date range is then the difference of two cumulative entries
+per selected combination, so the previous period and the same period last
+year cost as little as the current one.
+"""
+import numpy as np
+import pandas as pd
+
+from pharma_dashboard.grouping import group_codes
+
+MEASURES = {
+    'total_sales': 'sales_amount',
+    'total_units': 'units_sold',
+    'total_orders': 'order_count'
+}
+PERIODS = ('previous', 'last_year')
+
+def _with_average(totals):
+    orders = totals['total_orders']
+    totals['avg_order_value'] = totals['total_sales'] / orders if orders > 0 else 0
+    return totals
+
+def period_totals(df):
+    """The same totals as DailyPrefixSums.totals, computed from rows or cube cells"""
+    totals = {
+        'total_sales': float(df['sales_amount'].sum()),
+        'total_units': int(df['units_sold'].sum()),
+        'total_orders': int(df['order_count'].sum()) if 'order_count' in df.columns else len(df)
+    }
+    return _with_average(totals)
+
+def comparison_periods(start, stop):
+    """(start, stop) of the current, previous and same-period-last-year ranges"""
+    start, stop = pd.Timestamp(start), pd.Timestamp(stop)
+    length = stop - start
+    year = pd.DateOffset(years=1)
+    return {
+        'current': (start, stop),
+        'previous': (start - length, start),
+        'last_year': (start - year, stop - year)
+    }
+
+def flatten_comparison(comparison):
+    """previous_* and last_year_* fields for a metrics dict or API response"""
+    return {
+        f'{period}_{key}': value
+        for period in PERIODS
+        for key, value in comparison[period].items()
+    }
+
+class DailyPrefixSums:
+    """Cumulative daily sales, units and orders per combination of dimension values"""
+
+    def __init__(self, df, dimensions=('region', 'category')):
+        self.dimensions = tuple(dimensions)
+        dates = df['date'].to_numpy()
+        dates = dates[~np.isnat(dates)]
+        self.first_day = dates.min().astype('datetime64[D]') if len(dates) else np.datetime64('1970-01-01', 'D')
+        days = (df['date'].to_numpy().astype('datetime64[D]') - self.first_day).astype(np.int64)
+        self.n_days = int(days.max()) + 1 if len(dates) else 0
+
+        codes, self.labels = [], {}
+        for dimension in self.dimensions:
+            dimension_codes, labels = group_codes(df[dimension])
+            codes.append(dimension_codes)
+            self.labels[dimension] = pd.Index(labels)
+        shape = tuple(len(self.labels[d]) for d in self.dimensions) + (self.n_days,)
+
+        # Rows with a missing date or dimension value belong to no cell
+        valid = ~np.isnat(df['date'].to_numpy())
+        for dimension_codes in codes:
+            valid &= dimension_codes >= 0
+        cells = np.zeros(0, dtype=np.int64)
+        if valid.any():
+            cells = np.ravel_multi_index([c[valid] for c in codes] + [days[valid]], shape)
+
+        self.cumulative = {}
+        for key, column in MEASURES.items():
+            if column in df.columns:
+                weights = df[column].to_numpy(dtype='float64')[valid]
+            else:
+                weights = None
+            daily = np.bincount(cells, weights=weights, minlength=int(np.prod(shape))).reshape(shape)
+            cumulative = np.zeros(shape[:-1] + (self.n_days + 1,))
+            np.cumsum(daily, axis=-1, out=cumulative[..., 1:])
+            self.cumulative[key] = cumulative
+
+    def _day(self, value):
+        """Position of a date on the day axis, clamped to the covered range"""
+        offset = (np.datetime64(pd.Timestamp(value), 'D') - self.first_day).astype(np.int64)
+        return int(np.clip(offset, 0, self.n_days))
+
+    def _selection(self, dimension, values):
+        labels = self.labels[dimension]
+        if not values:
+            return np.arange(len(labels))
+        positions = labels.get_indexer(list(values))
+        return positions[positions >= 0]
+
+    def totals(self, start=None, stop=None, **selections):
+        """Sales, units, orders and AOV for dates in [start, stop) and the selected values.
+
+        Each keyword names a dimension and lists the values to include; an
+        empty or missing selection includes every value.
+        """
+        lo = 0 if start is None else self._day(start)
+        hi = self.n_days if stop is None else self._day(stop)
+        hi = max(lo, hi)
+        index = np.ix_(*[self._selection(d, selections.get(d)) for d in self.dimensions], np.array([lo, hi]))
+        totals = {}
+        for key, cumulative in self.cumulative.items():
+            bounds = cumulative[index]
+            totals[key] = float((bounds[..., 1] - bounds[..., 0]).sum())
+        totals['total_units'] = int(round(totals['total_units']))
+        totals['total_orders'] = int(round(totals['total_orders']))
+        return _with_average(totals)
+
+    def compare(self, start, stop, **selections):
+        """Totals for [start, stop), the equally long period before it and the same period last year"""
+        return {
+            period: self.totals(period_start, period_stop, **selections)
+            for period, (period_start, period_stop) in comparison_periods(start, stop).items()
+        }
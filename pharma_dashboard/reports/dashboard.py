@@ -2,11 +2,13 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from datetime import datetime, timedelta
+from datetime import timedelta
 import os
 from pathlib import Path
 from pharma_dashboard.data.processing import download_and_process_data
 from ..data.sql_interface import PharmaDB
+from pharma_dashboard.date_index import day_stop, filter_date_range, sort_by_date
+from pharma_dashboard.kpi import compute_kpis
 import numpy as np
 
 # Initialize database connection
@@ -29,6 +31,9 @@ def validate_and_clean_data(df, table_name):
         # Convert date to datetime if it's not already
         if not pd.api.types.is_datetime64_any_dtype(df['date']):
             df['date'] = pd.to_datetime(df['date'])
+        
+        # Sort once so date range filters can binary-search
+        df = sort_by_date(df)
             
     elif table_name == 'products':
         # For products, we'll fill missing categories with 'Uncategorized'
@@ -66,10 +71,7 @@ def apply_filters(sales_df, products_df, start_date, end_date, selected_regions,
         return None, None
     
     # Date range filter
-    filtered_sales = sales_df[
-        (sales_df['date'].dt.date >= start_date) &
-        (sales_df['date'].dt.date <= end_date)
-    ]
+    filtered_sales = filter_date_range(sales_df, start_date, day_stop(end_date))
     
     # Region filter
     if selected_regions:
@@ -85,34 +87,11 @@ def apply_filters(sales_df, products_df, start_date, end_date, selected_regions,
     return filtered_sales, filtered_products
 
 def calculate_metrics(filtered_sales):
-    """Calculate key metrics from filtered data"""
-    if filtered_sales is None or filtered_sales.empty:
-        return {
-            'total_sales': 0,
-            'total_units': 0,
-            'avg_order_value': 0,
-            'total_orders': 0,
-            'yoy_growth': 0
-        }
-    
-    total_sales = filtered_sales['sales_amount'].sum()
-    total_units = filtered_sales['units_sold'].sum()
-    total_orders = len(filtered_sales)
-    avg_order_value = total_sales / total_orders if total_orders > 0 else 0
-    
-    # Calculate YoY growth
-    current_year = datetime.now().year
-    current_year_sales = filtered_sales[filtered_sales['date'].dt.year == current_year]['sales_amount'].sum()
-    prev_year_sales = filtered_sales[filtered_sales['date'].dt.year == current_year - 1]['sales_amount'].sum()
-    yoy_growth = ((current_year_sales - prev_year_sales) / prev_year_sales * 100) if prev_year_sales > 0 else 0
-    
-    return {
-        'total_sales': total_sales,
-        'total_units': total_units,
-        'avg_order_value': avg_order_value,
-        'total_orders': total_orders,
-        'yoy_growth': yoy_growth
-    }
+    """Calculate key metrics from filtered data in one pass"""
+    kpis = compute_kpis(filtered_sales)
+    return {key: kpis[key] for key in (
+        'total_sales', 'total_units', 'avg_order_value', 'total_orders', 'yoy_growth'
+    )}
 
 def create_sales_metrics(sales_df):
     """Create sales metrics visualization"""
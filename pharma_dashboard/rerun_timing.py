@@ -0,0 +1,49 @@
+"""
+Wall-clock timings of dashboard sections across Streamlit reruns.
+
+A SectionTimings instance lives in st.session_state, so each browser session
+keeps the durations of its recent full reruns and fragment reruns. Comparing
+the last duration of a section with its median shows what a rerun cost and
+whether the section was served from its cache.
+"""
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import pandas as pd
+
+DEFAULT_HISTORY = 20
+
+class SectionTimings:
+    """The most recent durations, in seconds, of named sections"""
+
+    def __init__(self, history=DEFAULT_HISTORY):
+        self.history = history
+        self.durations = {}
+
+    @contextmanager
+    def section(self, name):
+        """Time the body of a with block as one run of the section"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name, seconds):
+        self.durations.setdefault(name, deque(maxlen=self.history)).append(seconds)
+
+    def last(self, name):
+        """Duration of the latest run of a section, None before its first run"""
+        runs = self.durations.get(name)
+        return runs[-1] if runs else None
+
+    def summary(self):
+        """Runs, last and median duration (ms) per section, in first-run order"""
+        return pd.DataFrame(
+            [
+                (name, len(runs), runs[-1] * 1000, pd.Series(runs).median() * 1000)
+                for name, runs in self.durations.items()
+            ],
+            columns=['section', 'runs', 'last_ms', 'median_ms']
+        )
@@ -0,0 +1,175 @@
+"""
+Process-wide LRU cache for filtered results.
+
+Entries are keyed on the dataset version plus a canonical form of the filter
+state (sorted multiselects, ISO dates, amount bounds snapped to cents), so
+equivalent requests from any Streamlit session or Flask client share one
+entry. The cache is bounded both by entry count and by an estimated memory
+budget, and keeps hit/miss/eviction counters.
+"""
+import hashlib
+import logging
+import math
+import sys
+import threading
+import weakref
+from collections import OrderedDict
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_MAX_BYTES = 256 << 20
+
+def _estimate_size(value):
+    """Rough in-memory size of a cached value in bytes"""
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True))
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_estimate_size(k) + _estimate_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(_estimate_size(item) for item in value)
+    return sys.getsizeof(value)
+
+class ResultCache:
+    """Thread-safe LRU cache bounded by entry count and estimated bytes"""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        """Return the cached value for key and mark it most recently used"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        """Store value under key, evicting least recently used entries to stay in budget"""
+        size = _estimate_size(value)
+        if size > self.max_bytes:
+            logger.info(f"Not caching a {size} byte result, larger than the {self.max_bytes} byte budget")
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute):
+        """Return the cached value for key, computing and storing it on a miss"""
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes
+            }
+
+_result_cache = None
+_result_cache_lock = threading.Lock()
+
+def get_result_cache():
+    """The cache shared by every session and request in this process"""
+    global _result_cache
+    with _result_cache_lock:
+        if _result_cache is None:
+            _result_cache = ResultCache()
+        return _result_cache
+
+def _canonical(value, bound=None):
+    if value is None:
+        return None
+    if isinstance(value, (list, tuple, set, frozenset, pd.Index, np.ndarray)):
+        return tuple(sorted({str(item) for item in value}))
+    if isinstance(value, (datetime, date, pd.Timestamp, np.datetime64)):
+        return pd.Timestamp(value).date().isoformat()
+    if isinstance(value, (float, np.floating)):
+        # Snap amount bounds outward to whole cents
+        cents = float(value) * 100
+        cents = math.floor(cents) if bound == 'low' else math.ceil(cents) if bound == 'high' else round(cents)
+        return cents / 100
+    return value
+
+def canonical_filters(min_amount=None, max_amount=None, **filters):
+    """Normalize filter values so equivalent filter states compare equal.
+
+    Returns a dict whose values are safe to filter with and a hashable key;
+    min_amount/max_amount are widened to whole cents, so filtering with the
+    returned values gives the same rows for every state sharing the key.
+    """
+    normalized = {name: _canonical(value) for name, value in filters.items()}
+    normalized['min_amount'] = _canonical(min_amount, 'low')
+    normalized['max_amount'] = _canonical(max_amount, 'high')
+    return normalized, tuple(sorted(normalized.items()))
+
+# Fingerprints by frame identity; attrs would carry them over to derived frames
+_versions = {}
+_versions_lock = threading.Lock()
+
+def remember_dataset_version(df, version):
+    """Record the fingerprint of df, e.g. for a cache's copy of an already fingerprinted frame"""
+    key = id(df)
+
+    def forget(_):
+        with _versions_lock:
+            _versions.pop(key, None)
+
+    with _versions_lock:
+        _versions[key] = (weakref.ref(df, forget), version)
+
+def dataset_version(df):
+    """Content fingerprint of a loaded frame, memoized for that frame object.
+
+    Derived frames are fingerprinted afresh. Edits made in place after the
+    first call are not seen, so fingerprint frames once they are loaded.
+    """
+    with _versions_lock:
+        entry = _versions.get(id(df))
+    if entry is not None and entry[0]() is df:
+        return entry[1]
+    digest = hashlib.sha1(str(len(df)).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    version = digest.hexdigest()[:16]
+    remember_dataset_version(df, version)
+    return version
@@ -0,0 +1,88 @@
+"""
+Declared dtypes and date formats for the sales, products and customers tables.
+
+Low-cardinality strings are stored as categoricals, integer counts and ids
+are downcast to 32 bits and money stays float64 so sums keep their cents.
+"""
+import pandas as pd
+
+SALES_DTYPES = {
+    'Product': 'category',
+    'Customer': 'category',
+    'Quantity': 'int32',
+    'Unit Price': 'float64',
+    # pharma-sales-dashboard extracts name the price column Unit_Price
+    'Unit_Price': 'float64',
+    'Total': 'float64'
+}
+
+PRODUCTS_DTYPES = {
+    'Category': 'category',
+    'product_id': 'int32'
+}
+
+CUSTOMERS_DTYPES = {
+    'Region': 'category',
+    'Customer Type': 'category',
+    'customer_id': 'int32'
+}
+
+PROCESSED_SALES_DTYPES = {
+    'product_name': 'category',
+    'customer_id': 'category',
+    'units_sold': 'int32',
+    'Unit Price': 'float64',
+    'sales_amount': 'float64',
+    'product_id': 'Int32',
+    'region': 'category',
+    'category': 'category',
+    'customer_type': 'category'
+}
+
+TABLE_DTYPES = {
+    'sales': SALES_DTYPES,
+    'products': PRODUCTS_DTYPES,
+    'customers': CUSTOMERS_DTYPES,
+    'processed_sales': PROCESSED_SALES_DTYPES
+}
+
+# Dates in the source CSVs are ISO 8601, either YYYY-MM-DD or with a time part
+# (workbook cells with a time are written as YYYY-MM-DD HH:MM:SS)
+DATE_FORMATS = {
+    'sales': {'Date': 'ISO8601'},
+    'processed_sales': {'date': 'ISO8601'}
+}
+
+def parse_dates(df, table):
+    """Parse the table's date columns with their declared format and truncate them to the day.
+
+    Bad values become NaT.
+    """
+    for column, date_format in DATE_FORMATS.get(table, {}).items():
+        if column in df.columns and not pd.api.types.is_datetime64_any_dtype(df[column]):
+            df[column] = pd.to_datetime(df[column], format=date_format, errors='coerce').dt.normalize()
+    return df
+
+def _read_chunks(path, table, **kwargs):
+    with pd.read_csv(path, dtype=TABLE_DTYPES[table], **kwargs) as reader:
+        for chunk in reader:
+            yield parse_dates(chunk, table)
+
+def read_table(path, table, **kwargs):
+    """Read a CSV with the declared dtypes and date formats for the given table.
+
+    With chunksize the result is a generator of typed chunks.
+    """
+    if kwargs.get('chunksize'):
+        return _read_chunks(path, table, **kwargs)
+    return parse_dates(pd.read_csv(path, dtype=TABLE_DTYPES[table], **kwargs), table)
+
+def apply_schema(df, table):
+    """Cast the columns present in df to the declared dtypes for the given table"""
+    dtypes = {
+        column: dtype for column, dtype in TABLE_DTYPES[table].items()
+        if column in df.columns and str(df[column].dtype) != dtype
+    }
+    if dtypes:
+        df = df.astype(dtypes)
+    return parse_dates(df, table)
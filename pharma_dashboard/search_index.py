@@ -0,0 +1,78 @@
+"""
+Trigram inverted index for case-insensitive substring search on name columns.
+
+Each distinct name is split into lowercase trigrams; a search term's trigrams
+are intersected to find candidate names, which are then verified with a
+literal substring test. Matching names map to row positions through per-name
+posting lists, so a search costs time proportional to the distinct names and
+rows it matches rather than the size of the table.
+"""
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+GRAM_SIZE = 3
+SEARCH_COLUMNS = ('product_name', 'customer_id')
+
+def _grams(text, n=GRAM_SIZE):
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+class NgramIndex:
+    """Trigram index over the distinct values of one column, with row posting lists"""
+
+    def __init__(self, values):
+        codes, names = pd.factorize(values)
+        self.names = [str(name).lower() for name in names]
+
+        grams = defaultdict(list)
+        for name_id, name in enumerate(self.names):
+            for gram in _grams(name):
+                grams[gram].append(name_id)
+        self.grams = {gram: np.array(ids) for gram, ids in grams.items()}
+
+        # Rows of name i are postings[offsets[i]:offsets[i + 1]], in row order
+        order = np.argsort(codes, kind='stable')
+        missing = int((codes < 0).sum())
+        self.postings = order[missing:]
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(codes[codes >= 0], minlength=len(names)))])
+
+    def match_names(self, term):
+        """Ids of the distinct names containing term (case-insensitive, literal)"""
+        term = term.lower()
+        term_grams = _grams(term)
+        if not term_grams:
+            # Too short for a trigram: check the distinct names directly
+            candidates = range(len(self.names))
+        else:
+            posting_lists = sorted((self.grams.get(gram) for gram in term_grams),
+                                   key=lambda ids: -1 if ids is None else len(ids))
+            if posting_lists[0] is None:
+                return np.array([], dtype=np.int64)
+            candidates = posting_lists[0]
+            for ids in posting_lists[1:]:
+                candidates = np.intersect1d(candidates, ids, assume_unique=True)
+        return np.array([i for i in candidates if term in self.names[i]], dtype=np.int64)
+
+    def rows(self, term):
+        """Sorted row positions whose value contains term"""
+        name_ids = self.match_names(term)
+        if not len(name_ids):
+            return np.array([], dtype=np.int64)
+        rows = np.concatenate([self.postings[self.offsets[i]:self.offsets[i + 1]] for i in name_ids])
+        rows.sort()
+        return rows
+
+class SearchIndex:
+    """Substring search across several name columns of one sales frame"""
+
+    def __init__(self, df, columns=SEARCH_COLUMNS):
+        self.n_rows = len(df)
+        self.indexes = {column: NgramIndex(df[column]) for column in columns if column in df.columns}
+
+    def rows(self, term):
+        """Sorted row positions where any indexed column contains term"""
+        matches = [index.rows(term) for index in self.indexes.values()]
+        if not matches:
+            return np.array([], dtype=np.int64)
+        return np.unique(np.concatenate(matches))
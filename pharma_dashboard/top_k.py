@@ -0,0 +1,169 @@
+"""
+Top-K heavy hitters by sales for products, regions and customers.
+
+TopKTracker keeps a bounded summary per day bucket and dimension: at most
+capacity (value, sales) entries plus a floor, an upper bound on the sales of
+any value the summary dropped. Like Space-Saving, summaries merge across
+buckets with an error bound, so "top N for this date range" is a bincount
+over the buckets' entries rather than a regroup of the raw rows. The tracker
+is fed batches of processed rows as they are ingested.
+
+top_k_exact is the exact fallback for filters the tracker cannot answer.
+"""
+import numpy as np
+import pandas as pd
+
+from pharma_dashboard.grouping import group_codes
+
+TRACKED_DIMENSIONS = ('product_name', 'region', 'customer_id')
+DEFAULT_CAPACITY = 64
+
+def top_k_exact(column, weights=None, k=5):
+    """The k values with the largest weight totals, as (label, total) pairs in descending order.
+
+    Totals come from np.bincount over categorical codes and only the top k
+    are selected and sorted, via np.argpartition. Values absent from the
+    rows never appear, as with groupby(observed=True).
+    """
+    codes, labels = group_codes(column)
+    present = codes >= 0
+    codes = codes[present]
+    if weights is None:
+        weights = np.ones(len(present))
+    totals = np.bincount(codes, weights=np.asarray(weights, dtype='float64')[present], minlength=len(labels))
+    observed = np.flatnonzero(np.bincount(codes, minlength=len(labels)) > 0)
+    totals = totals[observed]
+    if len(observed) > k:
+        keep = np.argpartition(-totals, k - 1)[:k]
+    else:
+        keep = np.arange(len(observed))
+    keep = keep[np.argsort(-totals[keep], kind='stable')]
+    return [(labels[i], float(total)) for i, total in zip(observed[keep], totals[keep])]
+
+def _rank_in_bucket(buckets, counts):
+    """Order entries by bucket, then by descending count, and number them within each bucket"""
+    order = np.lexsort((-counts, buckets))
+    sorted_buckets = buckets[order]
+    firsts = np.flatnonzero(np.r_[True, sorted_buckets[1:] != sorted_buckets[:-1]])
+    starts = np.repeat(firsts, np.diff(np.r_[firsts, len(order)]))
+    return order, np.arange(len(order)) - starts
+
+class TopKTracker:
+    """Mergeable per-day top-K summaries of sales for several dimensions.
+
+    For each dimension the entries of every bucket are stored as parallel
+    arrays (bucket, code, count, error, floor) sorted by bucket. A bucket
+    keeps its capacity largest values; its floor bounds the sales of every
+    value it dropped. A value's true sales in a range lie in
+    [count, count + error], where error includes the floor of every
+    bucket in the range that does not list it.
+    """
+
+    def __init__(self, dimensions=TRACKED_DIMENSIONS, capacity=DEFAULT_CAPACITY, value='sales_amount'):
+        self.dimensions = tuple(dimensions)
+        self.capacity = capacity
+        self.value = value
+        self.labels = {d: pd.Index([]) for d in self.dimensions}
+        self.entries = {d: _empty_entries() for d in self.dimensions}
+
+    def _codes(self, dimension, column):
+        """Codes of the column's values in this tracker's growing label index"""
+        codes, labels = group_codes(column)
+        known = self.labels[dimension]
+        new_labels = pd.Index(labels).difference(known, sort=False)
+        if len(new_labels):
+            known = self.labels[dimension] = known.append(new_labels)
+        mapping = known.get_indexer(labels)
+        return np.where(codes >= 0, mapping[codes], -1)
+
+    def update(self, df):
+        """Fold a batch of processed rows into the day buckets"""
+        days = df['date'].to_numpy().astype('datetime64[D]')
+        dated = ~np.isnat(days)
+        days = days.astype(np.int64)
+        amounts = df[self.value].to_numpy(dtype='float64')
+        for dimension in self.dimensions:
+            codes = self._codes(dimension, df[dimension])
+            valid = dated & (codes >= 0)
+            self._merge(dimension, days[valid], codes[valid], amounts[valid])
+        return self
+
+    def _merge(self, dimension, buckets, codes, amounts):
+        """Merge rows into the stored summaries of the days they touch and re-truncate those days"""
+        stored = self.entries[dimension]
+        n_labels = len(self.labels[dimension])
+        touched = np.isin(stored['bucket'], buckets)
+        old = {key: values[touched] for key, values in stored.items()}
+        n_old = len(old['code'])
+
+        # Keys sort by day, then value
+        keys, inverse = np.unique(
+            np.concatenate([old['bucket'] * n_labels + old['code'], buckets * n_labels + codes]),
+            return_inverse=True
+        )
+        merged_buckets, merged_codes = np.divmod(keys, n_labels)
+        counts = np.bincount(inverse, weights=np.concatenate([old['count'], amounts]), minlength=len(keys))
+        errors = np.zeros(len(keys))
+        errors[inverse[:n_old]] = old['error']
+        day_of = np.cumsum(np.r_[True, merged_buckets[1:] != merged_buckets[:-1]]) - 1 if len(keys) else np.zeros(0, dtype=np.int64)
+
+        # Values a truncated day had dropped may hide up to its floor there
+        floors = np.zeros(day_of[-1] + 1 if len(keys) else 0)
+        np.maximum.at(floors, day_of[inverse[:n_old]], old['floor'])
+        listed = np.zeros(len(keys), dtype=bool)
+        listed[inverse[:n_old]] = True
+        errors[~listed] += floors[day_of[~listed]]
+
+        # Keep the capacity largest values per day; the largest dropped upper bound raises the floor
+        order, rank = _rank_in_bucket(merged_buckets, counts)
+        kept, dropped = order[rank < self.capacity], order[rank >= self.capacity]
+        np.maximum.at(floors, day_of[dropped], counts[dropped] + errors[dropped])
+
+        entries = {
+            'bucket': np.concatenate([stored['bucket'][~touched], merged_buckets[kept]]),
+            'code': np.concatenate([stored['code'][~touched], merged_codes[kept]]),
+            'count': np.concatenate([stored['count'][~touched], counts[kept]]),
+            'error': np.concatenate([stored['error'][~touched], errors[kept]]),
+            'floor': np.concatenate([stored['floor'][~touched], floors[day_of[kept]]])
+        }
+        order = np.argsort(entries['bucket'], kind='stable')
+        self.entries[dimension] = {key: values[order] for key, values in entries.items()}
+
+    def top(self, dimension, k=5, start=None, stop=None):
+        """Top k values by sales for days in [start, stop), merged from the day buckets.
+
+        Returns a DataFrame with the dimension, sales_amount (a lower bound)
+        and error columns, in descending order of sales.
+        """
+        entries = self.entries[dimension]
+        lo = 0 if start is None else np.searchsorted(entries['bucket'], _day_number(start))
+        hi = len(entries['bucket']) if stop is None else np.searchsorted(entries['bucket'], _day_number(stop))
+        buckets, codes = entries['bucket'][lo:hi], entries['code'][lo:hi]
+        n_labels = len(self.labels[dimension])
+        counts = np.bincount(codes, weights=entries['count'][lo:hi], minlength=n_labels).astype('float64')
+        errors = np.bincount(codes, weights=entries['error'][lo:hi], minlength=n_labels).astype('float64')
+
+        # Each value gains the floors of the truncated days in range that do not list it
+        floors = entries['floor'][lo:hi]
+        firsts = np.r_[True, buckets[1:] != buckets[:-1]] if len(buckets) else np.zeros(0, dtype=bool)
+        errors += floors[firsts].sum() - np.bincount(codes, weights=floors, minlength=n_labels)
+
+        observed = np.flatnonzero(np.bincount(codes, minlength=n_labels) > 0)
+        ranked = observed[np.argsort(-counts[observed], kind='stable')][:k]
+        return pd.DataFrame({
+            dimension: self.labels[dimension][ranked],
+            self.value: counts[ranked],
+            'error': np.maximum(errors[ranked], 0.0)
+        })
+
+def _empty_entries():
+    return {
+        'bucket': np.zeros(0, dtype=np.int64),
+        'code': np.zeros(0, dtype=np.int64),
+        'count': np.zeros(0),
+        'error': np.zeros(0),
+        'floor': np.zeros(0)
+    }
+
+def _day_number(value):
+    return int(np.datetime64(pd.Timestamp(value), 'D').astype(np.int64))
@@ -0,0 +1,91 @@
+"""
+Single-pass rule engine for cleaning the sales, products and customers tables.
+
+Each rule maps the frame to a boolean "row passes" mask computed on whole
+columns. run_rules evaluates every rule against the original frame, ANDs the
+masks and filters once, and reports how many rows each rule rejected along
+with a few sample row ids, so data-quality metrics come for free.
+"""
+from collections import namedtuple
+from datetime import datetime
+import numpy as np
+
+Rule = namedtuple('Rule', ['name', 'check'])
+
+def not_null(columns):
+    """Rows must have a value in every one of the columns"""
+    columns = list(columns)
+    return Rule(f"not_null({', '.join(columns)})", lambda df: df[columns].notna().all(axis=1).to_numpy())
+
+def positive(column):
+    """Rows must have column > 0"""
+    return Rule(f'positive({column})', lambda df: (df[column] > 0).to_numpy())
+
+def not_in_future(column, now=None):
+    """Rows must not be dated after now (evaluated when the rule runs)"""
+    return Rule(
+        f'not_in_future({column})',
+        lambda df: (df[column] <= (now or datetime.now())).to_numpy()
+    )
+
+def totals_match(total, quantity, unit_price, rtol=1e-05):
+    """Rows must have total close to quantity * unit price"""
+    return Rule(
+        f'totals_match({total})',
+        lambda df: np.isclose(
+            df[total].to_numpy(dtype='float64'),
+            df[quantity].to_numpy(dtype='float64') * df[unit_price].to_numpy(dtype='float64'),
+            rtol=rtol
+        )
+    )
+
+def allowed_values(column, values):
+    """Rows must have column in values"""
+    return Rule(f'allowed_values({column})', lambda df: df[column].isin(values).to_numpy())
+
+def unique(subset):
+    """Rows must not repeat an earlier row's subset key; the first occurrence passes"""
+    subset = list(subset)
+    return Rule(
+        f"unique({', '.join(subset)})",
+        lambda df: ~df.duplicated(subset=subset, keep='first').to_numpy()
+    )
+
+def run_rules(df, rules, id_column=None, sample_size=5):
+    """Evaluate all rules in one pass and filter the frame once.
+
+    Every rule sees the unfiltered frame, so a row failing several rules is
+    counted against each of them. Returns the cleaned frame and a report
+    dict with total, valid and rejected row counts and, per rule, the number
+    of failing rows plus up to sample_size ids (id_column values, or index
+    labels when id_column is None).
+    """
+    ids = df.index if id_column is None else df[id_column]
+    valid = np.ones(len(df), dtype=bool)
+    rule_reports = {}
+    for rule in rules:
+        passed = np.asarray(rule.check(df), dtype=bool)
+        failed = np.flatnonzero(~passed)
+        rule_reports[rule.name] = {
+            'failed': int(len(failed)),
+            'sample_ids': ids.take(failed[:sample_size]).tolist()
+        }
+        valid &= passed
+
+    valid_rows = int(valid.sum())
+    report = {
+        'total_rows': len(df),
+        'valid_rows': valid_rows,
+        'rejected_rows': len(df) - valid_rows,
+        'rules': rule_reports
+    }
+    if valid_rows == len(df):
+        return df, report
+    return df[valid], report
+
+def format_report(report):
+    """One-line summary of the rules that rejected rows"""
+    failures = ', '.join(
+        f"{name}: {result['failed']}" for name, result in report['rules'].items() if result['failed']
+    )
+    return f"Rejected {report['rejected_rows']} of {report['total_rows']} rows ({failures or 'none'})"
@@ -0,0 +1,26 @@
+import pytest
+import numpy as np
+import pandas as pd
+from pharma_dashboard.date_index import sort_by_date
+
+def _random_sales(n, seed, start='2022-01-01', days=365, units=False, amount=True, sort=False, **columns):
+    """A random sales frame with n rows dated over days days from start.
+
+    Each extra keyword is a column: a list of values drawn uniformly into a
+    categorical, or a callable(rng, n) returning the column.
+    """
+    rng = np.random.default_rng(seed)
+    data = {'date': pd.Timestamp(start) + pd.to_timedelta(rng.integers(0, days, n), unit='D')}
+    for name, values in columns.items():
+        data[name] = values(rng, n) if callable(values) else pd.Categorical(rng.choice(values, n))
+    if units:
+        data['units_sold'] = rng.integers(1, 20, n).astype('int32')
+    if amount:
+        data['sales_amount'] = rng.random(n) * 100
+    df = pd.DataFrame(data)
+    return sort_by_date(df) if sort else df
+
+@pytest.fixture
+def make_sales():
+    """Factory for synthetic sales frames, shared by the columnar engine tests"""
+    return _random_sales
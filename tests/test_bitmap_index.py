@@ -0,0 +1,46 @@
+import pytest
+import numpy as np
+import pandas as pd
+from pharma_dashboard.bitmap_index import BitmapIndex, select_rows
+
+@pytest.fixture
+def sales(make_sales):
+    return make_sales(
+        1000, 0, start='2023-01-01', days=90, sort=True,
+        region=['East', 'West', 'North', 'South'], category=['Cardio', 'Pain Relief', 'Antibiotics'],
+        product_name=[f'Product_{i}' for i in range(40)]
+    )
+
+def test_positions_match_isin(sales):
+    index = BitmapIndex(sales)
+    filters = {'region': ['East', 'South'], 'category': ['Cardio'], 'product_name': None}
+    expected = np.flatnonzero(
+        sales['region'].isin(['East', 'South']) & sales['category'].isin(['Cardio'])
+    )
+    np.testing.assert_array_equal(index.positions(filters), expected)
+
+def test_positions_within_row_range(sales):
+    index = BitmapIndex(sales)
+    filters = {'product_name': ['Product_3', 'Product_7']}
+    lo, hi = 77, 901
+    expected = np.flatnonzero(sales['product_name'].isin(['Product_3', 'Product_7']).to_numpy()[lo:hi]) + lo
+    np.testing.assert_array_equal(index.positions(filters, lo, hi), expected)
+
+def test_empty_all_and_unknown_selections(sales):
+    index = BitmapIndex(sales)
+    assert index.mask({'region': []}) is None
+    assert index.mask({'region': index.values('region')}) is None
+    assert len(index.positions({'region': ['Atlantis']})) == 0
+
+def test_select_rows_combines_date_slice(sales):
+    index = BitmapIndex(sales)
+    start, stop = pd.Timestamp('2023-02-01'), pd.Timestamp('2023-03-01')
+    result = select_rows(sales, index, {'region': ['West']}, start, stop)
+    expected = sales[
+        (sales['date'] >= start) & (sales['date'] < stop) & (sales['region'] == 'West')
+    ]
+    pd.testing.assert_frame_equal(result, expected)
+
+def test_select_rows_rejects_other_frames(sales):
+    with pytest.raises(ValueError):
+        select_rows(sales.iloc[:10], BitmapIndex(sales), {})
@@ -0,0 +1,48 @@
+import pytest
+import numpy as np
+import pandas as pd
+from pharma_dashboard.churn import ChurnTracker, monthly_churn
+
+@pytest.fixture
+def sales(make_sales):
+    return make_sales(
+        5000, 2, days=700, amount=False,
+        customer_id=lambda rng, n: pd.Categorical([f'C{i}' for i in rng.integers(0, 300, n)])
+    )
+
+def churn_like_sql(df, gap_months=3):
+    """The SQL query's LEAD over every transaction, in pandas"""
+    rows = df.sort_values(['customer_id', 'date'], kind='stable').copy()
+    rows['month'] = rows['date'].dt.to_period('M')
+    rows['next_purchase'] = rows.groupby('customer_id', observed=True)['month'].shift(-1)
+    gap = (rows['next_purchase'].dt.year - rows['month'].dt.year) * 12 + rows['next_purchase'].dt.month - rows['month'].dt.month
+    rows['churned_id'] = rows['customer_id'].where(rows['next_purchase'].isna() | (gap > gap_months))
+    result = rows.groupby('month').agg(
+        total_customers=('customer_id', 'nunique'),
+        churned_customers=('churned_id', 'nunique')
+    ).reset_index()
+    result['churn_rate'] = (result['churned_customers'] / result['total_customers'] * 100).round(2)
+    result['month'] = result['month'].dt.to_timestamp()
+    return result
+
+def test_monthly_churn_matches_sql_definition(sales):
+    expected = churn_like_sql(sales)
+    pd.testing.assert_frame_equal(monthly_churn(sales), expected, check_dtype=False)
+
+def test_gap_of_exactly_three_months_is_retained():
+    df = pd.DataFrame({
+        'date': pd.to_datetime(['2023-01-15', '2023-04-02', '2023-09-01']),
+        'customer_id': pd.Categorical(['A', 'A', 'A'])
+    })
+    churn = monthly_churn(df)
+    assert list(churn['churned_customers']) == [0, 1, 1]
+
+def test_incremental_updates_match_full_computation(sales):
+    tracker = ChurnTracker()
+    for batch in np.array_split(np.arange(len(sales)), 4):
+        tracker.update(sales.iloc[batch])
+    # New customers arrive only in the later batch
+    extra = pd.DataFrame({'date': pd.to_datetime(['2023-06-01']), 'customer_id': pd.Categorical(['New'])})
+    tracker.update(extra)
+    pd.testing.assert_frame_equal(tracker.monthly(), monthly_churn(pd.concat([sales, extra])))
+    assert ChurnTracker().monthly().empty
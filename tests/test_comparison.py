@@ -0,0 +1,50 @@
+import pytest
+import numpy as np
+import pandas as pd
+from pharma_dashboard.comparison import TOTAL, PeriodComparison
+
+@pytest.fixture
+def sales(make_sales):
+    df = make_sales(4000, 4, start='2021-03-10', days=900, region=['East', 'West'])
+    # No sales at all in June 2022, so positional shifts would misalign
+    return df[df['date'].dt.to_period('M') != pd.Period('2022-06', 'M')]
+
+def month_sums(df, month):
+    rows = df[df['date'].dt.to_period('M') == pd.Period(month, 'M')]
+    return rows.groupby('region', observed=True)['sales_amount'].sum()
+
+def test_yoy_by_month_is_aligned_on_the_calendar(sales):
+    yoy = PeriodComparison(sales, 'region').compare('month', 12)
+    # July 2023 compares with July 2022, although June 2022 is missing
+    current, prior = month_sums(sales, '2023-07'), month_sums(sales, '2022-07')
+    row = pd.Timestamp('2023-07-01')
+    assert yoy['current'].loc[row].to_numpy() == pytest.approx(current.to_numpy())
+    assert yoy['prior'].loc[row].to_numpy() == pytest.approx(prior.to_numpy())
+    assert yoy['growth'].loc[row].to_numpy() == pytest.approx(((current - prior) / prior * 100).to_numpy())
+    # A month without sales inside the data is zero, and has no growth base a year later
+    assert (yoy['current'].loc[pd.Timestamp('2022-06-01')] == 0).all()
+    assert yoy['growth'].loc[pd.Timestamp('2023-06-01')].isna().all()
+    # Periods before the data have no prior; months after it are not listed
+    assert yoy['prior'].loc[pd.Timestamp('2022-02-01')].isna().all()
+    assert yoy['current'].index[0] == pd.Timestamp('2021-03-01')
+    assert yoy['current'].index[-1] == sales['date'].max().to_period('M').to_timestamp()
+
+def test_quarter_and_year_grains(sales):
+    comparison = PeriodComparison(sales)
+    quarters = comparison.compare('quarter')
+    q3 = sales[(sales['date'] >= '2022-07-01') & (sales['date'] < '2022-10-01')]['sales_amount'].sum()
+    q2 = sales[(sales['date'] >= '2022-04-01') & (sales['date'] < '2022-07-01')]['sales_amount'].sum()
+    assert quarters['current'].loc[pd.Timestamp('2022-07-01'), TOTAL] == pytest.approx(q3)
+    assert quarters['delta'].loc[pd.Timestamp('2022-07-01'), TOTAL] == pytest.approx(q3 - q2)
+    years = comparison.totals('year')[TOTAL]
+    assert years.to_numpy() == pytest.approx(sales.groupby(sales['date'].dt.year)['sales_amount'].sum().to_numpy())
+
+def test_ytd_compares_the_same_months(sales):
+    ytd = PeriodComparison(sales).ytd('2023-05-20').loc[TOTAL]
+    current = sales[(sales['date'] >= '2023-01-01') & (sales['date'] < '2023-06-01')]['sales_amount'].sum()
+    prior = sales[(sales['date'] >= '2022-01-01') & (sales['date'] < '2022-06-01')]['sales_amount'].sum()
+    assert ytd['current'] == pytest.approx(current)
+    assert ytd['prior'] == pytest.approx(prior)
+    assert ytd['growth'] == pytest.approx((current - prior) / prior * 100)
+    # No sales in the prior period means no growth figure
+    assert np.isnan(PeriodComparison(sales).ytd('2021-06-01').loc[TOTAL, 'growth'])
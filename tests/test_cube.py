@@ -0,0 +1,40 @@
+import pytest
+import numpy as np
+import pandas as pd
+from pharma_dashboard.cube import SalesCube, order_count
+
+@pytest.fixture
+def sales(make_sales):
+    products = [f'Product_{i}' for i in range(12)]
+    df = make_sales(3000, 3, start='2023-01-01', days=60, units=True, sort=True,
+                    region=['East', 'West', 'North'], product_name=products)
+    df['category'] = pd.Categorical(np.where(df['product_name'].isin(products[:6]), 'Cardio', 'Pain Relief'))
+    return df
+
+def test_query_matches_raw_aggregates(sales):
+    cube = SalesCube(sales)
+    start, stop = pd.Timestamp('2023-01-10'), pd.Timestamp('2023-02-10')
+    cells = cube.query(start, stop, region=['East', 'West'], category=['Cardio'])
+    rows = sales[
+        (sales['date'] >= start) & (sales['date'] < stop) &
+        sales['region'].isin(['East', 'West']) & (sales['category'] == 'Cardio')
+    ]
+    assert order_count(cells) == order_count(rows) == len(rows)
+    assert cells['units_sold'].sum() == rows['units_sold'].sum()
+    assert cells['sales_amount'].sum() == pytest.approx(rows['sales_amount'].sum())
+    by_product = cells.groupby('product_name', observed=True)['sales_amount'].sum()
+    expected = rows.groupby('product_name', observed=True)['sales_amount'].sum()
+    pd.testing.assert_series_equal(by_product, expected, check_exact=False)
+
+def test_cube_is_smaller_than_rows(sales):
+    assert len(SalesCube(sales).cells) < len(sales)
+
+def test_can_answer_only_dimension_filters(sales):
+    cube = SalesCube(sales)
+    low, high = sales['sales_amount'].min(), sales['sales_amount'].max()
+    assert cube.can_answer(region=['East'])
+    assert cube.can_answer(min_amount=np.floor(low), max_amount=np.ceil(high))
+    assert not cube.can_answer(min_amount=low + 1)
+    assert not cube.can_answer(max_amount=high - 1)
+    assert not cube.can_answer(search='prod')
+    assert not cube.can_answer(customer_type=['Hospital'])
@@ -0,0 +1,63 @@
+import io
+import pytest
+import pandas as pd
+from datetime import datetime
+from openpyxl import Workbook
+from pharma_dashboard.data_processing import process_workbook
+
+HEADER = ['Invoice ID', 'Date', 'Customer', 'Product', 'Quantity', 'Unit Price', 'Total',
+          'Category', 'Region', 'Customer Type']
+ROWS = [
+    ['INV-1', datetime(2023, 1, 1), 'Customer_1', 'Aspirin', 10, 5.0, 50.0, 'Pain Relief', 'East', 'Hospital'],
+    ['INV-2', datetime(2023, 1, 2), 'Customer_2', 'Paracetamol', 20, 10.0, 200.0, 'Pain Relief', 'South', 'Clinic'],
+    ['INV-3', datetime(2023, 1, 3), 'Customer_1', 'Aspirin', 1, 5.0, 5.0, 'Pain Relief', 'East', 'Hospital'],
+]
+
+@pytest.fixture
+def workbook_path(tmp_path):
+    workbook = Workbook()
+    worksheet = workbook.active
+    worksheet.append(HEADER)
+    for row in ROWS:
+        worksheet.append(row)
+    path = tmp_path / 'Pharm.Data.xlsx'
+    workbook.save(path)
+    return path
+
+def expected_tables():
+    excel_data = pd.DataFrame(ROWS, columns=HEADER)
+    products_df = excel_data[['Product', 'Category']].drop_duplicates().reset_index(drop=True)
+    products_df['product_id'] = products_df.index + 1
+    customers_df = excel_data[['Customer', 'Region', 'Customer Type']].drop_duplicates().reset_index(drop=True)
+    customers_df['customer_id'] = customers_df.index + 1
+    return excel_data, products_df, customers_df
+
+def test_process_workbook_from_path(workbook_path, tmp_path):
+    summary = process_workbook(workbook_path, tmp_path / 'out')
+    assert summary['sales_rows'] == 3
+    
+    excel_data, products_df, customers_df = expected_tables()
+    sales_df = pd.read_csv(summary['sales_path'], parse_dates=['Date'])
+    assert sales_df['Invoice ID'].tolist() == excel_data['Invoice ID'].tolist()
+    assert (sales_df['Date'] == excel_data['Date']).all()
+    assert sales_df['Total'].tolist() == excel_data['Total'].tolist()
+    pd.testing.assert_frame_equal(pd.read_csv(summary['products_path']), products_df)
+    pd.testing.assert_frame_equal(pd.read_csv(summary['customers_path']), customers_df)
+
+def test_process_workbook_from_stream_to_parquet(workbook_path, tmp_path):
+    stream = io.BytesIO(workbook_path.read_bytes())
+    summary = process_workbook(stream, tmp_path / 'out', sales_format='parquet')
+    
+    sales_df = pd.read_parquet(summary['sales_path'])
+    assert sales_df['Quantity'].tolist() == [10, 20, 1]
+    assert sales_df['Date'].dt.strftime('%Y-%m-%d').tolist() == ['2023-01-01', '2023-01-02', '2023-01-03']
+    assert summary['products'] == 2
+    assert summary['customers'] == 2
+
+def test_process_workbook_missing_columns(tmp_path):
+    workbook = Workbook()
+    workbook.active.append(['Invoice ID', 'Date'])
+    path = tmp_path / 'bad.xlsx'
+    workbook.save(path)
+    with pytest.raises(ValueError):
+        process_workbook(path, tmp_path / 'out')
@@ -1,7 +1,12 @@
+import os
 import pytest
 import pandas as pd
 from datetime import datetime
-from pharma_dashboard.data_processor import preprocess_sales_data, validate_sales_data
+from pharma_dashboard.data_processor import (
+    preprocess_sales_data, validate_sales_data, load_and_preprocess_data,
+    stream_sales_to_parquet, coerce_sales_dates
+)
+from pharma_dashboard.incremental import read_sales_dataset, refresh_sales_dataset
 
 @pytest.fixture
 def sample_sales_data():
@@ -48,6 +53,11 @@ def test_preprocess_sales_data(sample_sales_data, sample_products_data, sample_c
     assert processed_data['region'].iloc[0] == 'East'
     assert processed_data['category'].iloc[0] == 'Pain Relief'
 
+def test_dates_with_a_time_part_are_kept(sample_sales_data):
+    sample_sales_data['Date'] = ['2023-01-01', '2023-01-02 10:30:00']
+    sales_df = coerce_sales_dates(sample_sales_data)
+    assert list(sales_df['Date']) == [pd.Timestamp('2023-01-01'), pd.Timestamp('2023-01-02')]
+
 def test_validate_sales_data(sample_sales_data, sample_products_data, sample_customers_data):
     processed_data = preprocess_sales_data(sample_sales_data, sample_products_data, sample_customers_data)
     assert validate_sales_data(processed_data) is True
@@ -58,4 +68,58 @@ def test_validate_sales_data_missing_columns():
         'product_name': ['Aspirin']
     })
     with pytest.raises(ValueError):
-        validate_sales_data(invalid_data) 
\ No newline at end of file
+        validate_sales_data(invalid_data)
+
+@pytest.fixture
+def data_dir(tmp_path, sample_sales_data, sample_products_data, sample_customers_data):
+    sample_sales_data.to_csv(tmp_path / 'sales.csv', index=False)
+    sample_products_data.to_csv(tmp_path / 'products.csv', index=False)
+    sample_customers_data.to_csv(tmp_path / 'customers.csv', index=False)
+    return tmp_path
+
+def test_load_and_preprocess_data_persists_processed_sales(data_dir):
+    sales_df, _, _ = load_and_preprocess_data(data_dir)
+    pd.testing.assert_frame_equal(read_sales_dataset(data_dir), sales_df)
+    
+    # Second load is served from the persisted dataset
+    assert refresh_sales_dataset(data_dir)['mode'] == 'unchanged'
+    cached_sales, _, _ = load_and_preprocess_data(data_dir)
+    pd.testing.assert_frame_equal(cached_sales, sales_df)
+    pd.testing.assert_frame_equal(sales_df, load_and_preprocess_data(data_dir, use_snapshot=False)[0])
+
+def test_persisted_sales_rebuilt_when_source_changes(data_dir, sample_sales_data):
+    load_and_preprocess_data(data_dir)
+    
+    changed = sample_sales_data.copy()
+    changed.loc[0, 'Total'] = 75.0
+    changed.to_csv(data_dir / 'sales.csv', index=False)
+    
+    sales_df, _, _ = load_and_preprocess_data(data_dir)
+    assert sales_df['sales_amount'].iloc[0] == 75.0
+
+def test_persisted_sales_survive_touch(data_dir):
+    load_and_preprocess_data(data_dir)
+    os.utime(data_dir / 'sales.csv', None)
+    os.utime(data_dir / 'products.csv', None)
+    assert refresh_sales_dataset(data_dir)['mode'] == 'unchanged'
+
+def test_chunked_load_matches_full_load(data_dir):
+    full_sales, _, _ = load_and_preprocess_data(data_dir, use_snapshot=False)
+    chunked_sales, _, _ = load_and_preprocess_data(data_dir, use_snapshot=False, chunksize=1)
+    pd.testing.assert_frame_equal(chunked_sales, full_sales)
+
+def test_stream_sales_to_parquet(data_dir, tmp_path):
+    output_path = tmp_path / 'processed.parquet'
+    rows = stream_sales_to_parquet(output_path, data_dir, chunksize=1)
+    assert rows == 2
+    
+    full_sales, _, _ = load_and_preprocess_data(data_dir, use_snapshot=False)
+    pd.testing.assert_frame_equal(pd.read_parquet(output_path), full_sales)
+
+def test_load_applies_compact_schema(data_dir):
+    sales_df, products_df, customers_df = load_and_preprocess_data(data_dir, use_snapshot=False)
+    for column in ['product_name', 'customer_id', 'region', 'category']:
+        assert isinstance(sales_df[column].dtype, pd.CategoricalDtype)
+    assert sales_df['units_sold'].dtype == 'int32'
+    assert isinstance(products_df['Category'].dtype, pd.CategoricalDtype)
+    assert isinstance(customers_df['Region'].dtype, pd.CategoricalDtype)
@@ -0,0 +1,53 @@
+import pytest
+import pandas as pd
+from datetime import date
+from pharma_dashboard.date_index import (
+    date_bounds, day_stop, filter_date_range, is_sorted_by_date, mark_sorted_by_date, sort_by_date
+)
+
+@pytest.fixture
+def unsorted_sales():
+    return pd.DataFrame({
+        'date': pd.to_datetime(['2023-01-03', '2023-01-01', '2023-01-02', '2023-01-01', '2023-01-05']),
+        'sales_amount': [3.0, 1.0, 2.0, 1.5, 5.0]
+    })
+
+def test_sort_by_date_is_stable(unsorted_sales):
+    sorted_df = sort_by_date(unsorted_sales)
+    assert is_sorted_by_date(sorted_df)
+    assert sorted_df['sales_amount'].tolist() == [1.0, 1.5, 2.0, 3.0, 5.0]
+    assert list(sorted_df.index) == list(range(5))
+
+def test_filter_matches_boolean_mask(unsorted_sales):
+    sorted_df = sort_by_date(unsorted_sales)
+    start, end = date(2023, 1, 2), date(2023, 1, 4)
+    expected = sorted_df[
+        (sorted_df['date'].dt.date >= start) & (sorted_df['date'].dt.date <= end)
+    ]
+    pd.testing.assert_frame_equal(filter_date_range(sorted_df, start, day_stop(end)), expected)
+    assert date_bounds(sorted_df, start, day_stop(end)) == (2, 4)
+
+def test_open_and_empty_ranges(unsorted_sales):
+    sorted_df = sort_by_date(unsorted_sales)
+    assert len(filter_date_range(sorted_df)) == 5
+    assert len(filter_date_range(sorted_df, stop=day_stop('2023-01-01'))) == 2
+    assert filter_date_range(sorted_df, '2023-02-01', day_stop('2023-01-01')).empty
+
+def test_unsorted_frame_falls_back_to_mask(unsorted_sales):
+    assert not is_sorted_by_date(unsorted_sales)
+    filtered = filter_date_range(unsorted_sales, '2023-01-01', day_stop('2023-01-02'))
+    assert filtered['sales_amount'].tolist() == [1.0, 2.0, 1.5]
+
+def test_reordered_and_reassigned_frames_are_rechecked(unsorted_sales):
+    sorted_df = sort_by_date(unsorted_sales)
+    assert not is_sorted_by_date(sorted_df.iloc[::-1])
+    sorted_df['date'] = unsorted_sales['date'].to_numpy()
+    assert not is_sorted_by_date(sorted_df)
+
+def test_recorded_frames_are_trusted_without_a_scan(unsorted_sales):
+    copy = unsorted_sales.copy()
+    mark_sorted_by_date(copy)
+    assert is_sorted_by_date(copy)
+    assert not is_sorted_by_date(unsorted_sales)
+    copy['flag'] = True
+    assert is_sorted_by_date(copy)
@@ -0,0 +1,46 @@
+import pytest
+import pandas as pd
+from pharma_dashboard.dimensions import DimensionIndex, build_product_index
+from pharma_dashboard.data_processor import preprocess_sales_data
+
+@pytest.fixture
+def products_with_duplicate():
+    return pd.DataFrame({
+        'Product': ['Aspirin', 'Paracetamol', 'Aspirin'],
+        'Category': ['Pain Relief', 'Pain Relief', 'Cardio'],
+        'product_id': [1, 2, 3]
+    })
+
+def test_duplicate_keys_are_reported_not_fanned_out(products_with_duplicate):
+    index = build_product_index(products_with_duplicate)
+    assert index.duplicate_keys == ['Aspirin']
+    assert len(index) == 2
+    
+    sales = pd.Series(pd.Categorical(['Aspirin', 'Aspirin', 'Paracetamol']))
+    rows = index.positions(sales)
+    assert list(index.take('Category', rows)) == ['Pain Relief', 'Pain Relief', 'Pain Relief']
+    assert list(index.take('product_id', rows)) == [1, 1, 2]
+
+def test_duplicate_keys_raise_when_requested(products_with_duplicate):
+    with pytest.raises(ValueError):
+        DimensionIndex(products_with_duplicate, 'Product', ['Category'], on_duplicate='raise')
+
+def test_unknown_keys_are_filled(products_with_duplicate):
+    index = build_product_index(products_with_duplicate)
+    rows = index.positions(pd.Series(['Ibuprofen', 'Paracetamol']))
+    assert list(index.take('Category', rows, fill_value='Unknown')) == ['Unknown', 'Pain Relief']
+    assert index.take('product_id', rows).isna().tolist() == [True, False]
+
+def test_preprocess_does_not_duplicate_rows(products_with_duplicate):
+    sales = pd.DataFrame({
+        'Date': ['2023-01-01', '2023-01-02'],
+        'Product': ['Aspirin', 'Ibuprofen'],
+        'Customer': ['Customer_1', 'Customer_2'],
+        'Quantity': [1, 2],
+        'Total': [5.0, 10.0]
+    })
+    customers = pd.DataFrame({'Customer': ['Customer_1'], 'Region': ['East']})
+    processed = preprocess_sales_data(sales, products_with_duplicate, customers)
+    assert len(processed) == 2
+    assert processed['category'].tolist() == ['Pain Relief', 'Unknown']
+    assert processed['region'].tolist() == ['East', 'Unknown']
@@ -0,0 +1,46 @@
+import pytest
+import numpy as np
+import pandas as pd
+from pharma_dashboard.downsampling import downsample, downsample_indices, downsample_long, lttb_indices, point_budget
+
+@pytest.fixture
+def series():
+    rng = np.random.default_rng(5)
+    days = pd.date_range('2020-01-01', periods=3000, freq='D')
+    values = np.sin(np.arange(3000) / 200) * 100 + rng.normal(0, 5, 3000)
+    values[1234] = 1000.0
+    return days, values
+
+def test_short_series_are_left_alone(series):
+    days, values = series
+    assert len(downsample_indices(days[:100], values[:100], 200)) == 100
+    assert len(downsample_indices(days, values, None)) == len(values)
+
+@pytest.mark.parametrize('method', ['lttb', 'minmax'])
+def test_series_fit_the_budget_and_keep_the_ends_and_spikes(series, method):
+    days, values = series
+    keep = downsample_indices(days, values, 300, method)
+    assert len(keep) <= 300
+    assert keep[0] == 0 and keep[-1] == len(values) - 1
+    assert np.all(np.diff(keep) > 0)
+    assert 1234 in keep
+
+def test_lttb_keeps_the_shape_of_a_line(series):
+    days, values = series
+    x, y = downsample(days, values, 500)
+    # Interpolating the kept points reproduces the smooth part of the series
+    trend = np.sin(np.arange(3000) / 200) * 100
+    rebuilt = np.interp(days.asi8, pd.DatetimeIndex(x).asi8, y)
+    assert np.median(np.abs(rebuilt - trend)) < 10
+    assert len(lttb_indices(np.arange(10.0), np.arange(10.0), 2)) == 10
+
+def test_missing_values_and_long_frames(series):
+    days, values = series
+    values = values.copy()
+    values[:50] = np.nan
+    keep = downsample_indices(days, values, 100)
+    assert keep[0] == 50 and len(keep) == 100
+    frame = pd.DataFrame({'date': np.tile(days, 2), 'region': np.repeat(['East', 'West'], len(days)), 'sales_amount': np.tile(values, 2)})
+    thinned = downsample_long(frame, 'date', 'sales_amount', 'region', 100)
+    assert thinned.groupby('region').size().tolist() == [100, 100]
+    assert point_budget(350) == 350
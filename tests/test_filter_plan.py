@@ -0,0 +1,61 @@
+import pytest
+import numpy as np
+import pandas as pd
+from pharma_dashboard.bitmap_index import BitmapIndex
+from pharma_dashboard.filter_plan import FilterPlan
+from pharma_dashboard.search_index import SearchIndex
+
+@pytest.fixture
+def sales(make_sales):
+    return make_sales(
+        2000, 2, start='2023-01-01', days=120, sort=True,
+        region=['East', 'West', 'North'], category=['Cardio', 'Pain Relief'],
+        product_name=[f'Product_{i}' for i in range(30)], customer_id=[f'Customer_{i}' for i in range(50)]
+    )
+
+def expected_rows(df, start, stop, regions, low, high, term):
+    mask = (
+        (df['date'] >= start) & (df['date'] < stop) &
+        df['region'].isin(regions) &
+        (df['sales_amount'] >= low) & (df['sales_amount'] <= high) &
+        (df['product_name'].str.lower().str.contains(term, regex=False) |
+         df['customer_id'].str.lower().str.contains(term, regex=False))
+    )
+    return np.flatnonzero(mask)
+
+@pytest.mark.parametrize('indexed', [False, True])
+def test_plan_matches_boolean_masks(sales, indexed):
+    bitmap_index = BitmapIndex(sales) if indexed else None
+    search_index = SearchIndex(sales) if indexed else None
+    start, stop = pd.Timestamp('2023-02-01'), pd.Timestamp('2023-04-01')
+    plan = (
+        FilterPlan(sales, bitmap_index, search_index)
+        .date_range(start, stop)
+        .isin('region', ['East', 'North'])
+        .between('sales_amount', 10, 80)
+        .search('uct_1')
+    )
+    expected = expected_rows(sales, start, stop, ['East', 'North'], 10, 80, 'uct_1')
+    np.testing.assert_array_equal(plan.positions(), expected)
+    pd.testing.assert_frame_equal(plan.frame(), sales.iloc[expected])
+
+def test_unsorted_frame_uses_date_predicate(sales):
+    shuffled = sales.sample(frac=1, random_state=0).reset_index(drop=True)
+    start, stop = pd.Timestamp('2023-03-01'), pd.Timestamp('2023-03-15')
+    plan = FilterPlan(shuffled).date_range(start, stop).isin('category', ['Cardio'])
+    expected = (shuffled['date'] >= start) & (shuffled['date'] < stop) & (shuffled['category'] == 'Cardio')
+    np.testing.assert_array_equal(plan.positions(), np.flatnonzero(expected))
+
+def test_date_only_plan_is_a_slice(sales):
+    plan = FilterPlan(sales, BitmapIndex(sales)).date_range('2023-02-01', '2023-02-10').isin('region', [])
+    frame = plan.frame()
+    assert frame['date'].between('2023-02-01', '2023-02-09').all()
+    assert len(frame) == ((sales['date'] >= '2023-02-01') & (sales['date'] < '2023-02-10')).sum()
+
+def test_empty_result_short_circuits(sales):
+    plan = FilterPlan(sales, BitmapIndex(sales)).isin('region', ['Atlantis']).between('sales_amount', 0, 1)
+    assert plan.frame().empty
+
+def test_rejects_index_of_other_frame(sales):
+    with pytest.raises(ValueError):
+        FilterPlan(sales.iloc[:5], BitmapIndex(sales))
@@ -0,0 +1,52 @@
+import pytest
+import numpy as np
+import pandas as pd
+from pharma_dashboard.hyperloglog import CustomerSketches, HyperLogLog, count_distinct, standard_error
+
+@pytest.fixture
+def sales(make_sales):
+    return make_sales(
+        60000, 3, days=400, amount=False,
+        customer_id=lambda rng, n: pd.Categorical([f'C{i}' for i in rng.integers(0, 30000, n)]),
+        region=['East', 'West', 'North'], customer_type=['Hospital', 'Clinic', 'Pharmacy']
+    )
+
+def within_bounds(estimate, exact, precision=12):
+    # Three standard errors
+    return abs(estimate - exact) <= 3 * standard_error(precision) * exact
+
+def test_sketch_estimates_and_merges():
+    values = np.arange(50000)
+    first, second = HyperLogLog().add(values[:30000]), HyperLogLog().add(values[20000:])
+    assert within_bounds(first.count(), 30000)
+    assert within_bounds(first.merge(second).count(), 50000)
+    assert HyperLogLog().add(['a', 'b', 'a', None]).count() == 2
+    with pytest.raises(ValueError):
+        first.merge(HyperLogLog(10))
+
+def test_count_distinct_is_exact_for_small_inputs():
+    values = pd.Series(['a', 'b', 'a', None])
+    assert count_distinct(values) == 2
+    assert within_bounds(count_distinct(np.arange(20000) % 15000, exact_limit=100), 15000)
+
+@pytest.mark.parametrize('start, stop, selections', [
+    (None, None, {}),
+    ('2022-02-01', '2022-11-15', {'region': ['East', 'North']}),
+    ('2022-05-01', '2023-01-01', {'region': ['West'], 'customer_type': ['Clinic']}),
+])
+def test_customer_sketches_match_nunique(sales, start, stop, selections):
+    sketches = CustomerSketches(sales)
+    mask = np.ones(len(sales), dtype=bool)
+    if start is not None:
+        mask &= (sales['date'] >= start) & (sales['date'] < stop)
+    for column, values in selections.items():
+        mask &= sales[column].isin(values)
+    exact = sales.loc[mask, 'customer_id'].nunique()
+    assert sketches.unique_customers(start, stop, exact=True, **selections) == exact
+    assert within_bounds(sketches.unique_customers(start, stop, exact=False, **selections), exact)
+
+def test_small_slices_are_counted_exactly(sales):
+    sketches = CustomerSketches(sales, exact_limit=500)
+    day = sales[sales['date'] == '2022-03-01']
+    assert sketches.unique_customers('2022-03-01', '2022-03-02') == day['customer_id'].nunique()
+    assert sketches.unique_customers('2030-01-01', '2031-01-01') == 0
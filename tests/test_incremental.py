@@ -0,0 +1,110 @@
+import pytest
+import pandas as pd
+from pharma_dashboard.data_processor import load_and_preprocess_data
+from pharma_dashboard import incremental
+from pharma_dashboard.incremental import append_processed_rows, refresh_sales_dataset, read_sales_dataset
+
+HEADER = 'Invoice ID,Date,Customer,Product,Quantity,Unit Price,Total\n'
+
+@pytest.fixture
+def data_dir(tmp_path):
+    pd.DataFrame({
+        'Product': ['Aspirin', 'Paracetamol'],
+        'Category': ['Pain Relief', 'Pain Relief'],
+        'product_id': [1, 2]
+    }).to_csv(tmp_path / 'products.csv', index=False)
+    pd.DataFrame({
+        'Customer': ['Customer_1', 'Customer_2'],
+        'Region': ['East', 'South'],
+        'Customer Type': ['Hospital', 'Clinic'],
+        'customer_id': [1, 2]
+    }).to_csv(tmp_path / 'customers.csv', index=False)
+    (tmp_path / 'sales.csv').write_text(
+        HEADER +
+        '1,2023-01-01,Customer_1,Aspirin,10,5.0,50.0\n'
+        '2,2023-01-02,Customer_2,Paracetamol,20,10.0,200.0\n'
+    )
+    return tmp_path
+
+def append(data_dir, text):
+    with open(data_dir / 'sales.csv', 'a') as f:
+        f.write(text)
+
+def assert_matches_full_load(data_dir):
+    full_sales, _, _ = load_and_preprocess_data(data_dir, use_snapshot=False)
+    incremental_sales = read_sales_dataset(data_dir)
+    pd.testing.assert_frame_equal(incremental_sales, full_sales)
+
+def test_appended_rows_are_processed_incrementally(data_dir):
+    assert refresh_sales_dataset(data_dir)['mode'] == 'full'
+    assert refresh_sales_dataset(data_dir)['mode'] == 'unchanged'
+    
+    append(data_dir, '3,2023-01-03,Customer_1,Paracetamol,1,10.0,10.0\n')
+    summary = refresh_sales_dataset(data_dir)
+    assert summary == {'mode': 'append', 'rows_added': 1, 'rows': 3}
+    assert_matches_full_load(data_dir)
+
+def test_appended_rows_are_passed_to_on_append(data_dir):
+    batches = []
+    refresh_sales_dataset(data_dir, on_append=batches.append)
+    assert batches == []
+    
+    append(data_dir, '3,2023-01-03,Customer_1,Paracetamol,1,10.0,10.0\n')
+    refresh_sales_dataset(data_dir, on_append=batches.append)
+    assert len(batches) == 1
+    assert list(batches[0]['sales_amount']) == [10.0]
+
+def test_appending_processed_rows_matches_reading_the_dataset(data_dir):
+    refresh_sales_dataset(data_dir)
+    served = read_sales_dataset(data_dir)
+    batches = []
+    # A back-dated row with a product the served frame has not seen yet
+    append(data_dir, '3,2022-12-31,Customer_2,Ibuprofen,1,10.0,10.0\n')
+    refresh_sales_dataset(data_dir, on_append=batches.append)
+    pd.testing.assert_frame_equal(append_processed_rows(served, batches[0]), read_sales_dataset(data_dir))
+
+def test_partial_trailing_line_waits_for_next_refresh(data_dir):
+    refresh_sales_dataset(data_dir)
+    append(data_dir, '3,2023-01-03,Customer_1,Parac')
+    assert refresh_sales_dataset(data_dir)['mode'] == 'unchanged'
+    
+    append(data_dir, 'etamol,1,10.0,10.0\n')
+    assert refresh_sales_dataset(data_dir)['rows_added'] == 1
+    assert_matches_full_load(data_dir)
+
+def test_truncation_triggers_full_rebuild(data_dir):
+    refresh_sales_dataset(data_dir)
+    (data_dir / 'sales.csv').write_text(HEADER + '1,2023-01-01,Customer_1,Aspirin,10,5.0,50.0\n')
+    summary = refresh_sales_dataset(data_dir)
+    assert summary['mode'] == 'full'
+    assert summary['rows'] == 1
+    assert_matches_full_load(data_dir)
+
+def test_rewritten_history_triggers_full_rebuild(data_dir):
+    refresh_sales_dataset(data_dir)
+    (data_dir / 'sales.csv').write_text(
+        HEADER +
+        '1,2023-01-01,Customer_1,Aspirin,10,5.0,50.0\n'
+        '2,2023-01-02,Customer_2,Aspirin,20,10.0,200.0\n'
+        '3,2023-01-03,Customer_1,Paracetamol,1,10.0,10.0\n'
+    )
+    summary = refresh_sales_dataset(data_dir)
+    assert summary['mode'] == 'full'
+    assert_matches_full_load(data_dir)
+
+def test_verify_catches_same_size_correction_of_early_rows(data_dir, monkeypatch):
+    monkeypatch.setattr(incremental, 'CHECKPOINT_BYTES', 64)
+    append(data_dir, ''.join(f'{i},2023-01-03,Customer_1,Aspirin,1,5.0,5.0\n' for i in range(3, 150)))
+    refresh_sales_dataset(data_dir)
+    
+    # Same length, more than 4 KiB before the end of the consumed bytes
+    text = (data_dir / 'sales.csv').read_text()
+    (data_dir / 'sales.csv').write_text(text.replace('Aspirin,10,5.0,50.0', 'Aspirin,11,5.0,55.0'))
+    append(data_dir, '150,2023-01-04,Customer_2,Aspirin,1,5.0,5.0\n')
+    summary = refresh_sales_dataset(data_dir, verify=True)
+    assert summary['mode'] == 'full'
+    assert_matches_full_load(data_dir)
+    
+    append(data_dir, '151,2023-01-05,Customer_2,Aspirin,1,5.0,5.0\n')
+    assert refresh_sales_dataset(data_dir)['mode'] == 'append'
+    assert_matches_full_load(data_dir)
@@ -0,0 +1,61 @@
+import pytest
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from pharma_dashboard.cube import SalesCube
+from pharma_dashboard.kpi import EMPTY_KPIS, compute_kpis, top_value
+
+@pytest.fixture
+def sales(make_sales):
+    return make_sales(
+        2500, 4, start='2022-02-01', days=500, units=True, sort=True,
+        region=lambda rng, n: pd.Categorical(rng.choice(['East', 'West', 'North'], n), categories=['East', 'North', 'South', 'West']),
+        category=['Cardio', 'Pain Relief'],
+        product_name=[f'Product_{i}' for i in range(15)]
+    )
+
+def reference_kpis(df, now):
+    daily_sales = df.groupby('date')['sales_amount'].sum()
+    to_date = df['date'].dt.month <= now.month
+    current = df[to_date & (df['date'].dt.year == now.year)]['sales_amount'].sum()
+    previous = df[to_date & (df['date'].dt.year == now.year - 1)]['sales_amount'].sum()
+    return {
+        'total_sales': df['sales_amount'].sum(),
+        'total_units': df['units_sold'].sum(),
+        'avg_order_value': df['sales_amount'].sum() / len(df),
+        'total_orders': len(df),
+        'top_product': df.groupby('product_name', observed=True)['sales_amount'].sum().idxmax(),
+        'top_region': df.groupby('region', observed=True)['sales_amount'].sum().idxmax(),
+        'sales_growth': (daily_sales.iloc[-1] - daily_sales.iloc[0]) / daily_sales.iloc[0] * 100,
+        'avg_daily_sales': df['sales_amount'].sum() / len(daily_sales),
+        'yoy_growth': (current - previous) / previous * 100
+    }
+
+def assert_kpis_equal(actual, expected):
+    assert actual.keys() == expected.keys()
+    for key, value in expected.items():
+        if isinstance(value, str):
+            assert actual[key] == value, key
+        else:
+            assert actual[key] == pytest.approx(value), key
+
+def test_kernel_matches_groupby_reference(sales):
+    now = datetime(2023, 5, 1)
+    assert_kpis_equal(compute_kpis(sales, now), reference_kpis(sales, now))
+
+def test_kernel_on_cube_cells_matches_raw_rows(sales):
+    now = datetime(2023, 5, 1)
+    assert_kpis_equal(compute_kpis(SalesCube(sales).cells, now), compute_kpis(sales, now))
+
+def test_top_value_ignores_unobserved_categories():
+    column = pd.Series(pd.Categorical(['a', 'b', 'a'], categories=['z', 'a', 'b']))
+    assert top_value(column, np.array([-1.0, -5.0, -1.0])) == 'a'
+    assert top_value(pd.Series(['y', 'x', 'x']), np.array([3.0, 2.0, 2.0])) == 'x'
+
+def test_yoy_can_be_skipped(sales):
+    kpis = compute_kpis(sales, datetime(2023, 5, 1), yoy=False)
+    assert kpis['yoy_growth'] == 0
+    assert kpis['total_sales'] == pytest.approx(sales['sales_amount'].sum())
+
+def test_empty_frame_returns_defaults(sales):
+    assert compute_kpis(sales.iloc[:0]) == EMPTY_KPIS
@@ -0,0 +1,199 @@
+import random
+import sqlite3
+import pytest
+from datetime import date, timedelta
+from pharma_dashboard.materialized import (
+    KPI_QUERIES, SQL_DIR, create_summary_tables, named_statements, refresh_kpi_tables, run_kpi_query, run_query
+)
+
+SALES = [
+    # date, region, product, amount, customer, units, created_at
+    ('2023-01-05', 'East', 'Aspirin', 100.0, 'C1', 10, '2023-01-05 10:00:00'),
+    ('2023-01-20', 'East', 'Aspirin', 50.0, 'C2', 5, '2023-01-20 10:00:00'),
+    ('2023-02-03', 'West', 'Ibuprofen', 80.0, 'C1', 8, '2023-02-03 10:00:00'),
+    ('2023-03-15', 'West', 'Aspirin', 30.0, 'C3', 3, '2023-03-15 10:00:00'),
+]
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(':memory:')
+    conn.executescript((SQL_DIR / '01_create_schema.sql').read_text())
+    conn.executemany(
+        "INSERT INTO customers (customer_id, customer_name, customer_type, region) VALUES (?, ?, ?, ?)",
+        [('C1', 'One', 'Hospital', 'East'), ('C2', 'Two', 'Pharmacy', 'East'), ('C3', 'Three', 'Hospital', 'West')]
+    )
+    insert(conn, SALES)
+    create_summary_tables(conn)
+    yield conn
+    conn.close()
+
+def insert(conn, rows):
+    conn.executemany(
+        "INSERT INTO pharma_sales (date, region, product_name, sales_amount, customer_id, units_sold, created_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        rows
+    )
+    conn.commit()
+
+def monthly_sales(conn):
+    return conn.execute(
+        "SELECT month, region, customer_type, product_name, sales_amount, units_sold, order_count "
+        "FROM kpi_monthly_sales ORDER BY 1, 2, 3, 4"
+    ).fetchall()
+
+def recomputed(conn):
+    """The summary as a full aggregate over pharma_sales would give it"""
+    return conn.execute(
+        "SELECT strftime('%Y-%m-01', s.date), s.region, COALESCE(c.customer_type, 'Unknown'), s.product_name, "
+        "SUM(s.sales_amount), SUM(s.units_sold), COUNT(*) "
+        "FROM pharma_sales s LEFT JOIN customers c ON s.customer_id = c.customer_id "
+        "GROUP BY 1, 2, 3, 4 ORDER BY 1, 2, 3, 4"
+    ).fetchall()
+
+def test_first_refresh_builds_every_month(conn):
+    assert refresh_kpi_tables(conn) == {'mode': 'full', 'months': 3}
+    assert monthly_sales(conn) == recomputed(conn)
+    customers = conn.execute("SELECT month, customer_id, sales_amount FROM kpi_customer_monthly ORDER BY 1, 2").fetchall()
+    assert customers[:2] == [('2023-01-01', 'C1', 100.0), ('2023-01-01', 'C2', 50.0)]
+
+def test_only_months_with_new_rows_are_recomputed(conn):
+    refresh_kpi_tables(conn)
+    # Mark an untouched month so a recomputation would be visible
+    conn.execute("UPDATE kpi_monthly_sales SET order_count = -1 WHERE month = '2023-02-01'")
+    conn.commit()
+    insert(conn, [
+        ('2023-03-20', 'West', 'Aspirin', 20.0, 'C4', 2, '2023-04-01 09:00:00'),
+        # Back-dated into January
+        ('2023-01-25', 'East', 'Aspirin', 5.0, 'C1', 1, '2023-04-01 09:05:00'),
+    ])
+    summary = refresh_kpi_tables(conn)
+    assert summary['mode'] == 'incremental'
+    rows = monthly_sales(conn)
+    assert [row for row in rows if row[0] == '2023-02-01'][0][-1] == -1
+    expected = [row for row in recomputed(conn) if row[0] != '2023-02-01']
+    assert [row for row in rows if row[0] != '2023-02-01'] == expected
+    # Customers without a customers row are grouped as Unknown
+    assert ('2023-03-01', 'West', 'Unknown', 'Aspirin', 20.0, 2, 1) in rows
+
+def test_full_refresh_and_empty_source(conn):
+    refresh_kpi_tables(conn)
+    conn.execute("UPDATE kpi_monthly_sales SET order_count = -1")
+    conn.commit()
+    assert refresh_kpi_tables(conn, full=True)['mode'] == 'full'
+    assert monthly_sales(conn) == recomputed(conn)
+    conn.execute("DELETE FROM pharma_sales")
+    assert refresh_kpi_tables(conn) == {'mode': 'unchanged', 'months': 0}
+    assert monthly_sales(conn)
+    assert refresh_kpi_tables(conn, full=True) == {'mode': 'full', 'months': 0}
+    assert monthly_sales(conn) == []
+
+def test_late_committed_rows_within_the_lag_are_summarized(conn):
+    refresh_kpi_tables(conn)
+    # Stamped before the stored mark (2023-03-15 10:00), committed after the refresh
+    insert(conn, [('2023-02-10', 'West', 'Ibuprofen', 40.0, 'C1', 4, '2023-03-15 09:30:00')])
+    refresh_kpi_tables(conn)
+    assert monthly_sales(conn) == recomputed(conn)
+
+# The KPI queries as they read before the summary tables, over pharma_sales
+BASELINE_QUERIES = {
+    'Year-to-Date Sales': """
+        SELECT SUM(sales_amount) as ytd_sales,
+               SUM(sales_amount) / LAG(SUM(sales_amount)) OVER (ORDER BY DATE_TRUNC('year', date)) - 1 as yoy_growth
+        FROM pharma_sales
+        WHERE date >= DATE_TRUNC('year', CURRENT_DATE)""",
+    'Month-to-Date Sales with Plan Comparison': """
+        WITH monthly_plan AS (
+            SELECT date_trunc('month', date) as month, SUM(sales_amount) as actual_sales, 1000000 as planned_sales
+            FROM pharma_sales
+            GROUP BY date_trunc('month', date)
+        )
+        SELECT month, actual_sales, planned_sales, (actual_sales / planned_sales - 1) * 100 as plan_variance_percentage
+        FROM monthly_plan
+        ORDER BY month DESC""",
+    'Sales by Customer Group': """
+        SELECT c.customer_type, SUM(s.sales_amount) as total_sales, COUNT(DISTINCT s.customer_id) as customer_count,
+               SUM(s.sales_amount) / SUM(SUM(s.sales_amount)) OVER () * 100 as sales_percentage
+        FROM pharma_sales s
+        JOIN customers c ON s.customer_id = c.customer_id
+        GROUP BY c.customer_type""",
+    'Monthly Quantity Ordered vs Delivered': """
+        WITH monthly_metrics AS (
+            SELECT DATE_TRUNC('month', date) as month, SUM(units_sold) as quantity_ordered,
+                   SUM(CASE WHEN delivery_status = 'delivered' THEN units_sold ELSE 0 END) as quantity_delivered
+            FROM pharma_sales
+            GROUP BY DATE_TRUNC('month', date)
+        )
+        SELECT month, quantity_ordered, quantity_delivered,
+               ROUND((quantity_delivered::FLOAT / NULLIF(quantity_ordered, 0)) * 100, 2) as fulfillment_rate
+        FROM monthly_metrics
+        ORDER BY month""",
+    'Top 5 Customers by Sales': """
+        SELECT c.customer_name, c.customer_type, SUM(s.sales_amount) as total_sales,
+               COUNT(DISTINCT DATE_TRUNC('month', s.date)) as months_active
+        FROM pharma_sales s
+        JOIN customers c ON s.customer_id = c.customer_id
+        GROUP BY c.customer_name, c.customer_type
+        ORDER BY total_sales DESC
+        LIMIT 5""",
+    'YOY Growth by Region': """
+        WITH yearly_sales AS (
+            SELECT region, DATE_TRUNC('year', date) as year, SUM(sales_amount) as yearly_sales
+            FROM pharma_sales
+            GROUP BY region, DATE_TRUNC('year', date)
+        )
+        SELECT region, year, yearly_sales,
+               (yearly_sales / LAG(yearly_sales) OVER (PARTITION BY region ORDER BY year) - 1) * 100 as yoy_growth
+        FROM yearly_sales
+        ORDER BY region, year""",
+    'Monthly Churn Rate': """
+        WITH customer_activity AS (
+            SELECT customer_id, DATE_TRUNC('month', date) as month,
+                   LEAD(DATE_TRUNC('month', date)) OVER (PARTITION BY customer_id ORDER BY date) as next_purchase
+            FROM pharma_sales
+        )
+        SELECT month, COUNT(DISTINCT customer_id) as total_customers,
+               COUNT(DISTINCT CASE WHEN next_purchase IS NULL OR next_purchase > month + INTERVAL '3 months'
+                     THEN customer_id END) as churned_customers,
+               ROUND((COUNT(DISTINCT CASE WHEN next_purchase IS NULL OR next_purchase > month + INTERVAL '3 months'
+                     THEN customer_id END)::FLOAT / NULLIF(COUNT(DISTINCT customer_id), 0)) * 100, 2) as churn_rate
+        FROM customer_activity
+        GROUP BY month
+        ORDER BY month"""
+}
+
+@pytest.fixture
+def history(conn):
+    """About two years of sales up to today, with delivery status and a customer missing from customers"""
+    rng = random.Random(7)
+    conn.execute("ALTER TABLE pharma_sales ADD COLUMN delivery_status VARCHAR(20)")
+    conn.execute("DELETE FROM pharma_sales")
+    conn.execute("INSERT INTO customers (customer_id, customer_name, customer_type, region) VALUES ('C4', 'Four', 'Doctor', 'North')")
+    start = date(date.today().year - 1, 1, 1)
+    rows = []
+    for _ in range(400):
+        day = start + timedelta(days=rng.randrange((date.today() - start).days + 1))
+        rows.append((
+            day.isoformat(), rng.choice(['East', 'West', 'North']), rng.choice(['Aspirin', 'Ibuprofen']),
+            round(rng.uniform(1, 500), 2), rng.choice(['C1', 'C2', 'C3', 'C4', 'C5']), rng.randrange(1, 20),
+            f'{day.isoformat()} 10:00:00', rng.choice(['delivered', 'pending'])
+        ))
+    conn.executemany(
+        "INSERT INTO pharma_sales (date, region, product_name, sales_amount, customer_id, units_sold, created_at, "
+        "delivery_status) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        rows
+    )
+    conn.commit()
+    refresh_kpi_tables(conn)
+    return conn
+
+def rounded(rows):
+    return [tuple(round(value, 6) if isinstance(value, float) else value for value in row) for row in rows]
+
+@pytest.mark.parametrize('title', list(BASELINE_QUERIES))
+def test_kpi_queries_match_the_queries_over_pharma_sales(history, title):
+    expected = run_query(history, BASELINE_QUERIES[title])
+    assert expected
+    assert rounded(run_kpi_query(history, title)) == rounded(expected)
+
+def test_every_kpi_query_is_compared():
+    assert list(named_statements(SQL_DIR / KPI_QUERIES)) == list(BASELINE_QUERIES)
@@ -0,0 +1,46 @@
+import pytest
+import pandas as pd
+from pharma_dashboard import parallel_loader
+from pharma_dashboard.data_processor import load_and_preprocess_data
+
+@pytest.fixture
+def data_dir(tmp_path):
+    pd.DataFrame({
+        'Product': ['Aspirin', 'Paracetamol'],
+        'Category': ['Pain Relief', 'Pain Relief'],
+        'product_id': [1, 2]
+    }).to_csv(tmp_path / 'products.csv', index=False)
+    pd.DataFrame({
+        'Customer': ['Customer_1', 'Customer_2'],
+        'Region': ['East', 'South'],
+        'Customer Type': ['Hospital', 'Clinic'],
+        'customer_id': [1, 2]
+    }).to_csv(tmp_path / 'customers.csv', index=False)
+    rows = 40
+    pd.DataFrame({
+        'Invoice ID': range(rows),
+        'Date': [f'2023-01-{i % 28 + 1:02d}' if i != 7 else 'not a date' for i in range(rows)],
+        'Customer': [f'Customer_{i % 3 + 1}' for i in range(rows)],
+        'Product': ['Aspirin', 'Paracetamol', 'Ibuprofen', 'Aspirin'] * (rows // 4),
+        'Quantity': range(1, rows + 1),
+        'Unit Price': [5.0] * rows,
+        'Total': [5.0 * (i + 1) for i in range(rows)]
+    }).to_csv(tmp_path / 'sales.csv', index=False)
+    return tmp_path
+
+def test_split_byte_ranges_are_line_aligned(data_dir):
+    path = data_dir / 'sales.csv'
+    header, ranges = parallel_loader.split_byte_ranges(path, 4)
+    content = path.read_bytes()
+    assert content.startswith(header)
+    assert ranges[0][0] == len(header)
+    assert ranges[-1][1] == len(content)
+    for (_, end), (start, _) in zip(ranges, ranges[1:]):
+        assert end == start
+        assert content[start - 1:start] == b'\n'
+
+def test_parallel_load_matches_serial(data_dir, monkeypatch):
+    monkeypatch.setattr(parallel_loader, 'MIN_RANGE_BYTES', 1)
+    serial_sales, _, _ = load_and_preprocess_data(data_dir, use_snapshot=False)
+    parallel_sales, _, _ = load_and_preprocess_data(data_dir, use_snapshot=False, workers=3)
+    pd.testing.assert_frame_equal(parallel_sales, serial_sales)
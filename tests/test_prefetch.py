@@ -0,0 +1,21 @@
+import threading
+from pharma_dashboard.prefetch import Prefetcher
+
+def test_duplicate_and_excess_jobs_are_skipped():
+    prefetcher = Prefetcher(max_pending=2)
+    release = threading.Event()
+    runs = []
+    assert prefetcher.submit(('Trend', 1), lambda: (release.wait(5), runs.append('trend')))
+    assert not prefetcher.submit(('Trend', 1), lambda: runs.append('again'))
+    assert prefetcher.submit(('Regional', 1), lambda: runs.append('regional'))
+    assert not prefetcher.submit(('Product', 1), lambda: runs.append('product'))
+    release.set()
+    prefetcher.executor.shutdown(wait=True)
+    assert runs == ['trend', 'regional']
+    assert prefetcher.pending == set()
+
+def test_failed_jobs_are_released():
+    prefetcher = Prefetcher()
+    prefetcher.submit('bad', lambda: 1 / 0)
+    prefetcher.executor.shutdown(wait=True)
+    assert prefetcher.pending == set()
@@ -0,0 +1,47 @@
+import pytest
+import pandas as pd
+from pharma_dashboard.prefix_sums import DailyPrefixSums, comparison_periods, flatten_comparison, period_totals
+
+@pytest.fixture
+def sales(make_sales):
+    return make_sales(3000, 5, days=540, units=True,
+                      region=['East', 'West', 'North'], category=['Cardio', 'Pain Relief', 'Antibiotics'])
+
+def rows_between(df, start, stop, regions=None, categories=None):
+    mask = (df['date'] >= start) & (df['date'] < stop)
+    if regions:
+        mask &= df['region'].isin(regions)
+    if categories:
+        mask &= df['category'].isin(categories)
+    return df[mask]
+
+def assert_totals_equal(actual, expected):
+    assert actual['total_orders'] == expected['total_orders']
+    assert actual['total_units'] == expected['total_units']
+    assert actual['total_sales'] == pytest.approx(expected['total_sales'])
+    assert actual['avg_order_value'] == pytest.approx(expected['avg_order_value'])
+
+@pytest.mark.parametrize('regions, categories', [(None, None), (['East'], None), (['East', 'North'], ['Cardio'])])
+def test_totals_match_filtered_rows(sales, regions, categories):
+    prefix = DailyPrefixSums(sales)
+    start, stop = pd.Timestamp('2022-03-15'), pd.Timestamp('2023-02-01')
+    actual = prefix.totals(start, stop, region=regions, category=categories)
+    assert_totals_equal(actual, period_totals(rows_between(sales, start, stop, regions, categories)))
+
+def test_compare_covers_previous_period_and_last_year(sales):
+    prefix = DailyPrefixSums(sales)
+    start, stop = pd.Timestamp('2023-03-01'), pd.Timestamp('2023-04-01')
+    comparison = prefix.compare(start, stop, region=['West'])
+    periods = comparison_periods(start, stop)
+    assert periods['previous'] == (pd.Timestamp('2023-01-29'), start)
+    assert periods['last_year'] == (pd.Timestamp('2022-03-01'), pd.Timestamp('2022-04-01'))
+    for period, (period_start, period_stop) in periods.items():
+        expected = period_totals(rows_between(sales, period_start, period_stop, ['West']))
+        assert_totals_equal(comparison[period], expected)
+    assert 'previous_total_sales' in flatten_comparison(comparison)
+
+def test_ranges_outside_data_and_unknown_values_are_empty(sales):
+    prefix = DailyPrefixSums(sales)
+    assert prefix.totals('2010-01-01', '2011-01-01')['total_orders'] == 0
+    assert prefix.totals(region=['Atlantis'])['total_sales'] == 0
+    assert prefix.totals()['total_orders'] == len(sales)
@@ -0,0 +1,20 @@
+import pytest
+from pharma_dashboard.rerun_timing import SectionTimings
+
+def test_sections_are_timed_even_when_they_fail():
+    timings = SectionTimings()
+    assert timings.last('trend') is None
+    with timings.section('trend'):
+        pass
+    with pytest.raises(ValueError):
+        with timings.section('churn'):
+            raise ValueError
+    assert timings.last('trend') >= 0
+    assert list(timings.durations) == ['trend', 'churn']
+
+def test_summary_keeps_only_recent_runs():
+    timings = SectionTimings(history=3)
+    for seconds in (1.0, 0.002, 0.004, 0.006):
+        timings.record('trend', seconds)
+    summary = timings.summary()
+    assert summary.to_dict('records') == [{'section': 'trend', 'runs': 3, 'last_ms': 6.0, 'median_ms': 4.0}]
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+from datetime import date
+from pharma_dashboard.result_cache import ResultCache, canonical_filters, dataset_version
+
+def test_lru_eviction_by_entries():
+    cache = ResultCache(max_entries=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    stats = cache.stats()
+    assert stats['evictions'] == 1
+    assert (stats['hits'], stats['misses']) == (3, 1)
+
+def test_memory_budget_evicts_and_skips_oversized():
+    cache = ResultCache(max_bytes=10_000)
+    cache.put('a', np.zeros(700))
+    cache.put('b', np.zeros(700))
+    assert cache.get('a') is None
+    assert cache.stats()['bytes'] <= 10_000
+    cache.put('huge', np.zeros(5_000))
+    assert cache.get('huge') is None
+    assert cache.get('b') is not None
+
+def test_get_or_compute_computes_once():
+    cache = ResultCache()
+    calls = []
+    for _ in range(3):
+        assert cache.get_or_compute('key', lambda: calls.append(1) or 'value') == 'value'
+    assert len(calls) == 1
+
+def test_equivalent_filter_states_share_a_key():
+    filters_a, key_a = canonical_filters(
+        start_date=date(2023, 1, 1), end_date=pd.Timestamp('2023-03-31'),
+        regions=['West', 'East'], min_amount=10.004, max_amount=99.991
+    )
+    _, key_b = canonical_filters(
+        start_date=pd.Timestamp('2023-01-01'), end_date=date(2023, 3, 31),
+        regions=('East', 'West'), min_amount=10.001, max_amount=99.999
+    )
+    assert key_a == key_b
+    assert filters_a['regions'] == ('East', 'West')
+    # Amount bounds widen to whole cents
+    assert filters_a['min_amount'] == 10.0 and filters_a['max_amount'] == 100.0
+
+def test_dataset_version_tracks_content():
+    df = pd.DataFrame({'sales_amount': [1.0, 2.0]})
+    version = dataset_version(df)
+    assert dataset_version(df) == version
+    assert dataset_version(pd.DataFrame({'sales_amount': [1.0, 3.0]})) != version
+    # Derived frames do not inherit the memoized version, even at the same length
+    assert dataset_version(df.iloc[:1]) != version
+    edited = df.copy()
+    edited.loc[0, 'sales_amount'] = 5.0
+    assert dataset_version(edited) != version
@@ -0,0 +1,32 @@
+import pytest
+import numpy as np
+import pandas as pd
+from pharma_dashboard.search_index import NgramIndex, SearchIndex
+
+@pytest.fixture
+def sales():
+    rng = np.random.default_rng(1)
+    products = ['Aspirin 100mg', 'Paracetamol', 'Ibuprofen', 'Amoxicillin', 'Atorvastatin']
+    customers = [f'Customer_{i}' for i in range(25)] + ['St. Mary Hospital']
+    return pd.DataFrame({
+        'product_name': pd.Categorical(rng.choice(products, 500)),
+        'customer_id': pd.Categorical(rng.choice(customers, 500))
+    })
+
+def contains_rows(df, term):
+    term = term.lower()
+    mask = (
+        df['product_name'].str.lower().str.contains(term, regex=False) |
+        df['customer_id'].str.lower().str.contains(term, regex=False)
+    )
+    return np.flatnonzero(mask)
+
+@pytest.mark.parametrize('term', ['ASPIRIN', 'cillin', 'mer_1', 'r_2', 'in', 'a', '. m', 'zzz', '100mg'])
+def test_rows_match_str_contains(sales, term):
+    np.testing.assert_array_equal(SearchIndex(sales).rows(term), contains_rows(sales, term))
+
+def test_match_names_verifies_candidates():
+    index = NgramIndex(pd.Series(['bcabca', 'xabcabc', 'xyz', 'xabcabc']))
+    # 'bcabca' has every trigram of 'abcabc' but does not contain it
+    assert index.match_names('abcabc').tolist() == [1]
+    assert index.rows('abcabc').tolist() == [1, 3]
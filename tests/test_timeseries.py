@@ -0,0 +1,40 @@
+import pytest
+import numpy as np
+import pandas as pd
+from pharma_dashboard.timeseries import TOTAL, DailyMatrix
+
+@pytest.fixture
+def sales(make_sales):
+    return make_sales(
+        2000, 11, days=500,
+        region=lambda rng, n: pd.Categorical(rng.choice(['East', 'West', 'North'], n), categories=['East', 'North', 'South', 'West'])
+    )
+
+@pytest.fixture
+def reference(sales):
+    """Daily sums per region with missing days filled with zeros, via pandas"""
+    daily = sales.pivot_table(index='date', columns='region', values='sales_amount', aggfunc='sum', observed=True)
+    days = pd.date_range(sales['date'].min(), sales['date'].max(), freq='D')
+    return daily.reindex(days).fillna(0.0)
+
+def test_matrix_is_dense_and_skips_unobserved_groups(sales, reference):
+    daily = DailyMatrix(sales, 'region')
+    assert list(daily.groups) == ['East', 'North', 'West']
+    assert len(daily.days) == len(reference)
+    np.testing.assert_allclose(daily.values, reference.to_numpy())
+    assert list(DailyMatrix(sales).groups) == [TOTAL]
+
+def test_window_features_match_pandas(sales, reference):
+    daily = DailyMatrix(sales, 'region')
+    np.testing.assert_allclose(daily.rolling_mean(7), reference.rolling(7).mean().to_numpy())
+    np.testing.assert_allclose(daily.rolling_mean(14, min_periods=1), reference.rolling(14, min_periods=1).mean().to_numpy())
+    np.testing.assert_allclose(daily.ewma(10), reference.ewm(span=10).mean().to_numpy())
+    np.testing.assert_allclose(daily.cumulative(), reference.cumsum().to_numpy())
+
+def test_long_rows_for_plotting(sales, reference):
+    rows = DailyMatrix(sales, 'region').long()
+    assert list(rows.columns) == ['date', 'region', 'sales_amount']
+    assert rows['sales_amount'].sum() == pytest.approx(sales['sales_amount'].sum())
+    expected = reference.rename_axis(index='date', columns='region').stack().rename('sales_amount').reset_index()
+    pd.testing.assert_frame_equal(rows, expected.astype({'region': object}), check_dtype=False)
+    assert DailyMatrix(sales.iloc[:0], 'region').values.shape == (0, 0)
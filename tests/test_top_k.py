@@ -0,0 +1,50 @@
+import pytest
+import numpy as np
+import pandas as pd
+from pharma_dashboard.top_k import TopKTracker, top_k_exact
+
+@pytest.fixture
+def sales(make_sales):
+    return make_sales(
+        40000, 9, days=120,
+        customer_id=lambda rng, n: pd.Categorical([f'C{i}' for i in rng.zipf(1.4, n) % 3000]),
+        product_name=lambda rng, n: pd.Categorical(rng.choice(['A', 'B', 'C', 'D'], n, p=[0.4, 0.3, 0.2, 0.1]), categories=['A', 'B', 'C', 'D', 'E']),
+        region=['East', 'West']
+    )
+
+def exact_totals(df, dimension, start, stop):
+    rows = df[(df['date'] >= start) & (df['date'] < stop)]
+    return rows.groupby(dimension, observed=True)['sales_amount'].sum()
+
+def test_exact_top_k_matches_groupby(sales):
+    expected = sales.groupby('product_name', observed=True)['sales_amount'].sum().nlargest(3)
+    top = top_k_exact(sales['product_name'], sales['sales_amount'], 3)
+    assert [label for label, _ in top] == list(expected.index)
+    assert [total for _, total in top] == pytest.approx(list(expected))
+    # Unobserved categories never appear, even with k larger than the observed values
+    assert [label for label, _ in top_k_exact(sales['product_name'], k=10)] == ['A', 'B', 'C', 'D']
+
+def test_untruncated_tracker_is_exact(sales):
+    tracker = TopKTracker(capacity=10).update(sales)
+    top = tracker.top('product_name', 2, '2022-02-01', '2022-03-15')
+    expected = exact_totals(sales, 'product_name', '2022-02-01', '2022-03-15').nlargest(2)
+    assert list(top['product_name']) == list(expected.index)
+    assert list(top['sales_amount']) == pytest.approx(list(expected))
+    assert (top['error'] == 0).all()
+
+def test_truncated_buckets_bound_true_totals(sales):
+    # Ingest in two batches that share days, so summaries are merged
+    tracker = TopKTracker(capacity=8).update(sales.iloc[::2]).update(sales.iloc[1::2])
+    top = tracker.top('customer_id', 5, '2022-01-15', '2022-04-01')
+    expected = exact_totals(sales, 'customer_id', '2022-01-15', '2022-04-01')
+    truth = expected.loc[top['customer_id']].to_numpy()
+    assert np.all(top['sales_amount'].to_numpy() <= truth + 1e-6)
+    assert np.all(truth <= (top['sales_amount'] + top['error']).to_numpy() + 1e-6)
+    assert list(top['customer_id'][:3]) == list(expected.nlargest(3).index)
+
+def test_tracker_learns_new_values_and_empty_ranges(sales):
+    tracker = TopKTracker().update(sales)
+    extra = sales.iloc[:1].assign(region=pd.Categorical(['North']), sales_amount=1e9)
+    tracker.update(extra)
+    assert tracker.top('region', 1)['region'].iloc[0] == 'North'
+    assert tracker.top('region', 3, '2030-01-01', '2030-02-01').empty
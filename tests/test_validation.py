@@ -0,0 +1,56 @@
+import pytest
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from pharma_dashboard.validation import (
+    allowed_values, not_in_future, not_null, positive, run_rules, totals_match, unique
+)
+
+@pytest.fixture
+def raw_sales():
+    return pd.DataFrame({
+        'Invoice ID': ['INV-1', 'INV-2', 'INV-3', 'INV-4', 'INV-5'],
+        'Date': pd.to_datetime(['2023-01-01', '2099-01-01', '2023-01-03', '2023-01-04', '2023-01-05']),
+        'Quantity': [10, 5, 0, 2, 3],
+        'Unit_Price': [5.0, 1.0, 2.0, -1.0, 4.0],
+        'Total': [50.0, 5.0, 0.0, -2.0, 13.0]
+    })
+
+SALES_RULES = [
+    not_in_future('Date', now=datetime(2024, 1, 1)),
+    positive('Quantity'),
+    positive('Unit_Price'),
+    totals_match('Total', 'Quantity', 'Unit_Price')
+]
+
+def sequential_clean(df):
+    df = df[df['Date'] <= datetime(2024, 1, 1)]
+    df = df[df['Quantity'] > 0]
+    df = df[df['Unit_Price'] > 0]
+    return df[np.isclose(df['Total'], df['Quantity'] * df['Unit_Price'], rtol=1e-05)]
+
+def test_run_rules_matches_sequential_filters(raw_sales):
+    cleaned, _ = run_rules(raw_sales, SALES_RULES)
+    pd.testing.assert_frame_equal(cleaned, sequential_clean(raw_sales))
+
+def test_run_rules_report(raw_sales):
+    _, report = run_rules(raw_sales, SALES_RULES, id_column='Invoice ID')
+    assert report['total_rows'] == 5
+    assert report['valid_rows'] == 1
+    assert report['rejected_rows'] == 4
+    assert report['rules']['not_in_future(Date)'] == {'failed': 1, 'sample_ids': ['INV-2']}
+    assert report['rules']['positive(Quantity)'] == {'failed': 1, 'sample_ids': ['INV-3']}
+    assert report['rules']['positive(Unit_Price)'] == {'failed': 1, 'sample_ids': ['INV-4']}
+    assert report['rules']['totals_match(Total)'] == {'failed': 1, 'sample_ids': ['INV-5']}
+
+def test_dimension_rules():
+    customers = pd.DataFrame({
+        'Customer': ['A', 'A', 'B', None],
+        'Customer_Type': ['Hospital', 'Hospital', 'Vet', 'Clinic'],
+        'customer_id': [1, 1, 2, 3]
+    })
+    rules = [unique(['customer_id']), not_null(['Customer']),
+             allowed_values('Customer_Type', ['Hospital', 'Clinic', 'Pharmacy'])]
+    cleaned, report = run_rules(customers, rules)
+    assert cleaned['customer_id'].tolist() == [1]
+    assert report['rules']['unique(customer_id)']['sample_ids'] == [1]